@@ -0,0 +1,68 @@
+"""Benchmark the lexical classifier of commented-out code against the previous one (ast.parse)
+
+    python benchmarks/bench_classifier.py [--passes 50] [--repeat 5]
+
+On the comments labelled by hand in tests/data/comments.tsv, which the tests check the accuracy
+on. The cache of parsed comments is cleared before every pass, repeated comments aren't free.
+"""
+
+import ast
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable
+
+from spell import classifier
+
+CORPUS: Path = Path(__file__).parent.parent / "tests" / "data" / "comments.tsv"
+
+
+def read_corpus() -> list[tuple[bool, str]]:
+    labelled = []
+    for line in CORPUS.read_text().splitlines():
+        if line and not line.startswith("#"):
+            label, comment = line.split("\t", 1)
+            labelled.append((label == "code", comment))
+    return labelled
+
+
+def parses(comment: str) -> bool:
+    """Whether the comment is valid python (as the classifier used to tell code)"""
+    try:
+        ast.parse(comment)
+    except SyntaxError:
+        return False
+    return True
+
+
+def best_of(classify: Callable[[str], bool], comments: list[str], passes: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(passes):
+            classifier._parsed.clear()
+            for comment in comments:
+                classify(comment)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--passes", type=int, default=50, help="Number of passes over the corpus")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = read_corpus()
+    comments = [comment for _, comment in corpus]
+    print(f"comments: {len(comments)} x {args.passes}")
+
+    for name, classify in (("ast.parse", parses), ("is_code", classifier.is_code)):
+        accuracy = sum(classify(comment) == label for label, comment in corpus) / len(corpus)
+        seconds = best_of(classify, comments, args.passes, args.repeat)
+        rate = len(comments) * args.passes / seconds
+        print(f"{name:<10}: {seconds * 1000:8.1f} ms, {rate:10,.0f} comments/s, {accuracy:.0%} accurate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark the single pass extraction against the previous multi-pass one (ast + lines)
+
+    python benchmarks/bench_extraction.py [--scale 200] [--repeat 5]
+
+Also compares the memory held by extracted comments and docstrings as objects and as a batch.
+"""
+
+import ast
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable
+
+from spell.parser import extract, extract_batch
+
+SEED: Path = Path(__file__).parent.parent / "examples" / "1.py"
+
+
+def multi_pass(source: str) -> tuple[list[str], list[str]]:
+    """Docstrings by walking the ast, comments by scanning lines (as Parser used to)"""
+    nodes = (ast.AsyncFunctionDef, ast.FunctionDef, ast.ClassDef, ast.Module)
+    docstrings = [ast.get_docstring(n) for n in ast.walk(ast.parse(source)) if isinstance(n, nodes)]
+    comments = [line for line in source.splitlines() if line.strip().startswith("#")]
+    return comments, [d for d in docstrings if d]
+
+
+def single_pass(source: str) -> tuple[list[str], list[str]]:
+    comments, docstrings = extract(source)
+    return [c.comment or "" for c in comments], [d.docstring or "" for d in docstrings]
+
+
+def best_of(func: Callable[[str], object], source: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(source)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def held(func: Callable[[str], object], source: str) -> int:
+    """Returns the memory (in bytes) allocated by func and still held by its result"""
+    tracemalloc.start()
+    try:
+        result = func(source)  # noqa: F841
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--scale", type=int, default=200, help="Number of copies of the seed file")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    source = SEED.read_text() * args.scale
+    print(f"source: {len(source) / 2**20:.1f} MiB, {source.count(chr(10))} lines")
+
+    baseline = best_of(multi_pass, source, args.repeat)
+    current = best_of(single_pass, source, args.repeat)
+    print(f"multi-pass : {baseline * 1000:8.1f} ms")
+    print(f"single pass: {current * 1000:8.1f} ms ({baseline / current:.1f}x)")
+    batch = best_of(extract_batch, source, args.repeat)
+    print(f"batch      : {batch * 1000:8.1f} ms ({baseline / batch:.1f}x)")
+
+    objects, columns = held(extract, source), held(extract_batch, source)
+    print(f"held by objects: {objects / 2**10:8.0f} KiB")
+    print(f"held by a batch: {columns / 2**10:8.0f} KiB ({objects / columns:.1f}x less)")
+
+
+if __name__ == "__main__":
+    main()
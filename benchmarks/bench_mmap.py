@@ -0,0 +1,70 @@
+"""Benchmark extracting a large (generated) python file read and decoded whole, and memory-mapped
+
+    python benchmarks/bench_mmap.py [--scale 2000] [--repeat 3]
+
+Also compares the peak memory allocated while extracting, the mapped file itself isn't allocated.
+"""
+
+import mmap
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable
+
+from spell.parser import SnippetBatch, decode, extract_batch, extract_buffer
+
+SEED: Path = Path(__file__).parent.parent / "examples" / "1.py"
+
+
+def read(path: Path) -> SnippetBatch:
+    """As files under the threshold are"""
+    return extract_batch(decode(path.read_bytes()))
+
+
+def mapped(path: Path) -> SnippetBatch:
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        batch = extract_buffer(buffer, "utf-8")
+        # what the pipeline does before the file is closed
+        [batch.text(idx) for idx in range(len(batch))]
+        return batch
+
+
+def best_of(func: Callable[[Path], object], path: Path, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak(func: Callable[[Path], object], path: Path) -> int:
+    """Returns the peak memory (in bytes) allocated by func"""
+    tracemalloc.start()
+    try:
+        func(path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--scale", type=int, default=2000, help="Number of copies of the seed file")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "generated.py"
+        path.write_text(SEED.read_text() * args.scale)
+        print(f"file: {path.stat().st_size / 2**20:.1f} MiB")
+
+        for name, func in (("read", read), ("mapped", mapped)):
+            elapsed = best_of(func, path, args.repeat)
+            print(f"{name:<7}: {elapsed * 1000:8.1f} ms, peak {peak(func, path) / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Benchmark every stage of the pipeline on a synthetic corpus, see corpus.py
+
+    python benchmarks/bench_pipeline.py [--files 1000 ...] [--save baseline.json]
+    python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json [--threshold 0.25]
+
+Stages are timed separately (best of --repeat runs) and reported in files/s and words/s. With a
+baseline, the command fails if any stage got slower than the baseline by more than the threshold.
+Baselines are only comparable on the same machine, and with the same corpus parameters.
+"""
+
+import json
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from corpus import Params, generate
+
+from spell import classifier, pipeline, tokenizer
+from spell.checker import Checker, get_engine
+from spell.config import Config
+from spell.lexicon import load as load_lexicon
+from spell.parser import BaseComment, BaseDocstring, extract
+from spell.types import Text
+from spell.walker import find_paths
+
+#: Bump whenever stages are added or measure something else
+VERSION: int = 2
+#: Differences below this are noise rather than regressions
+MIN_SECONDS: float = 0.01
+
+
+@dataclass
+class Stage:
+    name: str
+    seconds: float
+    files: int
+    words: int
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "seconds": self.seconds,
+            "files_per_s": self.files / self.seconds,
+            "words_per_s": self.words / self.seconds,
+        }
+
+
+def best_of(repeat: int, func: Callable[[], object], setup: Callable[[], object] = lambda: None) -> float:
+    timings = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def count_words(texts: list[str]) -> int:
+    return sum(len(tokenizer.words(t)) for t in texts)
+
+
+def run(root: Path, config: Config, repeat: int) -> list[Stage]:
+    """Returns the timings of every stage on the corpus in root"""
+    stages = []
+
+    paths = list(find_paths([root]))
+    seconds = best_of(repeat, lambda: list(find_paths([root])))
+    stages.append(Stage("walk", seconds, len(paths), 0))
+
+    sources = [p.read_text() for p in paths]
+    extracted: list[tuple[list[BaseComment], list[BaseDocstring]]] = []
+    seconds = best_of(repeat, lambda: extracted.extend(extract(s) for s in sources), extracted.clear)
+    comments = [c.clean(strip_hash=True) for cs, _ in extracted for c in cs]
+    docstrings = [d.docstring or "" for _, ds in extracted for d in ds]
+    all_words = count_words([c.comment or "" for c in comments] + docstrings)
+    stages.append(Stage("extraction", seconds, len(paths), all_words))
+
+    verdicts: list[bool] = []
+    seconds = best_of(
+        repeat,
+        lambda: verdicts.extend(c.is_code() for c in comments),
+        lambda: (verdicts.clear(), classifier._parsed.clear()),
+    )
+    prose = [c.comment or "" for c, code in zip(comments, verdicts) if not code] + docstrings
+    stages.append(
+        Stage("code-detection", seconds, len(paths), count_words([c.comment or "" for c in comments]))
+    )
+
+    lexicon = load_lexicon(tuple(config.dictionaries))
+    engine = get_engine(config.engine, config.frequency_dictionary)
+    engine.load()
+    checker = Checker(Text(""), lexicon=lexicon, engine=engine, suggestions=config.suggestions)
+    words = [w for text in prose for w in tokenizer.words(text)]
+    skipped: list[bool] = []
+    seconds = best_of(repeat, lambda: skipped.extend(map(checker.is_skipped, words)), skipped.clear)
+    stages.append(Stage("classification", seconds, len(paths), len(words)))
+
+    # Every distinct word is corrected once, the verdict of repeated words is cached
+    unknown = sorted({w for w, skip in zip(words, skipped) if not skip})
+    seconds = best_of(repeat, lambda: [engine.suggest(w, config.suggestions) for w in unknown])
+    stages.append(Stage("correction", seconds, len(paths), len(unknown)))
+    # The same words at once (vectorized with NumPy if it's installed)
+    seconds = best_of(repeat, lambda: engine.suggest_many(unknown, config.suggestions))
+    stages.append(Stage("batch-correction", seconds, len(paths), len(unknown)))
+
+    seconds = best_of(repeat, lambda: list(pipeline.run(config, paths)), classifier._parsed.clear)
+    stages.append(Stage("total", seconds, len(paths), all_words))
+
+    return stages
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Returns the stages (and by how much) slower than the baseline by more than the threshold"""
+    if (baseline.get("version"), baseline.get("params")) != (results["version"], results["params"]):
+        raise ValueError("The baseline was recorded with another version or other corpus parameters")
+
+    regressions = []
+    for name, current in results["stages"].items():
+        if name not in baseline["stages"]:
+            continue
+        seconds = baseline["stages"][name]["seconds"]
+        ratio = current["seconds"] / seconds
+        if ratio > 1 + threshold and current["seconds"] - seconds > MIN_SECONDS:
+            regressions.append(f"{name}: {ratio:.2f}x slower than the baseline")
+    return regressions
+
+
+def main() -> int:
+    parser = ArgumentParser(description="Benchmark the stages of the pipeline on a synthetic corpus")
+    Params.add_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engine", default="symspell")
+    parser.add_argument("--frequency-dictionary", type=Path)
+    parser.add_argument("--save", type=Path, help="Write results to this file, e.g. to use as a baseline")
+    parser.add_argument("--baseline", type=Path, help="Fail if slower than these results")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Tolerated slowdown (default: 25%%)")
+    args = parser.parse_args()
+
+    params = Params.from_args(args)
+    config = Config(
+        paths=[], verbosity=0, jobs=1, engine=args.engine, frequency_dictionary=args.frequency_dictionary
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(Path(tmp), params)
+        stages = run(Path(tmp), config, args.repeat)
+
+    print(f"{'stage':<16}{'seconds':>10}{'files/s':>12}{'words/s':>14}")
+    for stage in stages:
+        result = stage.to_dict()
+        print(
+            f"{stage.name:<16}{stage.seconds:>10.3f}{result['files_per_s']:>12.0f}{result['words_per_s']:>14.0f}"
+        )
+
+    results = {
+        "version": VERSION,
+        "params": params.to_dict(),
+        "engine": args.engine,
+        "stages": {s.name: s.to_dict() for s in stages},
+    }
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline:
+        try:
+            regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        except ValueError as e:
+            parser.error(str(e))
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
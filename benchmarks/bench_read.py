@@ -0,0 +1,73 @@
+"""Benchmark reading files ahead of checking them on a cold page cache, see corpus.py
+
+    python benchmarks/bench_read.py [--files 1000 ...] [--read-ahead 0 4 16 64] [--repeat 3]
+
+Before every run, the corpus is evicted from the page cache (posix_fadvise) so files are read from
+the disk, as on a CI workspace checked out moments before. The gain is larger on slow storage (e.g.
+network file systems) than on a local SSD. The result cache is not used, every file is checked.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from dataclasses import replace
+from pathlib import Path
+
+from corpus import Params, generate
+
+from spell import classifier, pipeline
+from spell.config import Config
+from spell.walker import find_paths
+
+
+def evict(paths: list[Path]) -> None:
+    """Drop the pages of the files from the page cache"""
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)  # only clean pages are evicted
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def best_of(repeat: int, config: Config, paths: list[Path]) -> float:
+    timings = []
+    for _ in range(repeat):
+        evict(paths)
+        classifier._parsed.clear()
+        start = time.perf_counter()
+        for _ in pipeline.run(config, paths):
+            pass
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = ArgumentParser(description="Benchmark reading files ahead of checking them on a cold cache")
+    Params.add_arguments(parser)
+    parser.add_argument("--read-ahead", type=int, nargs="+", default=[0, 4, 16, 64])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--frequency-dictionary", type=Path)
+    parser.add_argument("--dir", type=Path, help="Where to generate the corpus, e.g. on a network mount")
+    args = parser.parse_args()
+    if not hasattr(os, "posix_fadvise"):
+        parser.error("posix_fadvise() is not available on this platform")
+
+    config = Config(paths=[], verbosity=0, jobs=1, frequency_dictionary=args.frequency_dictionary)
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        generate(Path(tmp), Params.from_args(args))
+        paths = list(find_paths([Path(tmp)]))
+        best_of(1, config, paths)  # load the lexicon and engine
+
+        print(f"{'read-ahead':<12}{'seconds':>10}{'files/s':>12}")
+        for read_ahead in args.read_ahead:
+            seconds = best_of(args.repeat, replace(config, read_ahead=read_ahead), paths)
+            print(f"{read_ahead:<12}{seconds:>10.3f}{len(paths) / seconds:>12.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Benchmark the tokenizer against the previous path (remove_symbols + split)
+
+    python benchmarks/bench_tokenizer.py [--scale 200] [--repeat 5]
+"""
+
+import string
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable
+
+from spell.parser import extract
+from spell.tokenizer import spans, words
+
+SEED: Path = Path(__file__).parent.parent / "examples" / "1.py"
+
+
+def previous(texts: list[str]) -> list[str]:
+    """A copy of the text per punctuation character, then split (as Checker used to)"""
+    words = []
+    for text in texts:
+        for char in string.punctuation:
+            text = text.replace(char, " ")
+        words.extend(word.lower() for word in text.split())
+    return words
+
+
+def single_pass(texts: list[str]) -> list[str]:
+    """What the checker does: words(), which only searches the chunks which aren't plain words"""
+    return [word for text in texts for word in words(text)]
+
+
+def with_spans(texts: list[str]) -> list[tuple[int, int]]:
+    """Where words are, e.g. to point to them"""
+    return [span for text in texts for span in spans(text)]
+
+
+def best_of(func: Callable[[list[str]], object], texts: list[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(texts)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--scale", type=int, default=200, help="Number of copies of the seed file")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    comments, docstrings = extract(SEED.read_text())
+    texts = [c.comment or "" for c in comments] + [d.docstring or "" for d in docstrings]
+    texts *= args.scale
+    print(f"texts: {len(texts)}, {sum(map(len, texts)) / 2**20:.1f} MiB, {len(single_pass(texts))} words")
+
+    baseline = best_of(previous, texts, args.repeat)
+    print(f"remove_symbols + split: {baseline * 1000:8.1f} ms")
+    for name, func in (("words", single_pass), ("spans", with_spans)):
+        current = best_of(func, texts, args.repeat)
+        print(f"{name:<22}: {current * 1000:8.1f} ms ({baseline / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
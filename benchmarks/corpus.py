@@ -0,0 +1,151 @@
+"""A generator of deterministic synthetic repositories to benchmark the spell-checker on
+
+    python benchmarks/corpus.py OUTPUT [--files 1000] [--comment-density 0.3] [--typo-rate 0.05]
+
+The vocabulary and the lines of code come from seed files (the examples by default), the same
+parameters and seed always produce the same files.
+"""
+
+import random
+import re
+from argparse import ArgumentParser, Namespace
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from spell.parser import extract
+
+ROOT: Path = Path(__file__).parent.parent
+SEEDS: tuple[Path, ...] = (ROOT / "examples" / "1.py", ROOT / "tests" / "data" / "file1.py")
+FILES_PER_DIRECTORY: int = 25
+LETTERS: str = "abcdefghijklmnopqrstuvwxyz"
+
+
+@dataclass(frozen=True)
+class Params:
+    """What a corpus looks like"""
+
+    #: Number of python files
+    files: int = 1000
+    #: Functions per file
+    functions: int = 8
+    #: Probability for a line of code to be preceded by a comment
+    comment_density: float = 0.3
+    #: Share of comments which are commented-out code
+    code_comments: float = 0.2
+    #: Probability for a word to be misspelled
+    typo_rate: float = 0.05
+    #: Number of sentences (lines) of a docstring
+    docstring_length: int = 3
+    seed: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def add_arguments(cls, parser: ArgumentParser) -> None:
+        defaults = cls()
+        for name, value in asdict(defaults).items():
+            parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+
+    @classmethod
+    def from_args(cls, args: Namespace) -> "Params":
+        return cls(**{name: getattr(args, name) for name in asdict(cls())})
+
+
+@dataclass
+class Seed:
+    """The material synthetic files are made of"""
+
+    words: list[str]
+    code: list[str]
+
+    @classmethod
+    def read(cls, paths: tuple[Path, ...] = SEEDS) -> "Seed":
+        words: set[str] = set()
+        code: set[str] = set()
+        for path in paths:
+            source = path.read_text()
+            comments, docstrings = extract(source)
+            for text in [c.comment or "" for c in comments] + [d.docstring or "" for d in docstrings]:
+                words.update(w.lower() for w in re.findall(r"[A-Za-z]{2,}", text))
+            for line in source.splitlines():
+                line = line.strip()
+                if line and not line.startswith(("#", '"', "'", "@")) and not line.endswith(":"):
+                    code.add(line)
+        return cls(words=sorted(words), code=sorted(code))
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    """Returns the word with a typical typo i.e. a swapped, missing, extra or wrong letter"""
+    idx = rng.randrange(len(word))
+    kind = rng.randrange(4)
+    if kind == 0 and idx < len(word) - 1:
+        return word[:idx] + word[idx + 1] + word[idx] + word[idx + 2 :]
+    if kind == 1 and len(word) > 2:
+        return word[:idx] + word[idx + 1 :]
+    if kind == 2:
+        return word[:idx] + rng.choice(LETTERS) + word[idx:]
+    return word[:idx] + rng.choice(LETTERS.replace(word[idx], "")) + word[idx + 1 :]
+
+
+class Generator:
+    def __init__(self, params: Params, seed: Seed):
+        self.params = params
+        self.seed = seed
+        self.rng = random.Random(params.seed)
+
+    def sentence(self) -> str:
+        words = self.rng.choices(self.seed.words, k=self.rng.randint(4, 12))
+        words = [misspell(w, self.rng) if self.rng.random() < self.params.typo_rate else w for w in words]
+        return " ".join(words).capitalize()
+
+    def docstring(self, indent: str) -> list[str]:
+        sentences = [self.sentence() for _ in range(max(1, self.params.docstring_length))]
+        if len(sentences) == 1:
+            return [f'{indent}"""{sentences[0]}"""']
+        return [f'{indent}"""{sentences[0]}', "", *(f"{indent}{s}" for s in sentences[1:]), f'{indent}"""']
+
+    def comment(self, indent: str) -> str:
+        if self.rng.random() < self.params.code_comments:
+            return f"{indent}# {self.rng.choice(self.seed.code)}"
+        return f"{indent}# {self.sentence()}"
+
+    def module(self, idx: int) -> str:
+        lines = self.docstring("")
+        for function in range(self.params.functions):
+            lines += ["", "", f"def function_{idx}_{function}(self, value):"]
+            lines += self.docstring("    ")
+            for _ in range(self.rng.randint(2, 8)):
+                if self.rng.random() < self.params.comment_density:
+                    lines.append(self.comment("    "))
+                lines.append(f"    value = {self.rng.choice(self.seed.words)}(value)  # noqa")
+            lines.append("    return value")
+        return "\n".join(lines) + "\n"
+
+
+def generate(root: Path, params: Params, seed: Seed | None = None) -> list[Path]:
+    """Writes the files of a corpus below root and returns their paths"""
+    generator = Generator(params, seed or Seed.read())
+    paths = []
+    for idx in range(params.files):
+        path = root / f"package_{idx // FILES_PER_DIRECTORY:04}" / f"module_{idx:06}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(generator.module(idx))
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Generate a synthetic corpus")
+    parser.add_argument("output", type=Path)
+    Params.add_arguments(parser)
+    args = parser.parse_args()
+
+    paths = generate(args.output, Params.from_args(args))
+    size = sum(p.stat().st_size for p in paths)
+    print(f"{args.output}: {len(paths)} files, {size / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
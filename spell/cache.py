@@ -0,0 +1,139 @@
+"""A persistent cache of the results of checked files, used to skip files which didn't change"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+#: Bump whenever the layout of the cache file (or of cached results) changes, or what they are e.g.
+#: when the checker tells correct words apart differently
+VERSION: int = 6
+#: The directory of shards within the cache directory, see ResultCache
+DIRECTORY_NAME: str = "results"
+
+
+def digest(data: bytes | mmap.mmap) -> str:
+    """Returns the digest of a file content"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """Results of checked files by path, valid as long as the key (e.g. lexicon, engine) is the same
+
+    An entry is reused without reading the file if its size and modification time didn't change,
+    or after reading it if the digest of its content didn't change.
+
+    Entries are stored in shards, one file per directory of checked files, each loaded when one of
+    its entries is first looked up. Only the shards which changed are written back.
+    """
+
+    def __init__(self, directory: Path, key: str):
+        self.directory = directory / DIRECTORY_NAME
+        self.key = key
+        self._shards: dict[str, dict[str, dict[str, Any]]] = {}
+        self._dirty: set[str] = set()
+
+    def _shard(self, path: Path) -> tuple[str, dict[str, dict[str, Any]]]:
+        """Returns the name and entries of the shard of a path, loaded first if needed"""
+        name = hashlib.sha256(str(path.parent).encode()).hexdigest()[:32]
+        entries = self._shards.get(name)
+        if entries is None:
+            entries = self._shards[name] = {}
+            try:
+                with (self.directory / f"{name}.json").open(encoding="utf-8") as f:
+                    if self._valid(f.readline()):
+                        entries.update(json.loads(f.readline()))
+                    else:  # of another version or key, replaced (or removed) when saved
+                        self._dirty.add(name)
+            except (OSError, ValueError):
+                pass
+        return name, entries
+
+    def _valid(self, line: str) -> bool:
+        """Returns whether the header (first line) of a shard is of this version and key"""
+        try:
+            header = json.loads(line)
+        except ValueError:
+            return False
+        return isinstance(header, dict) and header.get("version") == VERSION and header.get("key") == self.key
+
+    def lookup(self, path: Path, stat: os.stat_result) -> tuple[dict[str, Any] | None, str | None]:
+        """Returns the cached result of an unchanged (by stat) file, or the digest it had otherwise"""
+        entry = self._shard(path)[1].get(str(path))
+        if entry is None:
+            return None, None
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["result"], entry["digest"]
+        return None, entry["digest"]
+
+    def get(self, path: Path) -> dict[str, Any] | None:
+        """Returns the cached result of a path regardless of its state"""
+        entry = self._shard(path)[1].get(str(path))
+        return entry["result"] if entry else None
+
+    def store(self, path: Path, stat: os.stat_result, digest: str, result: dict[str, Any]) -> None:
+        name, entries = self._shard(path)
+        entries[str(path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": digest,
+            "result": result,
+        }
+        self._dirty.add(name)
+
+    def __len__(self) -> int:
+        """Returns the number of entries of the loaded shards"""
+        return sum(map(len, self._shards.values()))
+
+    def prune(self) -> int:
+        """Remove the entries of deleted files, returns how many were removed
+
+        The shards which weren't loaded are removed if their directory was deleted, or if they're of
+        another version or key, only their header is read.
+        """
+        count = 0
+        for name, entries in self._shards.items():
+            deleted = [p for p in entries if not os.path.exists(p)]
+            for p in deleted:
+                del entries[p]
+            if deleted:
+                self._dirty.add(name)
+                count += len(deleted)
+
+        for path in self.directory.glob("*.json"):
+            if path.stem in self._shards:
+                continue
+            try:
+                with path.open(encoding="utf-8") as f:
+                    line = f.readline()
+            except OSError:
+                continue
+            if not self._valid(line) or not os.path.isdir(json.loads(line)["directory"]):
+                path.unlink(missing_ok=True)
+        return count
+
+    def save(self) -> None:
+        """Prune and write the shards which changed to the cache directory
+
+        A shard is a JSON header (version, key and directory) and the JSON of its entries, one line
+        each.
+        """
+        self.prune()
+        for name in sorted(self._dirty):
+            path = self.directory / f"{name}.json"
+            entries = self._shards[name]
+            if not entries:
+                path.unlink(missing_ok=True)
+                continue
+            header = {"version": VERSION, "key": self.key, "directory": str(Path(next(iter(entries))).parent)}
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # unique per thread too, the daemon saves the results of concurrent requests
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                f.write(json.dumps(header) + "\n")
+                f.write(json.dumps(entries, separators=(",", ":")) + "\n")
+            os.replace(tmp, path)
+        self._dirty.clear()
@@ -1,24 +1,24 @@
 """This module analyze the comments and docstrings"""
 
 import re
+import sys
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import Any, Collection, Iterable, Protocol
 
-from textblob import Word  # type: ignore
-
-from spell.types import Text
-
-WORDS_ASSETS: Path = Path(__file__).parent.parent / "assets"
-
-PY_STD_LIB_PATH: Path = WORDS_ASSETS / "std_lib_names"
-TECH_WORDS_PATH: Path = WORDS_ASSETS / "tech_words"
-COMMON_WORDS_PATH: Path = WORDS_ASSETS / "common"
+from spell import symspell, tokenizer
+from spell.lexicon import Lexicon, content_digest, fingerprint, load as load_lexicon
+from spell.profiling import Profiler, timed
+from spell.symspell import SymSpell
+from spell.types import Finding, Text
+from spell.utils import LRUCache
 
 EXTENSIONS: set[str] = {".py", ".txt", ".md"}
 KNOWN_WORDS: set[str] = set()
 IGNORE_WORDS: set[str] = {"fixme", "todo"}
-PY_STD_LIB: set[str] = {w for w in PY_STD_LIB_PATH.read_text().split()}
-TECH_WORDS: set[str] = {w for w in TECH_WORDS_PATH.read_text().split()}
-COMMON_WORDS: set[str] = {w for w in COMMON_WORDS_PATH.read_text().split()}
+
+#: Corrections of a word i.e. a list of (word, confidence), empty if the word is skipped
+Verdict = list[tuple[str, float]]
 
 
 def remove_symbols(words: list[str]) -> list[str]:
@@ -26,10 +26,113 @@ def remove_symbols(words: list[str]) -> list[str]:
     return w
 
 
-class _Word(Word):
-    def __init__(self, word: str):
+class Engine(Protocol):
+    """A spelling correction engine"""
+
+    name: str
+
+    #: Identifies the engine, its version and dictionary, i.e. changes if suggestions may change
+    fingerprint: str
+
+    @property
+    def digest(self) -> str:
+        """Identifies the engine, its version and the content of its dictionary, wherever it is"""
+        ...
+
+    def load(self) -> None:
+        """Load the dictionary (or index) ahead of the first suggestion"""
+        ...
+
+    def suggest(self, word: str, limit: int | None = None) -> list[tuple[str, float]]:
+        """Returns a list of (word, confidence) corrections, the most likely first"""
+        ...
+
+    def suggest_many(self, words: Iterable[str], limit: int | None = None) -> dict[str, Verdict]:
+        """Returns the corrections of each of the (distinct) words, as suggest() does"""
+        ...
+
+
+class TextBlobEngine:
+    """Norvig's edit distance based correction of TextBlob (slow, kept as a fallback)"""
+
+    name = "textblob"
+
+    def __init__(self, frequency_dictionary: Path | None = None):
+        # The same as Word.spellcheck() does, unless a frequency dictionary is given
+        self.dictionary = frequency_dictionary or symspell.frequency_dictionary()
+        self.fingerprint = f"{self.name}-{fingerprint([self.dictionary]).hex()}"
+
+    @cached_property
+    def spelling(self) -> Any:
+        """Returns TextBlob's spelling corrector, imported when first used since TextBlob imports NLTK"""
+        from textblob.en import Spelling  # type: ignore
+
+        return Spelling(str(self.dictionary))
+
+    @cached_property
+    def digest(self) -> str:
+        return f"{self.name}-{content_digest([self.dictionary]).hex()}"
+
+    def load(self) -> None:
+        len(self.spelling)  # a lazy dict, loaded when first used
+
+    def suggest(self, word: str, limit: int | None = None) -> list[tuple[str, float]]:
+        suggestions: list[tuple[str, float]] = self.spelling.suggest(word)
+        return suggestions[:limit]
+
+    def suggest_many(self, words: Iterable[str], limit: int | None = None) -> dict[str, Verdict]:
+        return {word: self.suggest(word, limit) for word in words}
+
+
+class SymSpellEngine:
+    """Symmetric delete correction over a precomputed (and cached) index"""
+
+    name = "symspell"
+
+    def __init__(self, frequency_dictionary: Path | None = None):
+        self.dictionary = frequency_dictionary or symspell.frequency_dictionary()
+        self.fingerprint = f"{self.name}-{symspell.VERSION}-{fingerprint([self.dictionary]).hex()}"
+
+    @cached_property
+    def index(self) -> SymSpell:
+        return SymSpell.load(self.dictionary)
+
+    @cached_property
+    def digest(self) -> str:
+        return f"{self.name}-{symspell.VERSION}-{content_digest([self.dictionary]).hex()}"
+
+    def load(self) -> None:
+        self.index
+
+    def suggest(self, word: str, limit: int | None = None) -> list[tuple[str, float]]:
+        return self.index.lookup(word, limit)
+
+    def suggest_many(self, words: Iterable[str], limit: int | None = None) -> dict[str, Verdict]:
+        """All the distances at once, with NumPy if it's installed, see SymSpell.lookup_many()"""
+        return self.index.lookup_many(words, limit)
+
+
+ENGINES: dict[str, type[TextBlobEngine] | type[SymSpellEngine]] = {
+    TextBlobEngine.name: TextBlobEngine,
+    SymSpellEngine.name: SymSpellEngine,
+}
+
+
+@lru_cache(maxsize=None)
+def get_engine(name: str = SymSpellEngine.name, frequency_dictionary: Path | None = None) -> Engine:
+    """Returns the (shared) correction engine of the given name"""
+    return ENGINES[name](frequency_dictionary)
+
+
+class _Word:
+    __slots__ = ("word", "lexicon")
+
+    def __init__(self, word: str, lexicon: Lexicon):
         self.word = word
-        super().__init__(self.word)
+        self.lexicon = lexicon
+
+    def __str__(self) -> str:
+        return self.word
 
     @property
     def is_function(self) -> bool:
@@ -39,7 +142,7 @@ class _Word(Word):
     @property
     def is_extension(self) -> bool:
         """Return True if given word is some kind of extension (e.g. .py, .txt. .doc)"""
-        return self.word in EXTENSIONS
+        return self.word in EXTENSIONS or self.word.startswith(".")
 
     @property
     def is_known(self) -> bool:
@@ -49,36 +152,145 @@ class _Word(Word):
     @property
     def ignorable(self) -> bool:
         """Return True if given word is known to spell-checker"""
-        return self.word in PY_STD_LIB.union(TECH_WORDS).union(COMMON_WORDS)
+        return self.word in self.lexicon
 
 
 class Checker:
-    def __init__(self, text: Text):
+    def __init__(
+        self,
+        text: Text,
+        lexicon: Lexicon | None = None,
+        engine: Engine | None = None,
+        suggestions: int = 2,
+        cache: LRUCache[str, Verdict] | None = None,
+        profiler: Profiler | None = None,
+        known: Collection[str] = frozenset(),
+    ):
+        """A checker of a single text
+
+        The cache holds verdicts by word and can be shared between checkers using the same lexicon,
+        engine and number of suggestions, so that a repeated word is only classified (and corrected)
+        once. With a profiler, classification and correction are timed and counted. Known words
+        (e.g. identifiers of the file the text is from) are skipped, regardless of the cache.
+        """
         self.text: Text = text
+        self.lexicon: Lexicon = lexicon or load_lexicon()
+        self.engine: Engine = engine or get_engine()
+        self.suggestions = suggestions
+        self.cache = cache
+        self.profiler = profiler
+        self.known = known
 
-    def check(self, verbose: bool = False) -> None:
-        for word in self.text.split():
+    @cached_property
+    def words(self) -> list[str]:
+        """The (normalized) words of the text, in order"""
+        return tokenizer.words(self.text)
 
-            _word = _Word(word.lower())
+    def skip_reason(self, word: str) -> str | None:
+        """Returns the predicate for which a (normalized) word isn't spell checked, if any"""
+        _word = _Word(word, self.lexicon)
+        if _word.is_known:
+            return "is_known"
+        if _word.is_function:
+            return "is_function"
+        if _word.is_extension:
+            return "is_extension"
+        if _word.ignorable:
+            return "ignorable"
+        return None
 
-            if _word.is_known or _word.is_function or _word.is_extension or _word.ignorable:
-                if verbose:
-                    print(f"<<<< Skipping word: {_word}")
-                continue
+    def is_skipped(self, word: str) -> bool:
+        """Returns True if a (normalized) word isn't spell checked e.g. it's a known word"""
+        return self.skip_reason(word) is not None
+
+    def known_verdict(self, word: str, verbose: bool = False) -> Verdict | None:
+        """Returns the verdict of a (normalized) word short of correcting it, None if it has to be"""
+        profiler = self.profiler
+        if word in self.known:
+            if profiler:
+                profiler.count("words.skipped.is_identifier")
+            return []
+        if self.cache is not None:
+            cached = self.cache.get(word)
+            if profiler:
+                profiler.count("word_cache.misses" if cached is None else "word_cache.hits")
+            if cached is not None:
+                return cached
+
+        with timed(profiler, "classify"):
+            reason = self.skip_reason(word)
+        if reason is None:
+            return None
+        if profiler:
+            profiler.count(f"words.skipped.{reason}")
+        if verbose:
+            print(f"<<<< Skipping word: {word}", file=sys.stderr)
+        if self.cache is not None:
+            self.cache.put(word, [])
+        return []
+
+    def verdict(self, word: str, verbose: bool = False) -> Verdict:
+        """Returns the corrections of a (normalized) word, empty if the word is skipped"""
+        return self.check_many([word], verbose)[word]
 
-            spelling_check = _word.spellcheck()
+    def check_many(self, words: Iterable[str], verbose: bool = False) -> dict[str, Verdict]:
+        """Returns the verdict of each of the (distinct, normalized) words, in order
+
+        The words which are neither skipped nor cached are corrected in a single batch, see
+        Engine.suggest_many(), e.g. the words of all the texts of a file.
+        """
+        verdicts: dict[str, Verdict] = {}
+        unknown: list[str] = []
+        distinct = dict.fromkeys(words)
+        if self.profiler:
+            self.profiler.count("words.distinct", len(distinct))
+        for word in distinct:
+            verdict = self.known_verdict(word, verbose)
+            if verdict is None:
+                unknown.append(word)
+            else:
+                verdicts[word] = verdict
+        if not unknown:
+            return verdicts
+
+        with timed(self.profiler, "correct"):
+            corrections = self.engine.suggest_many(unknown, self.suggestions)
+        if self.profiler:
+            self.profiler.count("words.corrected", len(unknown))
+        for word in unknown:
+            verdict = verdicts[word] = corrections[word]
             if verbose:
-                print(f">>>> Including word: {_word}")
-                print("->", spelling_check)
+                print(f">>>> Including word: {word}", file=sys.stderr)
+                print("->", verdict, file=sys.stderr)
+            if self.cache is not None:
+                self.cache.put(word, verdict)
+        return {word: verdicts[word] for word in distinct}
+
+    def check(self, verbose: bool = False, verdicts: dict[str, Verdict] | None = None) -> list[Finding]:
+        """Returns the words of the text which are probably misspelled
+
+        The verdicts of the words may be given, e.g. by check_many() over the words of many texts.
+        """
+        findings: list[Finding] = []
+        words = self.words
+        if self.profiler:
+            self.profiler.count("words", len(words))
+        if verdicts is None:
+            verdicts = self.check_many(words, verbose)
+        for _word in words:
+            spelling_check = verdicts[_word]
+            if not spelling_check:
+                continue
 
+            # A single candidate has a confidence of 1 too, only the word itself is correct
             spelling, confidence = spelling_check[0]
-            if confidence == 1:
+            if confidence == 1 and spelling.lower() == _word:
                 if verbose:
-                    print("Correct word", _word)
+                    print("Correct word", _word, file=sys.stderr)
             else:
-                print(f"Did you mean this '{spelling}' ?", _word)
+                findings.append(Finding(word=_word, suggestions=spelling_check))
 
-        print("-" * 50)
+        return findings
 
     @property
     def lower(self) -> str:
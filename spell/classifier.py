@@ -0,0 +1,69 @@
+"""Tells commented-out code (and tool directives) apart from prose comments
+
+Most comments are settled by looking at their characters and first word only. Comments which
+might be either (e.g. 'x = compute(y)' or 'return the value') are parsed, and the outcome is cached
+by comment text.
+"""
+
+import ast
+import keyword
+import re
+
+from spell.utils import LRUCache
+
+#: Nothing but words and sentence punctuation e.g. "convert str to int", "TODO", "Note: it's slow."
+PROSE = re.compile(r"[A-Za-z][\w'\-]*(?:[ \t]*[,;:]?[ \t]+[A-Za-z][\w'\-]*)*[ \t]*[.!?:;,]*")
+#: Comments of tools e.g. "type: ignore", "noqa: E501", "pragma: no cover", "fmt: off"
+DIRECTIVE = re.compile(r"(?:type|pragma|fmt|pylint|mypy|isort|flake8|pyright)[ \t]*:|noqa\b|nosec\b")
+#: Statements which may look like plain words e.g. "import os", "return result", "pass"
+SIMPLE_STATEMENTS = {"import", "from", "return", "raise", "pass", "break", "continue", "del", "global"}
+SIMPLE_STATEMENTS |= {"nonlocal", "yield", "assert", "await", "print"}
+#: Statements starting a block which need a body to parse e.g. "for i in range(10):"
+BLOCK_STATEMENTS = {"if", "for", "while", "with", "try", "def", "class", "async", "match"}
+#: ... and the statement they have to follow e.g. "else:"
+CLAUSES = {"elif": "if x: pass\n", "else": "if x: pass\n", "except": "try: pass\n", "finally": "try: pass\n"}
+#: Interactive sessions e.g. ">>> f(1)"
+PROMPT = re.compile(r"(?:>>>|\.\.\.)(?: |$)")
+
+_parsed: LRUCache[str, bool] = LRUCache(2**14)
+
+
+def _parses(text: str) -> bool:
+    cached = _parsed.get(text)
+    if cached is not None:
+        return cached
+    try:
+        ast.parse(text)
+        result = True
+    except (SyntaxError, ValueError):
+        result = False
+    _parsed.put(text, result)
+    return result
+
+
+def _parses_block(text: str, first: str) -> bool:
+    """Returns True if text is a block statement or clause e.g. "if x:", "else:" """
+    suffix = "\nfinally: pass" if first == "try" else ""
+    return _parses(f"{CLAUSES.get(first, '')}{text} pass{suffix}")
+
+
+def is_code(text: str) -> bool:
+    """Returns True if a comment (without its '#') is python code or a directive of some tool"""
+    text = text.strip()
+    if not text:
+        return False
+    if DIRECTIVE.match(text) or PROMPT.match(text):
+        return True
+
+    first = text.split(None, 1)[0].rstrip(":")
+    block = text.endswith(":") and (first in BLOCK_STATEMENTS or first in CLAUSES)
+    if block:
+        return _parses_block(text, first)
+
+    if PROSE.fullmatch(text):
+        # a single keyword is code e.g. "pass", a single word isn't e.g. "TODO"
+        if first in SIMPLE_STATEMENTS and (" " in text or keyword.iskeyword(text)):
+            return _parses(text)
+        return False
+
+    return _parses(text)
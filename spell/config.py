@@ -1,13 +1,22 @@
 """The configuration of this project"""
 
+import os
 from argparse import ArgumentParser, Namespace
 from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Any, Type, TypeVar
+from typing import Any, Sequence, Type, TypeVar
 
 _T = TypeVar("_T")
 
 
+def default_cache_dir() -> Path:
+    """Returns the directory where compiled artefacts (e.g. lexicon) are stored"""
+    if cache_dir := os.environ.get("SPELL_CACHE_DIR"):
+        return Path(cache_dir)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "spell-checker"
+
+
 @dataclass
 class Config:
 
@@ -15,17 +24,47 @@ class Config:
     verbosity: int
     config_file: str | None = None
     dump_config: bool = False
-    include: list[Path] | None = None
-    exclude: list[Path] | None = None
+    include: list[str] | None = None
+    exclude: list[str] | None = None
     supported_extensions: list[str] = field(default_factory=list)
     suggestions: int = 2
+    dictionaries: list[Path] = field(default_factory=list)
+    engine: str = "symspell"
+    frequency_dictionary: Path | None = None
+    word_cache_size: int = 2**16
+    vocabulary: str = "file"
+    jobs: int = field(default_factory=lambda: os.cpu_count() or 1)
+    read_ahead: int = 16
+    #: Files of at least as many bytes are memory-mapped rather than read, 0 to never map them
+    mmap_threshold: int = 2**23
+    cache_dir: Path | None = None
+    diff: str | None = None
+    #: The (1-based) index of the shard to check, and the number of shards, see shard.py
+    shard: tuple[int, int] | None = None
+    watch: bool = False
+    watch_interval: float = 0.5
+    #: A file listing the files to check ("-" for stdin) instead of walking paths, NUL separated with null
+    files_from: Path | None = None
+    null: bool = False
+    #: Check what's piped to stdin as the content of stdin_filename, see pipeline.check_text()
+    stdin_text: bool = False
+    stdin_filename: Path | None = None
+    gitignore: bool = True
+    format: str = "human"
+    output: Path | None = None
+    profile: bool = False
+    profile_output: Path | None = None
+    profile_memory: int = 0
+    follow_symlinks: bool = False
+    client: bool = False
+    socket: Path | None = None
 
     @classmethod
-    def from_argparser(cls: Type[_T], parser: ArgumentParser) -> _T:
-        args: Namespace = parser.parse_args()
+    def from_argparser(cls: Type[_T], parser: ArgumentParser, args: Sequence[str] | None = None) -> _T:
+        namespace: Namespace = parser.parse_args(args)
         config: dict[str, Any] = {}
 
         for f in fields(cls):
-            if hasattr(args, f.name):
-                config[f.name] = getattr(args, f.name)
+            if hasattr(namespace, f.name):
+                config[f.name] = getattr(namespace, f.name)
         return cls(**config)
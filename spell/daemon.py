@@ -0,0 +1,412 @@
+"""A long running server keeping lexicons, correction engines and word caches warm between runs
+
+``spell daemon`` listens on a local Unix socket, ``spell --client`` forwards the files to check to it
+(or checks them in-process if it isn't running). Both speak JSON, one message per line::
+
+    -> {"op": "check", "settings": {...}, "options": {"cache_dir": null, "jobs": 1},
+        "files": [{"path": "/abs/a.py", "ranges": null, "text": null, "data": null}]}
+    <- {"result": {...}}            one per file, in order (see FileResult.to_dict())
+    <- {"done": true}
+
+An optional "text" is checked instead of the content of the file (e.g. unsaved changes of an
+editor), or "data", base64 encoded bytes decoded as the content of the file would be (e.g. with
+its coding cookie). Options are those of the client's run which don't change results: where they're cached,
+and how many worker processes (forked from the daemon, everything loaded) check files. Other
+requests are {"op": "ping"} and {"op": "shutdown"}, errors are {"error": "..."}.
+"""
+
+import base64
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+from spell import __version__, pipeline
+from spell.checker import ENGINES, get_engine
+from spell.config import Config, default_cache_dir
+from spell.git import LineRanges
+from spell.lexicon import load as load_lexicon
+from spell.pipeline import Context
+from spell.profiling import Profiler
+from spell.results import FileResult
+
+#: Files sent to the daemon per request, per worker process of the run (see --jobs)
+CHUNK_SIZE: int = 64
+#: Seconds to wait for the daemon to answer before checking in-process
+TIMEOUT: float = 30.0
+#: Connections waiting to be accepted by the daemon, beyond which clients retry (see Client)
+REQUEST_QUEUE_SIZE: int = 128
+#: Attempts to connect to a busy daemon, waiting twice as long after each, from CONNECT_DELAY seconds
+CONNECT_ATTEMPTS: int = 6
+CONNECT_DELAY: float = 0.01
+
+
+class DaemonError(Exception):
+    """Raised when the daemon isn't running, or fails to answer a request"""
+
+
+def default_socket() -> Path:
+    return default_cache_dir() / "daemon.sock"
+
+
+def options(config: Config) -> dict[str, Any]:
+    """Returns the options of a run which the daemon follows, see the module docstring"""
+    return {"cache_dir": str(config.cache_dir.resolve()) if config.cache_dir else None, "jobs": config.jobs}
+
+
+def settings(config: Config) -> dict[str, Any]:
+    """Returns what a context depends on, with absolute paths since the daemon has its own cwd"""
+    return {
+        "dictionaries": [str(d.resolve()) for d in config.dictionaries],
+        "engine": config.engine,
+        "frequency_dictionary": str(config.frequency_dictionary.resolve())
+        if config.frequency_dictionary
+        else None,
+        "suggestions": config.suggestions,
+        "vocabulary": config.vocabulary,
+    }
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves requests concurrently, one thread per connection, sharing a context per settings"""
+
+    daemon_threads = True
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def __init__(self, path: Path, word_cache_size: int = 2**16):
+        self.path = path
+        self.word_cache_size = word_cache_size
+        self.contexts: dict[str, Context] = {}
+        self._lock = threading.Lock()
+
+        if path.exists():
+            if is_running(path):
+                raise DaemonError(f"a daemon is already listening on {path}")
+            path.unlink()  # left behind by a daemon which was killed
+        # Only accessible to its owner from the start, rather than once changed after bind()
+        umask = os.umask(0o077)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            super().__init__(str(path), Handler)
+        finally:
+            os.umask(umask)
+
+    def context(self, settings: dict[str, Any]) -> Context:
+        """Returns the context of the given settings, (re)loaded if word lists changed since"""
+        key = json.dumps(settings, sort_keys=True)
+        with self._lock:
+            context = self.contexts.get(key)
+            if context is None or context.is_stale():
+                frequency_dictionary = settings["frequency_dictionary"]
+                config = Config(
+                    paths=[],
+                    verbosity=0,
+                    jobs=1,
+                    dictionaries=[Path(d) for d in settings["dictionaries"]],
+                    engine=settings["engine"],
+                    frequency_dictionary=Path(frequency_dictionary) if frequency_dictionary else None,
+                    suggestions=settings["suggestions"],
+                    vocabulary=settings["vocabulary"],
+                    word_cache_size=self.word_cache_size,
+                )
+                if context is not None:
+                    load_lexicon.cache_clear()
+                    get_engine.cache_clear()
+                context = Context.from_config(config)
+                context.engine.load()
+                self.contexts[key] = context
+            return context
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Answers the requests of a connection, one at a time"""
+
+    server: Server
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            request: dict[str, Any] = {}
+            try:
+                request = json.loads(line)
+                self.answer(request)
+            except ConnectionError:
+                return  # the client is gone
+            except Exception as e:  # the client checks in-process then, the daemon keeps running
+                self.send({"error": f"{type(e).__name__}: {e}"})
+            self.wfile.flush()
+            if request.get("op") == "shutdown":
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+    def send(self, message: dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+
+    def answer(self, request: dict[str, Any]) -> None:
+        op = request.get("op")
+        if op == "ping":
+            self.send({"version": __version__, "pid": os.getpid()})
+            self.send({"done": True})
+        elif op == "shutdown":
+            self.send({"done": True})
+        elif op == "check":
+            context = self.server.context(request["settings"])
+            for result in self.check(context, request.get("options", {}), request["files"]):
+                self.send({"result": result.to_dict()})
+            self.send({"done": True})
+        else:
+            raise ValueError(f"unknown op {op!r}")
+
+    def check(
+        self, context: Context, options: dict[str, Any], files: list[dict[str, Any]]
+    ) -> Iterator[FileResult]:
+        """Yields the results of the files of a check request, with the options of the client's run"""
+        ranges = [
+            [(first, last) for first, last in r] if r is not None else None
+            for r in (f.get("ranges") for f in files)
+        ]
+        if any(file.get("text") is not None or file.get("data") is not None for file in files):
+            # e.g. unsaved changes, never cached
+            for file, file_ranges in zip(files, ranges):
+                text, data = file.get("text"), file.get("data")
+                content = base64.b64decode(data) if data is not None else None
+                if text is not None:
+                    content = text.encode("utf-8")
+                yield context.check_file(Path(file["path"]), ranges=file_ranges, data=content)
+            return
+
+        cache_dir = options.get("cache_dir")
+        config = replace(
+            context.config,
+            cache_dir=Path(cache_dir) if cache_dir else None,
+            jobs=options.get("jobs", context.config.jobs),
+        )
+        paths = [Path(file["path"]) for file in files]
+        changes = None
+        if any(r is not None for r in ranges):
+            changes = {path.resolve(): r or [] for path, r in zip(paths, ranges)}
+        yield from pipeline.check(replace(context, config=config), paths, changes)
+
+
+class Client:
+    """A connection to the daemon"""
+
+    def __init__(self, path: Path, timeout: float = TIMEOUT):
+        for attempt in range(CONNECT_ATTEMPTS):
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(timeout)
+            try:
+                self.socket.connect(str(path))
+                break
+            except BlockingIOError as e:  # its queue of connections is full
+                self.socket.close()
+                if attempt == CONNECT_ATTEMPTS - 1:
+                    raise DaemonError(f"the daemon listening on {path} is busy: {e}") from e
+                time.sleep(CONNECT_DELAY * 2**attempt)
+            except OSError as e:
+                self.socket.close()
+                raise DaemonError(f"no daemon listening on {path}: {e}") from e
+        self._file = self.socket.makefile("rwb")
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self.socket.close()
+
+    def request(self, request: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        """Yields the answers to a request, up to {"done": true}"""
+        try:
+            self._file.write(json.dumps(request).encode() + b"\n")
+            self._file.flush()
+            while line := self._file.readline():
+                answer: dict[str, Any] = json.loads(line)
+                if "error" in answer:
+                    raise DaemonError(answer["error"])
+                if answer.get("done"):
+                    return
+                yield answer
+        except OSError as e:
+            raise DaemonError(str(e)) from e
+        raise DaemonError("connection closed by the daemon")
+
+    def ping(self) -> dict[str, Any]:
+        """Returns the version and pid of the daemon"""
+        (answer,) = self.request({"op": "ping"})
+        return answer
+
+    def shutdown(self) -> None:
+        for _ in self.request({"op": "shutdown"}):
+            pass
+
+    def check(
+        self, config: Config, files: Sequence[tuple[Path, LineRanges | None, str | bytes | None]]
+    ) -> Iterator[FileResult]:
+        """Yields the results of (path, ranges, text or content) files, with the given paths
+
+        Results come in order, but missing files are skipped (see pipeline.MISSING).
+        """
+        absolute = [str(path.absolute()) for path, _, _ in files]
+        request = {
+            "op": "check",
+            "settings": settings(config),
+            "options": options(config),
+            "files": [
+                {"path": name, "ranges": ranges, **_content(content)}
+                for name, (_, ranges, content) in zip(absolute, files)
+            ],
+        }
+        idx = 0
+        for answer in self.request(request):
+            result = FileResult.from_dict(answer["result"])
+            idx = absolute.index(str(result.path), idx) + 1
+            path = files[idx - 1][0]
+            result.path = path
+            for finding in result.findings:
+                finding.path = path
+            yield result
+
+
+def _content(content: str | bytes | None) -> dict[str, str | None]:
+    if isinstance(content, bytes):
+        return {"text": None, "data": base64.b64encode(content).decode("ascii")}
+    return {"text": content, "data": None}
+
+
+def is_running(path: Path) -> bool:
+    try:
+        with Client(path, timeout=1.0) as client:
+            client.ping()
+    except DaemonError:
+        return False
+    return True
+
+
+def run(
+    config: Config,
+    paths: Iterable[Path],
+    changes: dict[Path, LineRanges] | None = None,
+    profiler: Profiler | None = None,
+) -> Iterator[FileResult]:
+    """Yields the results of pipeline.run(), checked by the daemon unless it isn't running
+
+    Whatever the daemon fails to check (e.g. it's stopped) is checked in-process instead, as well
+    as everything when profiling this process.
+    """
+    paths = iter(paths)
+    if profiler is not None:
+        yield from pipeline.run(config, paths, changes, profiler)
+        return
+
+    try:
+        client = Client(config.socket or default_socket())
+    except DaemonError:
+        yield from pipeline.run(config, paths, changes)
+        return
+
+    with client:
+        while chunk := [p for _, p in zip(range(CHUNK_SIZE * max(config.jobs, 1)), paths)]:
+            files = [(p, changes.get(p.resolve(), []) if changes is not None else None, None) for p in chunk]
+            done = 0
+            try:
+                for result in client.check(config, files):
+                    yield result
+                    # the files before it which the daemon skipped (see Client.check()) are done too
+                    done = chunk.index(result.path, done) + 1
+            except DaemonError as e:
+                if config.verbosity:
+                    print(f"spell daemon: {e}, checking in-process", file=sys.stderr)
+                yield from pipeline.run(config, [*chunk[done:], *paths], changes)
+                return
+
+
+def check_text(config: Config, path: Path, data: bytes, profiler: Profiler | None = None) -> FileResult:
+    """Returns pipeline.check_text(), checked by the daemon unless it isn't running (or profiling)
+
+    data is decoded by the daemon as it would be in-process, e.g. as its coding cookie says.
+    """
+    if profiler is None:
+        try:
+            with Client(config.socket or default_socket()) as client:
+                (result,) = client.check(config, [(path, None, data)])
+                return result
+        except DaemonError as e:
+            if config.verbosity:
+                print(f"spell daemon: {e}, checking in-process", file=sys.stderr)
+    return pipeline.check_text(config, path, data, profiler)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entrypoint of ``spell daemon``"""
+    parser = ArgumentParser(prog="spell daemon", description="Serve check requests of 'spell --client'")
+    parser.add_argument("--socket", type=Path, help=f"Unix socket to listen on (default: {default_socket()})")
+    parser.add_argument(
+        "-d",
+        "--dictionary",
+        dest="dictionaries",
+        action="append",
+        type=Path,
+        default=[],
+        help="Additional word list to load at startup (can be used multiple times)",
+    )
+    parser.add_argument(
+        "--engine", choices=sorted(ENGINES), default="symspell", help="Engine to load at startup"
+    )
+    parser.add_argument("--frequency-dictionary", type=Path, help="Word frequency list to load at startup")
+    parser.add_argument(
+        "--word-cache-size",
+        type=int,
+        default=2**16,
+        help="Number of distinct words whose verdict is remembered, per settings (0 to disable)",
+    )
+    parser.add_argument("--stop", action="store_true", help="Stop the daemon listening on the socket")
+    args = parser.parse_args(argv)
+    path: Path = args.socket or default_socket()
+
+    if args.stop:
+        try:
+            with Client(path) as client:
+                client.shutdown()
+        except DaemonError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+
+    try:
+        server = Server(path, args.word_cache_size)
+    except DaemonError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    with server:
+        config = Config(
+            paths=[],
+            verbosity=0,
+            dictionaries=args.dictionaries,
+            engine=args.engine,
+            frequency_dictionary=args.frequency_dictionary,
+        )
+        try:
+            server.context(settings(config))
+        except FileNotFoundError as e:
+            print(f"not loaded at startup: {e}", file=sys.stderr)
+        print(f"spell daemon {__version__} listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
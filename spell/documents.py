@@ -0,0 +1,246 @@
+"""Extracts the prose of documents (Markdown, reStructuredText and plain text), one line at a time
+
+Unlike python files (see parser.py), documents are mostly prose: an extractor is fed the lines of a
+document in order, and tells which of them are prose, with code, URLs, link targets etc. replaced by
+spaces so that the columns of the words don't change. Consecutive prose lines are then checked
+together as a paragraph, see paragraphs(). A document is never held whole in a string.
+"""
+
+import codecs
+import io
+import mmap
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Protocol
+
+#: A paragraph is cut after as many lines, e.g. in a text file without any blank line
+MAX_PARAGRAPH_LINES: int = 100
+
+URL = r"\b(?:[a-z][a-z0-9+.-]*://|www\.|mailto:)[^\s<>`'\"]+|[\w.+-]+@[\w-]+\.[\w.-]+"
+#: Inline code, autolinks and HTML tags, the target of links and images, then URLs
+MARKDOWN_INLINE = re.compile(rf"``[^`].*?``|`[^`]+`|<[^\s>][^>]*>|\]\([^)]*\)|\]\[[^\]]*\]|{URL}", re.I)
+#: Inline literals, roles, embedded URIs of hyperlinks, substitutions and field names, then URLs
+RST_INLINE = re.compile(
+    rf"``.+?``|:[\w.+-]+:`[^`]*`|`[^`]*`:[\w.+-]+:|<[^<>`\s]+>(?=`_)|\|[^|\s][^|]*\||^\s*:[^:`]+:(?=\s|$)|{URL}",
+    re.I,
+)
+PLAIN_INLINE = re.compile(URL, re.I)
+
+#: An opening (or closing) code fence e.g. ``` or ~~~python
+FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+#: A link reference definition e.g. [docs]: https://example.com "Docs"
+REFERENCE = re.compile(r" {0,3}\[[^\]]+\]:")
+#: A directive e.g. ".. code-block:: python", or any other explicit markup e.g. a comment
+EXPLICIT_MARKUP = re.compile(r"(\s*)\.\.(?:\s+([\w:+-]+)::(.*)|\s|$)")
+#: The underline (or overline) of a section title e.g. =====
+ADORNMENT = re.compile(r"([=\-`:'\"~^_*+#<>])\1{3,}\s*")
+#: Directives whose content is prose, the content of any other directive is skipped
+PROSE_DIRECTIVES: frozenset[str] = frozenset(
+    {
+        "admonition",
+        "attention",
+        "caution",
+        "danger",
+        "deprecated",
+        "error",
+        "hint",
+        "important",
+        "note",
+        "rubric",
+        "seealso",
+        "sidebar",
+        "tip",
+        "topic",
+        "versionadded",
+        "versionchanged",
+        "warning",
+    }
+)
+
+
+def blank(match: re.Match[str]) -> str:
+    return " " * len(match.group())
+
+
+def indentation(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+class Extractor(Protocol):
+    """Tells which lines of a document are prose, fed one line after the other"""
+
+    name: str
+
+    def feed(self, line: str) -> str | None:
+        """Returns the prose of a line (without its line ending), None if there's none"""
+        ...
+
+
+class TextExtractor:
+    """Plain text, every line is prose but URLs and email addresses"""
+
+    name = "text"
+
+    def feed(self, line: str) -> str | None:
+        if not line.strip():
+            return None
+        return PLAIN_INLINE.sub(blank, line)
+
+
+class MarkdownExtractor:
+    """Markdown (CommonMark), without code blocks, inline code, HTML, URLs and link targets"""
+
+    name = "markdown"
+
+    def __init__(self) -> None:
+        self.line_no = 0
+        #: The fence of the code block the current line is in, if any
+        self.fence: str | None = None
+        self.front_matter = False
+        self.html_comment = False
+        #: True if the previous line was prose, an indented code block can't interrupt a paragraph
+        self.paragraph = False
+
+    def feed(self, line: str) -> str | None:
+        self.line_no += 1
+        prose = self._feed(line)
+        self.paragraph = prose is not None
+        return prose
+
+    def _feed(self, line: str) -> str | None:
+        stripped = line.strip()
+        if self.line_no == 1 and stripped == "---":
+            self.front_matter = True
+            return None
+        if self.front_matter:
+            self.front_matter = stripped not in ("---", "...")
+            return None
+        if self.html_comment:
+            self.html_comment = "-->" not in line
+            return None
+
+        if self.fence is not None:
+            match = FENCE.match(line)
+            if match and match.group(1).startswith(self.fence) and not line[match.end() :].strip():
+                self.fence = None
+            return None
+        if match := FENCE.match(line):
+            self.fence = match.group(1)
+            return None
+
+        if not stripped or REFERENCE.match(line):
+            return None
+        if stripped.startswith("<!--") and "-->" not in stripped:
+            self.html_comment = True
+            return None
+        if not self.paragraph and (line.startswith("    ") or line.startswith("\t")):
+            return None  # an indented code block
+        return MARKDOWN_INLINE.sub(blank, line)
+
+
+class RstExtractor:
+    """reStructuredText, without literal blocks, doctests, inline literals, roles and URLs
+
+    The content of directives is skipped, unless they're admonitions or alike (see
+    PROSE_DIRECTIVES), and so are comments and hyperlink targets.
+    """
+
+    name = "rst"
+
+    def __init__(self) -> None:
+        #: Lines indented more than this are skipped (the body of a directive or a literal block)
+        self.skip_indent: int | None = None
+        #: The indentation of the paragraph introducing a literal block (ending with "::"), if any
+        self.literal: int | None = None
+        self.doctest = False
+
+    def feed(self, line: str) -> str | None:
+        stripped = line.strip()
+        if not stripped:
+            self.doctest = False
+            if self.literal is not None:
+                self.skip_indent, self.literal = self.literal, None
+            return None
+        indent = indentation(line)
+        if self.skip_indent is not None:
+            if indent > self.skip_indent:
+                return None
+            self.skip_indent = None
+        self.literal = None
+
+        if self.doctest or stripped.startswith(">>>"):
+            self.doctest = True
+            return None
+        if ADORNMENT.fullmatch(line):
+            return None
+        if match := EXPLICIT_MARKUP.match(line):
+            directive, argument = match.group(2), match.group(3)
+            if directive is None or directive not in PROSE_DIRECTIVES:
+                self.skip_indent = indent
+                return None
+            # The argument of an admonition is prose e.g. ".. note:: Read this"
+            prose = " " * (len(line) - len(argument)) + argument
+            return RST_INLINE.sub(blank, prose) if argument.strip() else None
+
+        if stripped.endswith("::"):
+            self.literal = indent
+            if stripped == "::":
+                return None
+        return RST_INLINE.sub(blank, line)
+
+
+#: Extractors by file suffix
+FORMATS: dict[str, type[TextExtractor] | type[MarkdownExtractor] | type[RstExtractor]] = {
+    ".txt": TextExtractor,
+    ".md": MarkdownExtractor,
+    ".markdown": MarkdownExtractor,
+    ".rst": RstExtractor,
+}
+
+
+def extractor_for(path: Path) -> Extractor | None:
+    """Returns a new extractor of the document, None if it isn't one (e.g. a python file)"""
+    extractor = FORMATS.get(path.suffix.lower())
+    return extractor() if extractor is not None else None
+
+
+def read_lines(data: bytes | mmap.mmap) -> Iterator[str]:
+    """Yields the lines of an (UTF-8) document without their line endings, decoded one at a time"""
+    if isinstance(data, mmap.mmap):
+        data.seek(0)
+        readline = data.readline
+    else:
+        readline = io.BytesIO(data).readline
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    for line in iter(readline, b""):
+        yield decoder.decode(line).rstrip("\r\n")
+
+
+@dataclass(slots=True)
+class Paragraph:
+    """Consecutive prose lines of a document"""
+
+    #: The prose of the lines, joined by newlines
+    text: str
+    line_no: int
+    end_line_no: int
+
+
+def paragraphs(extractor: Extractor, lines: Iterable[str]) -> Iterator[Paragraph]:
+    """Yields the paragraphs of a document, i.e. its prose lines up to a line without any"""
+    prose: list[str] = []
+    first = 0
+    for line_no, line in enumerate(lines, 1):
+        text = extractor.feed(line)
+        if text is not None and text.strip():
+            if not prose:
+                first = line_no
+            prose.append(text)
+            if len(prose) < MAX_PARAGRAPH_LINES:
+                continue
+        if prose:
+            yield Paragraph("\n".join(prose), first, first + len(prose) - 1)
+            prose = []
+    if prose:
+        yield Paragraph("\n".join(prose), first, first + len(prose) - 1)
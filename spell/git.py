@@ -0,0 +1,112 @@
+"""Changed files and lines according to the local git repository"""
+
+import os
+import re
+import subprocess  # nosec
+from bisect import bisect_right
+from pathlib import Path
+
+#: Inclusive (first, last) line ranges, sorted and non-overlapping
+LineRanges = list[tuple[int, int]]
+
+#: The added side of a hunk header i.e. "+start[,count]" of "@@ -1,2 +3,4 @@"
+HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+WHOLE_FILE: tuple[int, int] = (1, 2**31)
+#: The escapes of C-style quoted paths, besides octal ones e.g. "caf\303\251.py"
+ESCAPES: dict[str, int] = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12, "r": 13, '"': 34, "\\": 92}
+
+
+class GitError(Exception):
+    """Raised when git isn't available or fails"""
+
+
+def _git(*args: str, cwd: Path | None = None) -> str:
+    try:
+        process = subprocess.run(  # nosec
+            ["git", *args], cwd=cwd, capture_output=True, encoding="utf-8", errors="surrogateescape"
+        )
+    except FileNotFoundError as e:
+        raise GitError("git is not installed") from e
+    if process.returncode != 0:
+        raise GitError(process.stderr.strip() or f"git {' '.join(args)} failed")
+    return process.stdout
+
+
+def unquote(name: str) -> str:
+    """Returns a path as git quotes it (e.g. with core.quotePath) unquoted, as it is otherwise"""
+    if len(name) < 2 or name[0] != '"' or name[-1] != '"':
+        return name
+    data, idx = bytearray(), 1
+    while idx < len(name) - 1:
+        char = name[idx]
+        if char != "\\":
+            data += char.encode()
+        elif name[idx + 1].isdigit():
+            data.append(int(name[idx + 1 : idx + 4], 8))
+            idx += 3
+        else:
+            data.append(ESCAPES.get(name[idx + 1], ord(name[idx + 1])))
+            idx += 1
+        idx += 1
+    return os.fsdecode(bytes(data))
+
+
+def parse_diff(diff: str, root: Path) -> dict[Path, LineRanges]:
+    """Returns the added or modified lines by file of a zero context (-U0) diff"""
+    changes: dict[Path, LineRanges] = {}
+    ranges: LineRanges | None = None
+    # Headers are from "diff --git" to the first hunk of a file, lines of hunks are prefixed, e.g.
+    # an added "++ x" is "+++ x" and isn't a header
+    header = True
+
+    for line in diff.splitlines():
+        if line.startswith("diff "):
+            header, ranges = True, None
+        elif header and line.startswith("+++ "):
+            # git ends names with a space with a tab
+            target = unquote(line[4:].removesuffix("\t"))
+            # "+++ /dev/null" i.e. deleted file
+            ranges = changes.setdefault(root / target[2:], []) if target.startswith("b/") else None
+        elif match := HUNK_RE.match(line):
+            header = False
+            start, count = int(match.group(1)), int(match.group(2) or 1)
+            if ranges is not None and count:  # count is 0 for deleted lines only
+                ranges.append((start, start + count - 1))
+
+    return {path: sorted(ranges) for path, ranges in changes.items() if ranges}
+
+
+def changed_lines(rev: str, cwd: Path | None = None) -> dict[Path, LineRanges]:
+    """Returns the lines changed since rev (including uncommitted and untracked files) by absolute path"""
+    if rev.startswith("-"):  # git would take it for an option
+        raise GitError(f"invalid revision {rev!r}")
+    root = Path(_git("rev-parse", "--show-toplevel", cwd=cwd).strip()).resolve()
+    # Whatever the user's configuration, paths are prefixed with b/ and not quoted unless they must be
+    diff = _git(
+        "-c",
+        "core.quotePath=false",
+        "diff",
+        "--unified=0",
+        "--no-color",
+        "--no-ext-diff",
+        "--no-renames",
+        "--src-prefix=a/",
+        "--dst-prefix=b/",
+        rev,
+        "--",
+        cwd=root,
+    )
+    changes = parse_diff(diff, root)
+
+    for name in _git("ls-files", "--others", "--exclude-standard", "-z", cwd=root).split("\0"):
+        if name:
+            changes[root / name] = [WHOLE_FILE]
+    return changes
+
+
+def overlaps(ranges: LineRanges, first: int, last: int) -> bool:
+    """Return True if the lines first to last (inclusive) intersect any of the ranges"""
+    idx = bisect_right(ranges, (first, 2**31))
+    if idx and ranges[idx - 1][1] >= first:
+        return True
+    return idx < len(ranges) and ranges[idx][0] <= last
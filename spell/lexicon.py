@@ -0,0 +1,223 @@
+"""A compiled, memory-mapped lexicon of words the spell-checker should never flag
+
+The word lists in ``assets/`` (and any user dictionaries) are merged into a single binary file
+laid out as follows::
+
+    header | slot table (open addressing, uint64 per slot) | blob (sorted, utf-8 encoded words)
+
+Every slot packs ``offset << 16 | length`` of a word inside the blob (``0`` marks an empty slot),
+and is addressed by ``crc32(word)``. Opening the file only maps it into memory, and a membership
+test is a couple of probes into the slot table. A test still encodes the word once to hash it
+(crc32 needs bytes), so callers looking up the same words over and over should cache the verdicts,
+as the checker does.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from argparse import ArgumentParser
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from spell.config import default_cache_dir
+
+WORDS_ASSETS: Path = Path(__file__).parent.parent / "assets"
+
+PY_STD_LIB_PATH: Path = WORDS_ASSETS / "std_lib_names"
+TECH_WORDS_PATH: Path = WORDS_ASSETS / "tech_words"
+COMMON_WORDS_PATH: Path = WORDS_ASSETS / "common"
+LATIN_ABBREV_PATH: Path = WORDS_ASSETS / "latin_abbrev"
+
+SOURCES: tuple[Path, ...] = (PY_STD_LIB_PATH, TECH_WORDS_PATH, COMMON_WORDS_PATH, LATIN_ABBREV_PATH)
+
+MAGIC: bytes = b"SPLX"
+VERSION: int = 2
+# magic, version, number of slots, number of words, fingerprint and digest of the source word lists
+HEADER = struct.Struct("<4sIQQ32s32s")
+SLOT_SIZE: int = 8
+LENGTH_MASK: int = 0xFFFF
+
+
+class LexiconError(Exception):
+    """Raised when a compiled lexicon file can not be used"""
+
+
+def read_words(path: Path) -> list[str]:
+    """Returns the (lower-cased) words of a word list, one or more per line"""
+    return [w.lower() for w in path.read_text().split()]
+
+
+def fingerprint(sources: Iterable[Path]) -> bytes:
+    """Returns a digest identifying the current state of the given word lists
+
+    Only their locations, sizes and modification times are looked at, to quickly tell whether they
+    changed, see content_digest() to identify what they are.
+    """
+    digest = hashlib.sha256()
+    for source in sources:
+        stat = source.stat()
+        digest.update(f"{source.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.digest()
+
+
+def content_digest(sources: Iterable[Path]) -> bytes:
+    """Returns a digest of the content of the given files, the same wherever and whenever they're written"""
+    digest = hashlib.sha256()
+    for source in sources:
+        data = source.read_bytes()
+        digest.update(b"%d\0" % len(data))
+        digest.update(data)
+    return digest.digest()
+
+
+def default_path(sources: Sequence[Path]) -> Path:
+    """Returns the location of the compiled lexicon for the given word lists"""
+    key = hashlib.sha256("\0".join(str(s.resolve()) for s in sources).encode()).hexdigest()[:16]
+    return default_cache_dir() / f"lexicon-{key}.bin"
+
+
+def build(sources: Sequence[Path], output: Path) -> int:
+    """Compile the given word lists into ``output`` and returns the number of words"""
+
+    words = sorted({w.encode() for source in sources for w in read_words(source)})
+
+    n_slots = 8
+    while n_slots < 2 * len(words):
+        n_slots *= 2
+    mask = n_slots - 1
+
+    slots = array("Q", bytes(SLOT_SIZE * n_slots))
+    blob = bytearray()
+    for word in words:
+        if len(word) > LENGTH_MASK:
+            raise LexiconError(f"Word is too long for the lexicon: {word[:32]!r}...")
+        idx = zlib.crc32(word) & mask
+        while slots[idx]:
+            idx = (idx + 1) & mask
+        slots[idx] = len(blob) << 16 | len(word)
+        blob += word
+
+    header = HEADER.pack(MAGIC, VERSION, n_slots, len(words), fingerprint(sources), content_digest(sources))
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as f:
+        f.write(header)
+        f.write(slots.tobytes())
+        f.write(blob)
+    os.replace(tmp, output)
+    return len(words)
+
+
+class Lexicon:
+    """A read-only set of words backed by a memory-mapped compiled lexicon file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # empty file
+                raise LexiconError(f"Invalid lexicon file: {path}") from e
+
+        if len(self._mm) < HEADER.size:
+            raise LexiconError(f"Invalid lexicon file: {path}")
+        magic, version, n_slots, n_words, self.fingerprint, self.digest = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            raise LexiconError(f"Unsupported lexicon file: {path}")
+
+        view = memoryview(self._mm)
+        slots_end = HEADER.size + SLOT_SIZE * n_slots
+        self._slots = view[HEADER.size : slots_end].cast("Q")
+        self._blob = view[slots_end:]
+        self._mask: int = n_slots - 1
+        self._size: int = n_words
+
+    def __contains__(self, word: object) -> bool:
+        if not isinstance(word, str):
+            return False
+        # crc32 and the comparison with the blob both need bytes
+        key = word.encode()
+        slots, mask = self._slots, self._mask
+        idx = zlib.crc32(key) & mask
+        while slot := slots[idx]:
+            if slot & LENGTH_MASK == len(key):
+                offset = slot >> 16
+                if self._blob[offset : offset + len(key)] == key:
+                    return True
+            idx = (idx + 1) & mask
+        return False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def is_stale(self, sources: Iterable[Path]) -> bool:
+        """Return True if any of the source word lists changed since the lexicon was built"""
+        try:
+            current = fingerprint(sources)
+        except FileNotFoundError:
+            return True
+        return bool(current != self.fingerprint)
+
+
+def sources_for(dictionaries: Iterable[Path] = ()) -> tuple[Path, ...]:
+    """Returns bundled word lists followed by user dictionaries"""
+    return SOURCES + tuple(dictionaries)
+
+
+@lru_cache(maxsize=None)
+def load(dictionaries: tuple[Path, ...] = ()) -> Lexicon:
+    """Returns the compiled lexicon for bundled word lists and user dictionaries
+
+    The lexicon is (re)built first if it doesn't exist yet or its source word lists changed.
+    """
+    sources = sources_for(dictionaries)
+    path = default_path(sources)
+
+    try:
+        lexicon = Lexicon(path)
+        if not lexicon.is_stale(sources):
+            return lexicon
+    except (FileNotFoundError, LexiconError):
+        pass
+
+    build(sources, path)
+    return Lexicon(path)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entrypoint of ``spell build-lexicon``"""
+    parser = ArgumentParser(prog="spell build-lexicon", description="Compile word lists into a lexicon")
+    parser.add_argument(
+        "-d",
+        "--dictionary",
+        dest="dictionaries",
+        action="append",
+        type=Path,
+        default=[],
+        help="Additional word list to merge into the lexicon (can be used multiple times)",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Where to write the compiled lexicon")
+    parser.add_argument(
+        "--check", action="store_true", help="Exit with 1 if the lexicon is out of date instead of building"
+    )
+    args = parser.parse_args(argv)
+
+    sources = sources_for(args.dictionaries)
+    output: Path = args.output or default_path(sources)
+
+    if args.check:
+        try:
+            stale = Lexicon(output).is_stale(sources)
+        except (FileNotFoundError, LexiconError):
+            stale = True
+        print(f"{output}: {'stale' if stale else 'up to date'}")
+        return int(stale)
+
+    count = build(sources, output)
+    print(f"{output}: {count} words")
+    return 0
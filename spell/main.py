@@ -1,16 +1,42 @@
 """A main entrypoint or command line interface"""
 
+import os
+import sys
 from argparse import ArgumentParser
+from contextlib import ExitStack
 from pathlib import Path
+from typing import Callable, Iterable, Sequence
 
-from spell.checker import Checker
+from spell import __version__, daemon, documents, git, lexicon, pipeline, shard, watch
+from spell.checker import ENGINES
 from spell.config import Config
-from spell.parser import Parser
-from spell.walker import Walker
+from spell.profiling import Profiler, cprofile, timed, trace_allocations
+from spell.reporter import REPORTERS
+from spell.results import FileResult
+from spell.walker import DEFAULT_EXTENSIONS, Walker
 
+#: Sub-commands i.e. ``spell <command> [options]``
+COMMANDS: dict[str, Callable[[Sequence[str]], int]] = {
+    "build-lexicon": lexicon.main,
+    "daemon": daemon.main,
+    "merge": shard.main,
+}
+OUTPUT_BUFFER: int = 2**16
+#: Which identifiers are known words, see --vocabulary
+VOCABULARIES: tuple[str, ...] = ("none", "file", "project")
+#: Python files, and documents (see documents.FORMATS)
+EXTENSIONS: tuple[str, ...] = (".py", *documents.FORMATS)
 
-def main() -> None:
-    parser = ArgumentParser()
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    parser = ArgumentParser(
+        prog="spell", epilog=f"commands: {', '.join(COMMANDS)} (see 'spell <command> --help')"
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
     parser.add_argument(
         "paths",
         nargs="*",
@@ -28,39 +54,251 @@ def main() -> None:
     )
     parser.add_argument("-c", "--config-file", type=Path, help="Configuration file")
     parser.add_argument("--dump-config", action="store_true", help="Dump configuration and exit")
+    parser.add_argument(
+        "--include",
+        metavar="GLOB",
+        action="append",
+        help="Only check files matching the pattern, relative to the given paths (can be used multiple times)",
+    )
+    parser.add_argument(
+        "--exclude",
+        metavar="GLOB",
+        action="append",
+        help="Skip files and directories matching the pattern, e.g. 'build/' (can be used multiple times)",
+    )
+    parser.add_argument(
+        "--no-gitignore",
+        dest="gitignore",
+        action="store_false",
+        help="Also check files ignored by .gitignore",
+    )
+    parser.add_argument("--follow-symlinks", action="store_true", help="Follow symbolic links while walking")
+    parser.add_argument(
+        "--files-from",
+        type=Path,
+        metavar="FILE",
+        help="Check the files listed in FILE ('-' for stdin) as they're read, one per line, instead of "
+        "walking paths",
+    )
+    parser.add_argument(
+        "--stdin-paths",
+        dest="files_from",
+        action="store_const",
+        const=Path("-"),
+        help="Check the files listed on stdin, the same as --files-from -",
+    )
+    parser.add_argument(
+        "-0",
+        "--null",
+        action="store_true",
+        help="Files listed by --files-from or --stdin-paths are NUL separated (e.g. find -print0, git diff -z)",
+    )
+    parser.add_argument(
+        "--stdin-text",
+        action="store_true",
+        help="Check what's piped to stdin (e.g. by an editor) as the content of a single file, "
+        "without reading any file",
+    )
+    parser.add_argument(
+        "--stdin-filename",
+        type=Path,
+        metavar="NAME",
+        help="Name of the file of --stdin-text in findings, its extension tells its format (default: <stdin>)",
+    )
+    parser.add_argument(
+        "--extension",
+        dest="supported_extensions",
+        metavar="EXT",
+        choices=EXTENSIONS,
+        action="append",
+        default=[],
+        help=f"Check files with this extension within directories, one of {', '.join(EXTENSIONS)} "
+        f"(can be used multiple times, default: {' '.join(DEFAULT_EXTENSIONS)})",
+    )
+    parser.add_argument(
+        "-d",
+        "--dictionary",
+        dest="dictionaries",
+        action="append",
+        type=Path,
+        default=[],
+        help="Additional word list with words to ignore (can be used multiple times)",
+    )
+    parser.add_argument(
+        "--engine", choices=sorted(ENGINES), default="symspell", help="Spelling correction engine"
+    )
+    parser.add_argument(
+        "--frequency-dictionary",
+        type=Path,
+        help="Word frequency list ('<word> <count>' per line) used for corrections (default: TextBlob's)",
+    )
+    parser.add_argument(
+        "--vocabulary",
+        choices=VOCABULARIES,
+        default="file",
+        help="Skip words of identifiers (e.g. parse_config or ConfigParser) in the code of the same file, "
+        "or of any checked file with 'project' (reported once every file is checked)",
+    )
+    parser.add_argument(
+        "--word-cache-size",
+        type=int,
+        default=2**16,
+        help="Number of distinct words whose verdict is remembered during a run (0 to disable)",
+    )
 
-    config = Config.from_argparser(parser)
-    print("Final Config", config)
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of files checked in parallel (default: number of CPUs, 1 to check serially)",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        default=16,
+        metavar="N",
+        help="Number of files read by background threads ahead of the one being checked (0 to disable)",
+    )
+    parser.add_argument(
+        "--mmap-threshold",
+        type=int,
+        default=2**23,
+        metavar="BYTES",
+        help="Python files of at least this size are memory-mapped and scanned without decoding them "
+        "whole (default: 8 MiB, 0 to disable)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Directory where results are cached, files which didn't change since are not checked again",
+    )
+    parser.add_argument(
+        "-f", "--format", choices=sorted(REPORTERS), default="human", help="Format of the findings"
+    )
+    parser.add_argument("-o", "--output", type=Path, help="File to write findings to (default: stdout)")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report time spent in every stage, counters and the slowest files (to stderr)",
+    )
+    parser.add_argument(
+        "--profile-output", type=Path, metavar="FILE", help="Dump cProfile stats of this process to FILE"
+    )
+    parser.add_argument(
+        "--profile-memory",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Report the top N memory allocations of this process (to stderr)",
+    )
+    parser.add_argument(
+        "--client",
+        action="store_true",
+        help="Check files with 'spell daemon' if it's running (with --cache-dir and --jobs), in this process otherwise",
+    )
+    parser.add_argument(
+        "--socket", type=Path, help=f"Unix socket of the daemon (default: {daemon.default_socket()})"
+    )
+    parser.add_argument(
+        "--diff",
+        metavar="REV",
+        help="Only check comments and docstrings changed since the given git revision (e.g. HEAD, main)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard.parse_spec,
+        metavar="I/N",
+        help="Only check the I-th of N shards of the files (e.g. on one of N CI nodes), and write a partial "
+        "result instead of findings, see 'spell merge'",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep checking the files which change, and report the findings which appear or disappear",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="How often files are polled for changes with --watch (default: 0.5)",
+    )
 
-    walker = Walker(config)
-    paths = walker.walk()
-    print(paths)
+    config = Config.from_argparser(parser, argv)
+    if config.dump_config:
+        print(config)
+        return 0
+    if config.verbosity:
+        print("Final Config", config, file=sys.stderr)
+
+    if config.stdin_text and (config.files_from or config.diff or config.shard or config.watch):
+        parser.error(
+            "--stdin-text can't be used with --files-from, --stdin-paths, --diff, --shard or --watch"
+        )
+    if config.watch:
+        if config.diff or config.shard or config.client or config.files_from:
+            parser.error(
+                "--watch can't be used with --diff, --shard, --client, --files-from or --stdin-paths"
+            )
+        with ExitStack() as stack:
+            stream = sys.stdout
+            if config.output:
+                stream = stack.enter_context(config.output.open("w", encoding="utf-8"))
+            return watch.Watcher(config, stream).run(config.watch_interval)
 
-    texts = []
-    for path in paths:
-        print(f"{path.name} : {'+' * 180}")
-        file_parser = Parser(path)
-        file_parser.parse()
+    changes = None
+    if config.diff:
+        try:
+            changes = git.changed_lines(config.diff)
+        except git.GitError as e:
+            parser.error(f"--diff: {e}")
 
-        doc_strs = file_parser.find_docstrings(verbose=False)
-        comments = file_parser.find_inline_comments()
+    profiler = Profiler() if config.profile else None
+
+    # walk -> read -> extract -> filter -> check -> report, one file at a time
+    walker = Walker(config)
+    paths: Iterable[Path] = (path for path in walker.walk() if changes is None or path.resolve() in changes)
+    if profiler is not None:
+        paths = profiler.iterate("walk", paths)
+    indices: list[int] = []
+    selected: list[Path] = []
+    files = 0
+    if config.shard is not None:
+        indices, selected, files = shard.select(paths, *config.shard)
+        paths = selected
 
-        for c in comments:
-            cleaned_c = c.clean(strip_hash=True)
-            if cleaned_c.is_code():
-                print("code found, skipping", cleaned_c.text)
-                continue
-            texts.append(cleaned_c.text)
+    with ExitStack() as stack:
+        stack.enter_context(trace_allocations(config.profile_memory, sys.stderr))
+        stack.enter_context(cprofile(config.profile_output))
+        stream = sys.stdout
+        if config.output:
+            stream = stack.enter_context(config.output.open("w", encoding="utf-8", buffering=OUTPUT_BUFFER))
+        reporter = REPORTERS[config.format](stream, config.verbosity)
 
-        for d in doc_strs:
-            texts.append(d.text)
+        if config.stdin_text:
+            check_text = daemon.check_text if config.client else pipeline.check_text
+            path = config.stdin_filename or Path("<stdin>")
+            results: Iterable[FileResult] = [check_text(config, path, sys.stdin.buffer.read(), profiler)]
+        else:
+            run = daemon.run if config.client else pipeline.run
+            results = run(config, paths, changes, profiler)
+        if config.shard is not None:
+            # the vocabulary of the project and the exit code are left to 'spell merge'
+            shard.write(stream, config.shard, files, config.vocabulary, indices, selected, results)
+        else:
+            if config.vocabulary == "project":
+                results = pipeline.with_project_vocabulary(results)
+            reporter.start()
+            for result in results:
+                with timed(profiler, "report"):
+                    reporter.report(result)
+            reporter.finish()
 
-    for text in texts:
-        print(text)
-        # print(text.remove_symbols())
-        checker = Checker(text.remove_symbols())
-        checker.check(verbose=False)
+    if profiler is not None:
+        print(profiler.format(), file=sys.stderr)
+    return 1 if reporter.findings else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
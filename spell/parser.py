@@ -1,39 +1,109 @@
 """A parser to parse the python file (only) to extract docstring and inline comments"""
 
 import ast
-from dataclasses import dataclass
+import codecs
+import inspect
+import io
+import re
+import sys
+import tokenize
+from array import array
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
+from spell import classifier
 from spell.types import CommentType, Text
 
 EXAMPLE_DIR = Path.cwd().parent / "examples" / "1.py"
 
 
-@dataclass
+def scanner_pattern(name: str = r"\w+") -> str:
+    """Returns the pattern of what extract_batch() looks at, with the given pattern of names"""
+    # Only comments, string literals and def/class headers matter, code in between is skipped over.
+    # The lookahead rules out most positions (e.g. within names) before trying any alternative.
+    return (
+        r"(?=[#'\"rRbBuUfF \tdca])(?:"
+        rf"(?P<comment>{tokenize.Comment})"
+        r"|(?P<string>(?P<prefix>[rRbBuUfF]{1,2}(?=['\"]))?"
+        rf"(?:'\'\'{tokenize.Single3}"
+        rf'|"""{tokenize.Double3}'
+        r"""|'[^\n'\\]*(?:\\.[^\n'\\]*)*'"""
+        r"""|"[^\n"\\]*(?:\\.[^\n"\\]*)*"))"""
+        rf"|^(?P<header>[ \t]*(?:async[ \t]+)?(?P<keyword>def|class)[ \t]+(?P<name>{name}))"
+        r")"
+    )
+
+
+SCANNER = re.compile(scanner_pattern(), re.MULTILINE | re.DOTALL)
+# A docstring is the only expression of its statement
+STATEMENT_END = re.compile(r"[ \t]*(?:[;#\r\n]|\Z)")
+BRACKETS = {"(": 1, "[": 1, "{": 1, ")": -1, "]": -1, "}": -1}
+IDENTIFIER = re.compile(r"[^\W\d]\w*")
+
+
+@dataclass(frozen=True)
+class Syntax:
+    """What extract_batch() looks for, in a str or in the bytes of an ASCII compatible encoding
+
+    Bytes aren't decoded to be scanned: any byte beyond ASCII in code is part of a name.
+    """
+
+    scanner: re.Pattern[Any]
+    statement_end: re.Pattern[Any]
+    identifier: re.Pattern[Any]
+    newline: Any
+    #: A colon, and brackets (and their depth) as items of the source i.e. str or int
+    colon: Any
+    brackets: dict[Any, int]
+    #: Prefixes of string literals which are never docstrings (f-strings and bytes)
+    not_docstrings: frozenset[Any]
+    #: Returns the number of occurrences of a substring within source[start:end]
+    count: Callable[[Any, Any, int, int], int]
+
+
+def _count_bytes(source: Any, sub: bytes, start: int, end: int) -> int:
+    # mmap has no count()
+    return source[start:end].count(sub)  # type: ignore[no-any-return]
+
+
+TEXT_SYNTAX = Syntax(SCANNER, STATEMENT_END, IDENTIFIER, "\n", ":", BRACKETS, frozenset("fFbB"), str.count)
+BYTES_SYNTAX = Syntax(
+    re.compile(scanner_pattern(r"[\w\x80-\xff]+").encode(), re.MULTILINE | re.DOTALL),
+    re.compile(STATEMENT_END.pattern.encode()),
+    re.compile(rb"[A-Za-z_\x80-\xff][\w\x80-\xff]*"),
+    b"\n",
+    ord(":"),
+    {ord(char): depth for char, depth in BRACKETS.items()},
+    frozenset(b"fFbB"),
+    _count_bytes,
+)
+
+
+@dataclass(slots=True)
 class BaseComment:
     comment: str | None
     line_no: int
     ignore: bool = False
     _type: CommentType = CommentType.INLINE
+    col_offset: int | None = field(default=None, compare=False)
+    #: Where the comment (i.e. '#') starts within the source
+    offset: int | None = field(default=None, compare=False)
 
     def clean(self, strip_hash: bool = False) -> "BaseComment":
         if not self.comment:
             return self
-
-        _comment: str = self.comment.strip()
-        if strip_hash:
-            _comment = _comment.strip("#").strip()
-        return BaseComment(comment=_comment, line_no=self.line_no)
+        return BaseComment(
+            comment=clean_comment(self.comment, strip_hash),
+            line_no=self.line_no,
+            col_offset=self.col_offset,
+            offset=self.offset,
+        )
 
     def is_code(self) -> bool:
-        """Returns True if commented line is python code"""
+        """Returns True if commented line is python code (or a directive e.g. 'type: ignore')"""
         assert self.comment is not None
-        try:
-            ast.parse(self.comment)
-        except SyntaxError:
-            return False
-        return True
+        return classifier.is_code(self.comment)
 
     @property
     def text(self) -> Text:
@@ -41,7 +111,7 @@ class BaseComment:
         return Text(self.comment)
 
 
-@dataclass
+@dataclass(slots=True)
 class DocstringMetadata:
     cls_name: str | None
     line_no: int | None
@@ -49,11 +119,13 @@ class DocstringMetadata:
     col_offset: int | None
 
 
-@dataclass
+@dataclass(slots=True)
 class BaseDocstring:
     docstring: str | None
     metadata: DocstringMetadata | None
     _type: CommentType
+    #: Where the string literal starts within the source
+    offset: int | None = field(default=None, compare=False)
     # TODO: Add identifier to identify where docstring came from i.e. Enum.Module, Enum.Function etc.
 
     @property
@@ -62,17 +134,299 @@ class BaseDocstring:
         return Text(self.docstring)
 
 
+def clean_comment(comment: str, strip_hash: bool = False) -> str:
+    """Returns the comment without surrounding whitespace, and '#' too with strip_hash"""
+    comment = comment.strip()
+    return comment.strip("#").strip() if strip_hash else comment
+
+
+#: Types of snippets by their code in SnippetBatch.kinds
+KINDS: tuple[CommentType, ...] = (
+    CommentType.INLINE,
+    CommentType.MODULE,
+    CommentType.CLASS,
+    CommentType.FUNCTION,
+)
+_KIND_CODES: dict[CommentType, int] = {kind: code for code, kind in enumerate(KINDS)}
+
+
+class SnippetBatch:
+    """The comments and docstrings of a source, as columns of offsets into it and small ints
+
+    The i-th item of every column describes the i-th snippet, in the order of the source. Nothing
+    but the source and these arrays is kept, texts are sliced (and docstrings evaluated) on demand.
+    Line numbers are 0 and column offsets -1 when unknown (i.e. of the module docstring).
+
+    The source is either a str, or the bytes of a file (e.g. memory-mapped) along with their
+    encoding, in which case offsets are in bytes and only the slices of the snippets are decoded.
+    """
+
+    __slots__ = (
+        "source",
+        "encoding",
+        "kinds",
+        "starts",
+        "ends",
+        "offsets",
+        "line_nos",
+        "end_line_nos",
+        "col_offsets",
+        "name_starts",
+        "name_ends",
+        "identifiers",
+    )
+
+    def __init__(self, source: Any, encoding: str | None = None):
+        self.source = source
+        self.encoding = encoding
+        self.kinds = array("b")
+        #: The text of a snippet is source[start:end], a comment with the indentation before it
+        self.starts = array("q")
+        self.ends = array("q")
+        #: Where the comment ('#') or the string literal starts
+        self.offsets = array("q")
+        self.line_nos = array("l")
+        self.end_line_nos = array("l")
+        self.col_offsets = array("l")
+        #: The name of the class or function of a docstring is source[name_start:name_end]
+        self.name_starts = array("q")
+        self.name_ends = array("q")
+        #: Names in the code i.e. anywhere but in comments and string literals
+        self.identifiers: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def append(
+        self,
+        kind: CommentType,
+        start: int,
+        end: int,
+        offset: int,
+        line_no: int = 0,
+        end_line_no: int = 0,
+        col_offset: int = -1,
+        name: tuple[int, int] = (0, 0),
+    ) -> None:
+        self.kinds.append(_KIND_CODES[kind])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.offsets.append(offset)
+        self.line_nos.append(line_no)
+        self.end_line_nos.append(end_line_no)
+        self.col_offsets.append(col_offset)
+        self.name_starts.append(name[0])
+        self.name_ends.append(name[1])
+
+    def is_comment(self, idx: int) -> bool:
+        return self.kinds[idx] == 0
+
+    def decode(self, start: int, end: int) -> str:
+        """Returns source[start:end], decoded if it's bytes (see decode() for bytes of another encoding)"""
+        if self.encoding is None:
+            return self.source[start:end]  # type: ignore[no-any-return]
+        return self.source[start:end].decode(self.encoding, errors="replace")  # type: ignore[no-any-return]
+
+    def text(self, idx: int) -> str:
+        """Returns the comment (as it is in the source) or the (dedented) docstring"""
+        raw = self.decode(self.starts[idx], self.ends[idx])
+        return raw if self.is_comment(idx) else inspect.cleandoc(ast.literal_eval(raw))
+
+    def lines(self, idx: int) -> tuple[str, int, int]:
+        """Returns the lines of a snippet, its first line number and where it starts within them
+
+        i.e. the source from the start of the line of the comment ('#') or string literal to the
+        end of the snippet, so that words can be located in it, see pipeline.Locator.
+        """
+        newline = "\n" if self.encoding is None else b"\n"
+        offset = self.offsets[idx]
+        line_start = self.source.rfind(newline, 0, offset) + 1
+        # Only the module docstring has no line number, only comments can be before it
+        line_no = self.line_nos[idx] or self.source[:line_start].count(newline) + 1
+        return self.decode(line_start, self.ends[idx]), line_no, len(self.decode(line_start, offset))
+
+    def comment(self, idx: int) -> BaseComment:
+        """Returns a comment as an object, see comments()"""
+        return BaseComment(
+            self.text(idx),
+            self.line_nos[idx],
+            col_offset=self.col_offsets[idx],
+            offset=self.offsets[idx],
+        )
+
+    def docstring(self, idx: int) -> BaseDocstring:
+        """Returns a docstring as an object, see docstrings()"""
+        kind = KINDS[self.kinds[idx]]
+        if kind == CommentType.MODULE:
+            metadata = DocstringMetadata(cls_name=None, line_no=None, end_line_no=None, col_offset=None)
+        else:
+            metadata = DocstringMetadata(
+                cls_name=self.decode(self.name_starts[idx], self.name_ends[idx]),
+                line_no=self.line_nos[idx],
+                end_line_no=self.end_line_nos[idx],
+                col_offset=self.col_offsets[idx],
+            )
+        return BaseDocstring(
+            docstring=self.text(idx), metadata=metadata, _type=kind, offset=self.offsets[idx]
+        )
+
+    def comments(self) -> list[BaseComment]:
+        return [self.comment(idx) for idx in range(len(self)) if self.is_comment(idx)]
+
+    def docstrings(self) -> list[BaseDocstring]:
+        # an empty docstring is none, like ast.get_docstring() says
+        docstrings = (self.docstring(idx) for idx in range(len(self)) if not self.is_comment(idx))
+        return [d for d in docstrings if d.docstring]
+
+
+def extract_batch(source: str) -> SnippetBatch:
+    """Returns the comments and docstrings of python source code in a single pass
+
+    Unlike parsing the source, nothing but comments, strings and def/class headers is looked at.
+    A string is a docstring if it's the first statement of the module or of a def/class body.
+    """
+    return _scan(SnippetBatch(source), TEXT_SYNTAX)
+
+
+def extract_buffer(buffer: Any, encoding: str) -> SnippetBatch:
+    """Returns the comments and docstrings of the bytes of a python file, e.g. memory-mapped
+
+    The same as extract_batch(), without decoding the source as a whole. The encoding must be a
+    superset of ASCII (e.g. utf-8 or latin-1), see is_ascii_compatible().
+    """
+    return _scan(SnippetBatch(buffer, encoding), BYTES_SYNTAX)
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    """Returns True if ASCII characters are the same bytes in the encoding, and only them"""
+    name = codecs.lookup(encoding).name
+    return name in ("utf-8", "utf-8-sig", "ascii", "latin-1") or name.startswith(("iso8859", "cp125"))
+
+
+def _scan(batch: SnippetBatch, syntax: Syntax) -> SnippetBatch:
+    source = batch.source
+    newline, colon, brackets, count = syntax.newline, syntax.colon, syntax.brackets, syntax.count
+    identifier = syntax.identifier
+    names: set[Any] = set()
+
+    line_no, line_start, pos = 1, 0, 0
+    # The docstring we're looking for i.e. (type, name span), and where its body starts
+    expected: tuple[CommentType, tuple[int, int]] | None = (CommentType.MODULE, (0, 0))
+    # After the byte order mark, if any
+    body_start = 3 if batch.encoding == "utf-8-sig" else 0
+    # The def/class header we're in i.e. (type, name span), and its bracket depth
+    header: tuple[CommentType, tuple[int, int]] | None = None
+    depth = 0
+
+    for match in syntax.scanner.finditer(source):
+        start, end = match.span()
+        names.update(identifier.findall(source, pos, start))
+        line_no += count(source, newline, pos, start)
+        line_start = source.rfind(newline, 0, start) + 1
+
+        if header is not None:
+            # the header ends with the first colon outside of brackets
+            for idx in range(pos, start):
+                char = source[idx]
+                depth += brackets.get(char, 0)
+                if char == colon and not depth:
+                    expected, body_start, header = header, idx + 1, None
+                    break
+        if expected is not None and header is None and source[body_start:start].strip():
+            expected = None
+
+        kind = match.lastgroup
+        if kind == "comment":
+            # with the indentation before it, unless there's code before it
+            text_start = start if source[line_start:start].strip() else line_start
+            column = start - line_start if batch.encoding is None else len(batch.decode(line_start, start))
+            batch.append(CommentType.INLINE, text_start, end, start, line_no, line_no, column)
+            body_start = end
+
+        elif kind == "string":
+            if (
+                expected is not None
+                and header is None
+                and syntax.not_docstrings.isdisjoint(match.group("prefix") or ())
+                and syntax.statement_end.match(source, end)
+            ):
+                _type, name = expected
+                if _type == CommentType.MODULE:
+                    batch.append(_type, start, end, start)
+                else:
+                    end_line_no = line_no + count(source, newline, start, end)
+                    column = (
+                        start - line_start if batch.encoding is None else len(batch.decode(line_start, start))
+                    )
+                    batch.append(_type, start, end, start, line_no, end_line_no, column, name)
+            if header is None:
+                expected = None
+
+        else:
+            _type = (
+                CommentType.CLASS if match.group("keyword") in ("class", b"class") else CommentType.FUNCTION
+            )
+            header, depth, expected = (_type, match.span("name")), 0, None
+            names.add(match.group("name"))
+
+        line_no += count(source, newline, start, end)
+        pos = end
+
+    names.update(identifier.findall(source, pos))
+    if batch.encoding is not None:
+        # a byte order mark is decoded to nothing
+        names = {name.decode(batch.encoding, errors="replace") for name in names} - {""}
+    batch.identifiers = names
+    return batch
+
+
+def extract(source: str) -> tuple[list[BaseComment], list[BaseDocstring]]:
+    """Returns the comments and docstrings of python source code, see extract_batch()"""
+    batch = extract_batch(source)
+    return batch.comments(), batch.docstrings()
+
+
+def detect_encoding(readline: Callable[[], bytes]) -> str:
+    """Returns the encoding of a python file, as its coding cookie (PEP 263) or BOM says"""
+    try:
+        encoding, _ = tokenize.detect_encoding(readline)
+    except SyntaxError:  # unknown encoding in the cookie
+        return "utf-8"
+    return encoding
+
+
+def decode(data: bytes) -> str:
+    """Returns the source of a python file, decoded as its coding cookie (PEP 263) or BOM says
+
+    Bytes which aren't of that encoding are replaced (with U+FFFD), the rest of the file is checked.
+    """
+    return data.decode(detect_encoding(io.BytesIO(data).readline), errors="replace")
+
+
 class Parser:
     def __init__(self, file: Path):
         self._file = file
+        self._batch: SnippetBatch | None = None
 
-    def parse(self) -> None:
-        """Parse a python file"""
-        self._file_text: str = self._file.read_text()
+    def parse(self, source: str | None = None) -> None:
+        """Parse a python file, or the given source if it was read already"""
+        self._file_text: str = decode(self._file.read_bytes()) if source is None else source
+        self._batch = None
+
+    def batch(self) -> SnippetBatch:
+        """Returns inline comments and docstrings, see extract_batch()"""
+        if self._batch is None:
+            self._batch = extract_batch(self._file_text)
+        return self._batch
+
+    def extract(self) -> tuple[list[BaseComment], list[BaseDocstring]]:
+        """Returns inline comments and docstrings, see extract()"""
+        batch = self.batch()
+        return batch.comments(), batch.docstrings()
 
     def read(self) -> Any:
         """Returns whole file as a string"""
-        return self._file.read_text()
+        return decode(self._file.read_bytes())
 
     def to_ast(self) -> ast.Module:
         """Convert to ast nodes"""
@@ -81,71 +435,21 @@ class Parser:
     def find_docstrings(self, verbose: bool = False) -> list[BaseDocstring]:
         """Return a list of docstring found in functions, methods and module"""
 
-        docstrings: list[BaseDocstring] = []
-
-        nodes: ast.Module = self.to_ast()
-        docstrings_ast = (ast.AsyncFunctionDef, ast.FunctionDef, ast.ClassDef, ast.Module)
-        docstrings_cls = [f for f in ast.walk(nodes) if isinstance(f, docstrings_ast)]
-
-        print(docstrings_cls)
-
-        for cls in docstrings_cls:
-            name: str | None = None
-            line_no: int | None = None
-            end_line_no: int | None = None
-            col_offset: int | None = None
-            # end_col_offset: int | None = None
-            _type: CommentType
-            docstring: str | None = ast.get_docstring(cls)
-
-            # if no docstring found then ignore it
-            if not docstring:
-                continue
-
-            match cls:
-                case ast.Module():
-                    _type = CommentType.MODULE
-                case ast.ClassDef():
-                    _type = CommentType.CLASS
-                case ast.FunctionDef() | ast.AsyncFunctionDef():
-                    _type = CommentType.FUNCTION
-                case _:
-                    raise Exception(f"Unhandled class found: {cls}")
-
-            if not isinstance(cls, ast.Module):
-                for node in cls.body:
-                    if isinstance(node, ast.Expr):
-                        name = cls.name
-                        line_no = node.lineno
-                        end_line_no = node.end_lineno
-                        col_offset = node.col_offset
-                        # break  # Fixme: Add break to optimize little bit
-
-            metadata = DocstringMetadata(
-                cls_name=name, line_no=line_no, end_line_no=end_line_no, col_offset=col_offset
-            )
-            docstrings.append(ds := BaseDocstring(docstring=docstring, metadata=metadata, _type=_type))
+        docstrings = self.extract()[1]
 
-            if verbose:
-                print("-" * 100)
-                print(f"class: {ast.dump(cls)}", end="\n\n")
-                print(ds.metadata, end="\n\n")
-                print(ds.docstring)
-                print(ds._type)
-                print("-" * 100, end="\n\n")
+        if verbose:
+            for ds in docstrings:
+                print("-" * 100, file=sys.stderr)
+                print(ds.metadata, end="\n\n", file=sys.stderr)
+                print(ds.docstring, file=sys.stderr)
+                print(ds._type, file=sys.stderr)
+                print("-" * 100, end="\n\n", file=sys.stderr)
 
         return docstrings
 
     def find_inline_comments(self) -> list[BaseComment]:
         """Returns a list inline comments i.e. comments starts with '#'"""
-        lines = self._file_text.splitlines()
-        comments: list[BaseComment] = []
-
-        for idx, line in enumerate(lines, start=1):
-            comment = line.strip().startswith("#")
-            if comment:
-                comments.append(BaseComment(line, idx))
-        return comments
+        return self.extract()[0]
 
 
 def main() -> None:
@@ -0,0 +1,582 @@
+"""A pipeline extracting and checking the comments and docstrings of files, serially or in parallel"""
+
+import bisect
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Collection, Iterable, Iterator
+
+from spell import __version__, cache as result_cache, classifier, documents, tokenizer
+from spell.cache import ResultCache
+from spell.checker import ENGINES, Checker, Engine, Verdict, get_engine
+from spell.config import Config
+from spell.git import LineRanges
+from spell.lexicon import Lexicon, load as load_lexicon, sources_for
+from spell.parser import (
+    SnippetBatch,
+    clean_comment,
+    decode,
+    detect_encoding,
+    extract_batch,
+    extract_buffer,
+    is_ascii_compatible,
+)
+from spell.profiling import Profiler, timed
+from spell.results import FileResult, TextResult, in_ranges
+from spell.types import Finding, Text
+from spell.utils import LRUCache
+
+#: Files submitted to worker processes ahead of the oldest one not yet done, per worker
+WINDOW_PER_WORKER: int = 16
+#: Files checked per task of a worker process, each read ahead of checking the previous ones
+FILES_PER_TASK: int = 8
+#: Threads reading files ahead of the one being checked, see prefetch()
+READ_THREADS: int = 4
+#: Errors of reading a file which is gone (e.g. deleted since it was listed), it's skipped then
+MISSING: tuple[type[OSError], ...] = (FileNotFoundError, IsADirectoryError)
+
+
+class Locator:
+    """Finds where the words of comments and docstrings are within the source
+
+    Texts are cleaned up (e.g. comment markers stripped, docstrings dedented) before they are
+    checked, so words are searched in the source from where the comment or string literal starts.
+    """
+
+    def __init__(self, source: str, line_no: int = 1):
+        self.source = source
+        #: The line number of the first line of source, e.g. of a paragraph of a document
+        self.line_no = line_no
+        self.line_starts = [0] + [m.end() for m in re.finditer("\n", source)]
+
+    def locate(self, findings: list[Finding], offset: int) -> None:
+        """Sets the line and column of the findings, in the order their words appear from offset"""
+        # the source is split into tokens the way the text was, e.g. "Recieve," gives "recieve"
+        source = self.source
+        tokens = list(tokenizer.spans(source, start=offset))
+        next_token = 0
+        for finding in findings:
+            word, size = finding.word, len(finding.word)
+            for idx in range(next_token, len(tokens)):
+                start, end = tokens[idx]
+                if end - start == size and source[start:end].lower() == word:
+                    break
+            else:  # e.g. an escape sequence of the string literal, the next findings may still be found
+                continue
+            next_token = idx + 1
+            line = bisect.bisect_right(self.line_starts, start) - 1
+            finding.line_no, finding.col_offset = line + self.line_no, start - self.line_starts[line]
+
+
+@dataclass
+class Context:
+    """Everything needed to check files, loaded once per process"""
+
+    config: Config
+    lexicon: Lexicon
+    engine: Engine
+    cache: LRUCache[str, Verdict]
+
+    @classmethod
+    def from_config(cls, config: Config) -> "Context":
+        return cls(
+            config=config,
+            lexicon=load_lexicon(tuple(config.dictionaries)),
+            engine=get_engine(config.engine, config.frequency_dictionary),
+            cache=LRUCache(config.word_cache_size),
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies everything results depend on besides the content of files
+
+        Only contents are looked at, not where or when word lists (or the frequency dictionary) were
+        written, so that the key is the same in a fresh checkout e.g. of a CI run.
+        """
+        key = {
+            "version": result_cache.VERSION,
+            "spell": __version__,
+            "lexicon": self.lexicon.digest.hex(),
+            "engine": self.engine.digest,
+            "suggestions": self.config.suggestions,
+            "identifiers": self.config.vocabulary != "none",
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def is_stale(self) -> bool:
+        """Returns True if word lists or the frequency dictionary changed since they were loaded"""
+        if self.lexicon.is_stale(sources_for(self.config.dictionaries)):
+            return True
+        try:
+            engine = ENGINES[self.config.engine](self.config.frequency_dictionary)
+        except FileNotFoundError:
+            return True
+        return engine.fingerprint != self.engine.fingerprint
+
+    def check_file(
+        self,
+        path: Path,
+        expected_digest: str | None = None,
+        ranges: LineRanges | None = None,
+        data: bytes | None = None,
+    ) -> FileResult:
+        """Read, extract the comments and docstrings of a file and check them, one text at a time
+
+        If the file content has the expected digest, it isn't checked but marked as unchanged.
+        With line ranges, only comments and docstrings within these lines are checked. With
+        config.profile, the result comes with the profile of checking the file. With data, that
+        is checked instead of the content of the file (e.g. unsaved changes of an editor).
+        """
+        profiler = Profiler() if self.config.profile else None
+        start = time.perf_counter()
+        result = self._check_file(path, expected_digest, ranges, data, profiler)
+        if profiler is not None:
+            profiler.count("files.checked")
+            profiler.file(str(path), time.perf_counter() - start)
+            result.profile = profiler.as_dict()
+        return result
+
+    def _check_file(
+        self,
+        path: Path,
+        expected_digest: str | None,
+        ranges: LineRanges | None,
+        data: bytes | None,
+        profiler: Profiler | None,
+    ) -> FileResult:
+        if data is None:
+            with open(path, "rb") as file:
+                if self.is_large(os.fstat(file.fileno()).st_size):
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                        if profiler is not None:
+                            profiler.count("files.mapped")
+                        return self._check_content(path, buffer, expected_digest, ranges, profiler)
+                with timed(profiler, "read"):
+                    data = file.read()
+        return self._check_content(path, data, expected_digest, ranges, profiler)
+
+    def is_large(self, size: int) -> bool:
+        """Returns True if a file of size bytes is memory-mapped rather than read"""
+        return 0 < self.config.mmap_threshold <= size
+
+    def _check_content(
+        self,
+        path: Path,
+        data: bytes | mmap.mmap,
+        expected_digest: str | None,
+        ranges: LineRanges | None,
+        profiler: Profiler | None,
+    ) -> FileResult:
+        result = FileResult(path, digest=result_cache.digest(data))
+        if result.digest == expected_digest:
+            if profiler is not None:
+                profiler.count("files.unchanged")
+            result.unchanged = True
+            return result
+
+        extractor = documents.extractor_for(path)
+        if extractor is not None:
+            self._check_document(result, extractor, data, ranges, profiler)
+            return result
+
+        with timed(profiler, "extract"):
+            batch = self.extract(data)
+            known = tokenizer.vocabulary(batch.identifiers) if self.config.vocabulary != "none" else set()
+            result.vocabulary = sorted(known)
+
+        texts = list(self.select(batch, ranges, result.skipped, profiler))
+        checked = self.check_texts([text for text, *_ in texts], profiler, known)
+        for (text, line_no, end_line_no, idx), findings in zip(texts, checked):
+            for finding in findings:
+                finding.path, finding.line_no = path, line_no
+            if findings:
+                lines, first, start = batch.lines(idx)
+                Locator(lines, first).locate(findings, start)
+            result.texts.append(TextResult(text, line_no, end_line_no, findings))
+
+        return result
+
+    @staticmethod
+    def extract(data: bytes | mmap.mmap) -> SnippetBatch:
+        """Returns the comments and docstrings of the content of a python file
+
+        A memory-mapped file is scanned as it is, only the comments and docstrings are decoded,
+        unless its encoding isn't a superset of ASCII (e.g. UTF-16).
+        """
+        if isinstance(data, mmap.mmap):
+            data.seek(0)
+            encoding = detect_encoding(data.readline)
+            if is_ascii_compatible(encoding):
+                return extract_buffer(data, encoding)
+            return extract_batch(data[:].decode(encoding, errors="replace"))
+        return extract_batch(decode(data))
+
+    def _check_document(
+        self,
+        result: FileResult,
+        extractor: documents.Extractor,
+        data: bytes | mmap.mmap,
+        ranges: LineRanges | None,
+        profiler: Profiler | None,
+    ) -> None:
+        """Checks the paragraphs of a document (e.g. Markdown), see documents.py"""
+        with timed(profiler, "extract"):
+            paragraphs = [
+                p
+                for p in documents.paragraphs(extractor, documents.read_lines(data))
+                if ranges is None or in_ranges(ranges, p.line_no, p.end_line_no)
+            ]
+        texts = [Text(p.text) for p in paragraphs]
+        for text, paragraph, findings in zip(texts, paragraphs, self.check_texts(texts, profiler)):
+            for finding in findings:
+                finding.path, finding.line_no = result.path, paragraph.line_no
+            if findings:
+                Locator(paragraph.text, paragraph.line_no).locate(findings, 0)
+            result.texts.append(TextResult(text, paragraph.line_no, paragraph.end_line_no, findings))
+
+    def check_texts(
+        self, texts: list[Text], profiler: Profiler | None = None, known: Collection[str] = frozenset()
+    ) -> list[list[Finding]]:
+        """Returns the findings of each of the texts, the words of all of them corrected at once"""
+        if profiler is not None:
+            profiler.count("texts", len(texts))
+        checkers = [self.checker(text, profiler, known) for text in texts]
+        if not checkers:
+            return []
+        verbose = self.config.verbosity > 1
+        # any of the checkers will do, they only differ by their text
+        verdicts = checkers[0].check_many(itertools.chain.from_iterable(c.words for c in checkers), verbose)
+        return [checker.check(verbose, verdicts) for checker in checkers]
+
+    @staticmethod
+    def select(
+        batch: SnippetBatch,
+        ranges: LineRanges | None,
+        skipped: list[tuple[int, str]],
+        profiler: Profiler | None = None,
+    ) -> Iterator[tuple[Text, int | None, int | None, int]]:
+        """Yields (text, line_no, end_line_no, idx) of the texts to check, code goes to skipped
+
+        Comments come first, then docstrings. Texts are only sliced out of the source (and
+        docstrings evaluated) if they're within the ranges.
+        """
+        line_nos, end_line_nos = batch.line_nos, batch.end_line_nos
+        for idx in range(len(batch)):
+            line_no = line_nos[idx]
+            if not batch.is_comment(idx) or (ranges is not None and not in_ranges(ranges, line_no, line_no)):
+                continue
+            comment = clean_comment(batch.text(idx), strip_hash=True)
+            with timed(profiler, "is_code"):
+                is_code = classifier.is_code(comment)
+            if is_code:
+                if profiler is not None:
+                    profiler.count("comments.code")
+                skipped.append((line_no, comment))
+                continue
+            yield Text(comment), line_no, line_no, idx
+
+        for idx in range(len(batch)):
+            if batch.is_comment(idx):
+                continue
+            # Module docstrings have no line numbers
+            first, last = line_nos[idx] or None, end_line_nos[idx] or None
+            if ranges is not None and not in_ranges(ranges, first, last):
+                continue
+            docstring = batch.text(idx)
+            # an empty docstring is none, like ast.get_docstring() says
+            if docstring:
+                yield Text(docstring), first, last, idx
+
+    def checker(
+        self, text: Text, profiler: Profiler | None = None, known: Collection[str] = frozenset()
+    ) -> Checker:
+        """Returns the checker of a comment or docstring, known words aside"""
+        return Checker(
+            text,
+            lexicon=self.lexicon,
+            engine=self.engine,
+            suggestions=self.config.suggestions,
+            cache=self.cache,
+            profiler=profiler,
+            known=known,
+        )
+
+
+#: The context of a worker process, see init_worker()
+_context: Context | None = None
+
+
+def init_worker(config: Config) -> None:
+    """Load the lexicon, correction engine etc. once per worker process"""
+    global _context
+    _context = Context.from_config(config)
+
+
+def check_files(jobs: list["Job"]) -> list[FileResult]:
+    """Check files within a worker process, reading them ahead as in a single process, see prefetch()"""
+    assert _context is not None, "init_worker() wasn't called"
+    return [result for _, result in _check_serial(_context, iter(jobs))]
+
+
+@dataclass
+class Job:
+    """A file to check, along with what the result cache knows about it"""
+
+    path: Path
+    #: Line ranges to restrict the result to, see run()
+    ranges: LineRanges | None = None
+    stat: os.stat_result | None = None
+    #: Digest of the content of the file when it was cached
+    digest: str | None = None
+    #: The cached result of an unchanged file, nothing to check then
+    result: FileResult | None = None
+
+
+def run(
+    config: Config,
+    paths: Iterable[Path],
+    changes: dict[Path, LineRanges] | None = None,
+    profiler: Profiler | None = None,
+) -> Iterator[FileResult]:
+    """Yields the result of every path, in the same order as the given paths
+
+    Files which are gone when they're read (see MISSING) have no result, e.g. listed files which
+    were deleted: paths aren't looked up beforehand.
+
+    Paths are consumed lazily and every result is yielded as soon as it (and the ones before it)
+    are ready, only a bounded number of files are in flight at any time. Files are checked by
+    config.jobs worker processes, or within this process if it's 1. With a config.cache_dir,
+    files which didn't change since the previous run aren't checked again.
+
+    With changes i.e. line ranges by resolved path, results only contain comments and docstrings
+    within these lines. Such partial results are not cached.
+
+    With a profiler, what checking every file took is added up in it.
+    """
+    if profiler is not None and not config.profile:
+        config = replace(config, profile=True)
+
+    # Load (and build if needed) everything before forking, workers then inherit or reuse it.
+    # The correction engine is only loaded once it's needed, i.e. when there are files to check.
+    with timed(profiler, "load"):
+        context = Context.from_config(config)
+        if profiler is not None:
+            # otherwise the first correction would look slow
+            context.engine.load()
+    yield from check(context, paths, changes, profiler)
+
+
+def check(
+    context: Context,
+    paths: Iterable[Path],
+    changes: dict[Path, LineRanges] | None = None,
+    profiler: Profiler | None = None,
+) -> Iterator[FileResult]:
+    """Yields the result of every path, in order, with an already loaded context e.g. of the daemon
+
+    See run(), results are cached in context.config.cache_dir if it's set.
+    """
+    config = context.config
+    cache = ResultCache(config.cache_dir, context.fingerprint) if config.cache_dir else None
+
+    jobs = plan(paths, cache, changes)
+    for job, result in _check(context, jobs, profiler):
+        if result.missing:
+            continue
+        if profiler is not None:
+            if result.profile is not None:
+                profiler.merge(result.profile)
+            else:
+                profiler.count("files.cached")
+        yield _update(cache, job, result)
+
+    if cache is not None:
+        cache.save()
+
+
+def check_text(config: Config, path: Path, data: bytes, profiler: Profiler | None = None) -> FileResult:
+    """Returns the result of data checked as the content of path, which is never read (nor cached)
+
+    e.g. a buffer piped by an editor, its path tells its format (e.g. a .md suffix for Markdown).
+    """
+    if profiler is not None and not config.profile:
+        config = replace(config, profile=True)
+    with timed(profiler, "load"):
+        context = Context.from_config(config)
+    result = context.check_file(path, data=data)
+    if profiler is not None and result.profile is not None:
+        profiler.merge(result.profile)
+    return result
+
+
+def with_project_vocabulary(results: Iterable[FileResult]) -> Iterator[FileResult]:
+    """Yields the results without the findings of words of identifiers of any of the files
+
+    Vocabularies are merged once every result is in, results are held until then.
+    """
+    results = list(results)
+    known = {word for result in results for word in result.vocabulary}
+    for result in results:
+        yield result.without(known)
+
+
+def plan(
+    paths: Iterable[Path], cache: ResultCache | None, changes: dict[Path, LineRanges] | None
+) -> Iterator[Job]:
+    """Yields a job per path, with the cached result of the file if it didn't change"""
+    for path in paths:
+        job = Job(path, ranges=changes.get(path.resolve(), []) if changes is not None else None)
+        if cache is not None:
+            try:
+                job.stat = path.stat()
+            except FileNotFoundError:  # e.g. deleted since it was listed, see MISSING
+                continue
+            entry, job.digest = cache.lookup(path, job.stat)
+            if entry is not None:
+                result = FileResult.from_dict(entry)
+                job.result = result if job.ranges is None else result.restrict(job.ranges)
+        yield job
+
+
+def prefetch(
+    jobs: Iterator[Job],
+    read_ahead: int,
+    profiler: Profiler | None = None,
+    is_large: Callable[[int], bool] = lambda size: False,
+) -> Iterator[tuple[Job, bytes | None]]:
+    """Yields every job with the content of its file, or None if it's left to check_file() to read
+
+    Files are read by threads up to read_ahead files ahead of the yielded one, so that reading
+    (e.g. from a network file system) overlaps checking. Only waiting for a file counts as "read".
+    Large files (see Context.is_large()) aren't read, check_file() maps them.
+    """
+    if read_ahead <= 0:
+        for job in jobs:
+            yield job, None
+        return
+
+    window: deque[tuple[Job, Future[bytes | None] | None]] = deque()
+    with ThreadPoolExecutor(min(READ_THREADS, read_ahead), thread_name_prefix="spell-read") as executor:
+        for job in jobs:
+            window.append((job, executor.submit(read, job.path, is_large) if job.result is None else None))
+            if len(window) > read_ahead:
+                yield _read(window, profiler)
+        while window:
+            yield _read(window, profiler)
+
+
+def read(path: Path, is_large: Callable[[int], bool]) -> bytes | None:
+    """Returns the content of a file, or None if it's large enough to be memory-mapped instead
+
+    Also None if it's missing, for check_file() to fail on it in order.
+    """
+    try:
+        with open(path, "rb") as file:
+            return None if is_large(os.fstat(file.fileno()).st_size) else file.read()
+    except MISSING:
+        return None
+
+
+def _read(
+    window: deque[tuple[Job, Future[bytes | None] | None]], profiler: Profiler | None
+) -> tuple[Job, bytes | None]:
+    job, future = window.popleft()
+    if future is None:
+        return job, None
+    with timed(profiler, "read"):
+        return job, future.result()
+
+
+def _check(
+    context: Context, jobs: Iterator[Job], profiler: Profiler | None = None
+) -> Iterator[tuple[Job, FileResult]]:
+    """Yields every job with its (cached or new) result, in order"""
+    workers = context.config.jobs
+    if workers <= 1:
+        yield from _check_serial(context, jobs, profiler)
+        return
+
+    # Not worth starting worker processes unless there are at least 2 files to check. Until then,
+    # cached results are yielded as they come, those after the first file to check wait for it.
+    head: list[Job] = []
+    for job in jobs:
+        if job.result is None and head:
+            yield from _check_parallel(context, itertools.chain(head, [job], jobs))
+            return
+        if job.result is not None and not head:
+            yield job, job.result
+            continue
+        head.append(job)
+        if len(head) >= workers * WINDOW_PER_WORKER:
+            # still a single file to check, in this process rather than holding more results
+            yield from _check_serial(context, iter(head), profiler)
+            head = []
+    yield from _check_serial(context, iter(head), profiler)
+
+
+def _check_serial(
+    context: Context, jobs: Iterator[Job], profiler: Profiler | None = None
+) -> Iterator[tuple[Job, FileResult]]:
+    for job, data in prefetch(jobs, context.config.read_ahead, profiler, context.is_large):
+        if job.result is not None:
+            yield job, job.result
+            continue
+        try:
+            result = context.check_file(job.path, job.digest, job.ranges, data)
+        except MISSING:
+            result = FileResult(job.path, missing=True)
+        yield job, result
+
+
+def _check_parallel(context: Context, jobs: Iterator[Job]) -> Iterator[tuple[Job, FileResult]]:
+    # multiprocessing takes a while to import, only when it's needed
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = context.config.jobs
+    context.engine.load()
+
+    # Results must come out in order: keep a bounded window of tasks submitted ahead of the oldest
+    window: deque[tuple[list[Job], Future[list[FileResult]] | None]] = deque()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(context.config,)) as executor:
+        for chunk in iter(lambda: list(itertools.islice(jobs, FILES_PER_TASK)), []):
+            # only what workers need of the files to check
+            todo = [Job(job.path, job.ranges, digest=job.digest) for job in chunk if job.result is None]
+            window.append((chunk, executor.submit(check_files, todo) if todo else None))
+            if len(window) * FILES_PER_TASK >= workers * WINDOW_PER_WORKER:
+                yield from _pop(window)
+        while window:
+            yield from _pop(window)
+
+
+def _pop(
+    window: deque[tuple[list[Job], Future[list[FileResult]] | None]]
+) -> Iterator[tuple[Job, FileResult]]:
+    chunk, future = window.popleft()
+    results = iter(future.result() if future is not None else [])
+    for job in chunk:
+        yield job, job.result if job.result is not None else next(results)
+
+
+def _update(cache: ResultCache | None, job: Job, result: FileResult) -> FileResult:
+    """Returns the result of a job, updating the cache with it if it was checked"""
+    digest = result.digest
+    if cache is None or job.result is not None or job.stat is None or digest is None:
+        return result
+
+    if result.unchanged:
+        # Same content, only its stat changed (e.g. after a checkout)
+        entry = cache.get(job.path)
+        assert entry is not None
+        result = FileResult.from_dict(entry)
+        result = result if job.ranges is None else result.restrict(job.ranges)
+    if job.ranges is None:
+        cache.store(job.path, job.stat, digest, result.to_dict())
+    return result
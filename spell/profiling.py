@@ -0,0 +1,159 @@
+"""Instrumentation of a run: time spent in every stage, counters and the slowest files"""
+
+import cProfile
+import heapq
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, ContextManager, Iterable, Iterator, TextIO, TypeVar
+
+_T = TypeVar("_T")
+
+#: Stages in the order they happen to a file, for reports
+STAGES: tuple[str, ...] = ("load", "walk", "read", "extract", "is_code", "classify", "correct", "report")
+
+
+@dataclass
+class Timer:
+    """Time spent in a stage, over all its calls"""
+
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+
+
+class Profiler:
+    """Records wall and CPU time of stages, counters (e.g. cache hits), and the slowest files
+
+    Profilers of worker processes (or of single files) are merged into the one of the run with
+    merge(as_dict()), as_dict() is also what to ship to a metrics system.
+    """
+
+    def __init__(self, slowest: int = 10):
+        self.timers: dict[str, Timer] = {}
+        self.counters: Counter[str] = Counter()
+        self.slowest = slowest
+        #: Min-heap of (seconds, path) of the slowest files
+        self._files: list[tuple[float, str]] = []
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the body of the with statement as a call of the stage"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def iterate(self, stage: str, iterable: Iterable[_T]) -> Iterator[_T]:
+        """Yields the items of iterable, timing how long it takes to produce each as the stage"""
+        iterator = iter(iterable)
+        while True:
+            with self.timer(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add(self, stage: str, wall: float, cpu: float, calls: int = 1) -> None:
+        timer = self.timers.setdefault(stage, Timer())
+        timer.wall += wall
+        timer.cpu += cpu
+        timer.calls += calls
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def file(self, path: str, seconds: float) -> None:
+        """Record how long it took to check a file"""
+        if len(self._files) < self.slowest:
+            heapq.heappush(self._files, (seconds, path))
+        elif seconds > self._files[0][0]:
+            heapq.heapreplace(self._files, (seconds, path))
+
+    @property
+    def slowest_files(self) -> list[tuple[str, float]]:
+        """Returns (path, seconds) of the slowest files, the slowest first"""
+        return [(path, seconds) for seconds, path in sorted(self._files, reverse=True)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Returns everything recorded, JSON serializable"""
+        return {
+            "stages": {
+                stage: {"wall": timer.wall, "cpu": timer.cpu, "calls": timer.calls}
+                for stage, timer in self.timers.items()
+            },
+            "counters": dict(self.counters),
+            "slowest_files": [[path, seconds] for path, seconds in self.slowest_files],
+        }
+
+    def merge(self, data: dict[str, Any]) -> None:
+        """Add up what another profiler recorded, see as_dict()"""
+        for stage, timer in data["stages"].items():
+            self.add(stage, timer["wall"], timer["cpu"], timer["calls"])
+        self.counters.update(data["counters"])
+        for path, seconds in data["slowest_files"]:
+            self.file(path, seconds)
+
+    def format(self) -> str:
+        """Returns a human readable report"""
+        lines = [f"{'stage':<12}{'wall (s)':>12}{'cpu (s)':>12}{'calls':>12}"]
+        for stage in sorted(self.timers, key=lambda s: (STAGES + (s,)).index(s)):
+            timer = self.timers[stage]
+            lines.append(f"{stage:<12}{timer.wall:>12.3f}{timer.cpu:>12.3f}{timer.calls:>12}")
+
+        lines.append("")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<32}{value:>12}")
+        hits, misses = self.counters["word_cache.hits"], self.counters["word_cache.misses"]
+        if hits + misses:
+            lines.append(f"{'word_cache.hit_rate':<32}{hits / (hits + misses):>12.1%}")
+
+        if self._files:
+            lines += ["", "slowest files:"]
+            lines += [f"{seconds:>10.3f}s  {path}" for path, seconds in self.slowest_files]
+        return "\n".join(lines)
+
+
+def timed(profiler: Profiler | None, stage: str) -> ContextManager[None]:
+    """Returns profiler.timer(stage), or a context manager doing nothing without a profiler"""
+    return profiler.timer(stage) if profiler is not None else nullcontext()
+
+
+@contextmanager
+def cprofile(output: Path | None) -> Iterator[None]:
+    """Profile the body of the with statement (in this process) and dump the stats to output"""
+    if output is None:
+        yield
+        return
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(output)
+
+
+@contextmanager
+def trace_allocations(top: int, stream: TextIO) -> Iterator[None]:
+    """Write the top allocations (in this process) of the body of the with statement to stream"""
+    if top <= 0:
+        yield
+        return
+
+    tracemalloc.start()
+    try:
+        yield
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    stream.write(f"top {top} allocations:\n")
+    for stat in snapshot.statistics("lineno")[:top]:
+        stream.write(f"{stat}\n")
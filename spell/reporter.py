@@ -0,0 +1,147 @@
+"""Reporters writing the findings of checked files in a human or machine readable format"""
+
+import json
+from pathlib import Path
+from typing import Any, ClassVar, TextIO
+
+from spell.results import FileResult
+from spell.types import Finding
+
+SARIF_SCHEMA: str = "https://json.schemastore.org/sarif-2.1.0.json"
+RULE_ID: str = "spelling"
+
+
+def _position(finding: Finding) -> tuple[int, int]:
+    """Returns the 1-based line and column of a finding, (1, 1) if unknown"""
+    line = finding.line_no or 1
+    column = finding.col_offset + 1 if finding.col_offset is not None else 1
+    return line, column
+
+
+def format_finding(path: Path, finding: Finding) -> str:
+    """Returns the ``path:line:column: word -> suggestions`` line of a finding"""
+    line, column = _position(finding)
+    suggestions = ", ".join(word for word, _ in finding.suggestions)
+    return f"{path}:{line}:{column}: {finding.word} -> {suggestions}\n"
+
+
+class Reporter:
+    """Writes the results of checked files to a stream, one file at a time as they come
+
+    Every finding is written with a single call to the (buffered) stream.
+    """
+
+    name: ClassVar[str]
+
+    def __init__(self, stream: TextIO, verbosity: int = 0):
+        self.stream = stream
+        self.verbosity = verbosity
+        self.files = 0
+        self.findings = 0
+
+    def start(self) -> None:
+        """Writes what comes before any result"""
+
+    def report(self, result: FileResult) -> None:
+        """Writes the findings of a checked file"""
+        self.files += 1
+        self.findings += len(result.findings)
+
+    def finish(self) -> None:
+        """Writes what comes after all results"""
+
+
+class HumanReporter(Reporter):
+    """One ``path:line:column: word -> suggestions`` line per finding"""
+
+    name = "human"
+
+    def report(self, result: FileResult) -> None:
+        super().report(result)
+        write = self.stream.write
+
+        if self.verbosity:
+            for line_no, skipped in result.skipped:
+                write(f"{result.path}:{line_no}: code found, skipping {skipped}\n")
+
+        for text in result.texts:
+            if self.verbosity:
+                write(f"{result.path}:{text.line_no or 1}: {text.text}\n")
+            for finding in text.findings:
+                write(format_finding(result.path, finding))
+
+    def finish(self) -> None:
+        if self.findings or self.verbosity:
+            self.stream.write(f"{self.findings} misspelled word(s) in {self.files} file(s)\n")
+
+
+class JsonLinesReporter(Reporter):
+    """One JSON object per finding"""
+
+    name = "jsonl"
+
+    def report(self, result: FileResult) -> None:
+        super().report(result)
+        for finding in result.findings:
+            line, column = _position(finding)
+            record = {
+                "path": str(result.path),
+                "line": line,
+                "column": column,
+                "word": finding.word,
+                "suggestions": [
+                    {"word": word, "confidence": confidence} for word, confidence in finding.suggestions
+                ],
+            }
+            self.stream.write(json.dumps(record) + "\n")
+
+
+class SarifReporter(Reporter):
+    """A SARIF 2.1.0 log with a result per finding, written as results come"""
+
+    name = "sarif"
+
+    def start(self) -> None:
+        driver = {
+            "name": "spell-checker",
+            "rules": [{"id": RULE_ID, "shortDescription": {"text": "Misspelled word"}}],
+        }
+        header = json.dumps(
+            {"$schema": SARIF_SCHEMA, "version": "2.1.0", "runs": [{"tool": {"driver": driver}}]}
+        )
+        # leave the run open, results are added to it one by one
+        self.stream.write(header[: -len("}]}")] + ', "results": [')
+
+    def report(self, result: FileResult) -> None:
+        super().report(result)
+        first = self.findings == len(result.findings)
+        for finding in result.findings:
+            self.stream.write(("\n" if first else ",\n") + json.dumps(self.result(result.path, finding)))
+            first = False
+
+    def finish(self) -> None:
+        self.stream.write("\n]}]}\n")
+
+    @staticmethod
+    def result(path: Path, finding: Finding) -> dict[str, Any]:
+        """Returns the SARIF result of a finding"""
+        line, column = _position(finding)
+        region: dict[str, Any] = {"startLine": line}
+        if finding.col_offset is not None:
+            region.update(startColumn=column, endColumn=column + len(finding.word))
+        suggestions = ", ".join(f"'{word}'" for word, _ in finding.suggestions)
+        return {
+            "ruleId": RULE_ID,
+            "level": "warning",
+            "message": {"text": f"'{finding.word}' may be misspelled, did you mean {suggestions}?"},
+            "locations": [
+                {"physicalLocation": {"artifactLocation": {"uri": path.as_posix()}, "region": region}}
+            ],
+        }
+
+
+REPORTERS: dict[str, type[Reporter]] = {
+    HumanReporter.name: HumanReporter,
+    JsonLinesReporter.name: JsonLinesReporter,
+    SarifReporter.name: SarifReporter,
+}
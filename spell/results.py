@@ -0,0 +1,102 @@
+"""Results of checked files, serializable to be cached or sent between processes"""
+
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Collection
+
+from spell.git import LineRanges, overlaps
+from spell.types import Finding, Text
+
+
+@dataclass
+class TextResult:
+    """A checked comment or docstring"""
+
+    text: Text
+    line_no: int | None
+    end_line_no: int | None
+    findings: list[Finding]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "text": str(self.text),
+            "line_no": self.line_no,
+            "end_line_no": self.end_line_no,
+            "findings": [f.to_dict() for f in self.findings],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TextResult":
+        return cls(
+            text=Text(data["text"]),
+            line_no=data["line_no"],
+            end_line_no=data["end_line_no"],
+            findings=[Finding.from_dict(f) for f in data["findings"]],
+        )
+
+
+def in_ranges(ranges: LineRanges, line_no: int | None, end_line_no: int | None) -> bool:
+    # Module docstrings have no line number, they start at the top
+    first = line_no or 1
+    return overlaps(ranges, first, end_line_no or first)
+
+
+@dataclass
+class FileResult:
+    """The outcome of checking a single file"""
+
+    path: Path
+    #: Commented lines (line number, text) skipped because they're code
+    skipped: list[tuple[int, str]] = field(default_factory=list)
+    #: Every checked text with the findings in it
+    texts: list[TextResult] = field(default_factory=list)
+    #: Digest of the content of the file
+    digest: str | None = None
+    #: True if the file didn't change since it was cached, hence it wasn't checked
+    unchanged: bool = False
+    #: True if the file couldn't be read because it's gone (e.g. deleted since it was listed)
+    missing: bool = False
+    #: What checking the file took (see Profiler.as_dict()) with config.profile
+    profile: dict[str, Any] | None = field(default=None, compare=False)
+    #: Words of the identifiers of the file (see tokenizer.vocabulary()), sorted
+    vocabulary: list[str] = field(default_factory=list)
+
+    @property
+    def findings(self) -> list[Finding]:
+        return [f for text in self.texts for f in text.findings]
+
+    def restrict(self, ranges: LineRanges) -> "FileResult":
+        """Returns the result limited to the texts within the given line ranges"""
+        skipped = [(line_no, text) for line_no, text in self.skipped if in_ranges(ranges, line_no, line_no)]
+        texts = [t for t in self.texts if in_ranges(ranges, t.line_no, t.end_line_no)]
+        return FileResult(
+            self.path, skipped=skipped, texts=texts, digest=self.digest, vocabulary=self.vocabulary
+        )
+
+    def without(self, words: Collection[str]) -> "FileResult":
+        """Returns the result without the findings of the given words"""
+        texts = [
+            TextResult(t.text, t.line_no, t.end_line_no, [f for f in t.findings if f.word not in words])
+            for t in self.texts
+        ]
+        return replace(self, texts=texts)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns a JSON serializable representation"""
+        return {
+            "path": str(self.path),
+            "skipped": self.skipped,
+            "texts": [t.to_dict() for t in self.texts],
+            "digest": self.digest,
+            "vocabulary": self.vocabulary,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "FileResult":
+        return cls(
+            path=Path(data["path"]),
+            skipped=[(line_no, text) for line_no, text in data["skipped"]],
+            texts=[TextResult.from_dict(t) for t in data["texts"]],
+            digest=data["digest"],
+            vocabulary=data["vocabulary"],
+        )
@@ -0,0 +1,188 @@
+"""Splits the files to check over several machines (e.g. CI nodes), and merges their partial results
+
+``spell --shard i/N`` checks the i-th of N shards of the walked files, and writes a partial result
+rather than a report. Every shard walks the same files and assigns them the same way: the largest
+first, each to the least loaded shard (ties broken by a stable hash of the path), so that shards
+take about as long. ``spell merge`` then reports the results of all the shards, in the order a
+single run would have, and exits accordingly. A partial result is JSON, one object per line::
+
+    {"shard": 1, "shards": 4, "files": 1234, "vocabulary": "file"}
+    {"index": 7, "result": {...}}          one per file of the shard (see FileResult.to_dict())
+    {"index": 9, "missing": true}          or for a file which is gone (see pipeline.MISSING)
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence, TextIO
+
+from spell import pipeline
+from spell.reporter import REPORTERS
+from spell.results import FileResult
+
+#: What checking a file costs besides its content, in bytes of content
+FILE_COST: int = 4096
+
+
+class MergeError(Exception):
+    """Raised when partial results are missing, duplicated or don't belong together"""
+
+
+def parse_spec(spec: str) -> tuple[int, int]:
+    """Returns the (index, count) of a shard given as "i/N", with 1 <= i <= N"""
+    index, sep, count = spec.partition("/")
+    try:
+        shard = int(index), int(count)
+    except ValueError:
+        shard = (0, 0)
+    if not sep or not 1 <= shard[0] <= shard[1]:
+        raise ArgumentTypeError(f"invalid shard {spec!r}, expected i/N with 1 <= i <= N")
+    return shard
+
+
+def _key(path: Path) -> bytes:
+    return hashlib.sha1(path.as_posix().encode(), usedforsecurity=False).digest()
+
+
+def _weight(path: Path) -> int:
+    try:
+        size = os.stat(path).st_size
+    except OSError:  # reported by the shard checking it
+        size = 0
+    return FILE_COST + size
+
+
+def assign(paths: Sequence[Path], count: int) -> list[int]:
+    """Returns the shard (0-based) of every path, the same given the same paths and file sizes"""
+    weights = [_weight(path) for path in paths]
+    order = sorted(range(len(paths)), key=lambda idx: (-weights[idx], _key(paths[idx])))
+    loads = [(0, shard) for shard in range(count)]
+    shards = [0] * len(paths)
+    for idx in order:
+        load, shard = heapq.heappop(loads)
+        shards[idx] = shard
+        heapq.heappush(loads, (load + weights[idx], shard))
+    return shards
+
+
+def select(paths: Iterable[Path], index: int, count: int) -> tuple[list[int], list[Path], int]:
+    """Returns the indices and paths of the index-th (1-based) of count shards, and the number of paths
+
+    Unlike a single run, all the paths are walked before the first one is checked.
+    """
+    paths = list(paths)
+    selected = [idx for idx, shard in enumerate(assign(paths, count)) if shard == index - 1]
+    return selected, [paths[idx] for idx in selected], len(paths)
+
+
+def write(
+    stream: TextIO,
+    shard: tuple[int, int],
+    files: int,
+    vocabulary: str,
+    indices: Sequence[int],
+    paths: Sequence[Path],
+    results: Iterable[FileResult],
+) -> None:
+    """Writes the partial result of a shard i.e. of the paths at indices, one file at a time
+
+    Results come in the order of the paths, without those of missing files.
+    """
+    index, count = shard
+    header = {"shard": index, "shards": count, "files": files, "vocabulary": vocabulary}
+    stream.write(json.dumps(header) + "\n")
+    results = iter(results)
+    result = next(results, None)
+    for idx, path in zip(indices, paths):
+        if result is not None and result.path == path:
+            record: dict[str, Any] = {"index": idx, "result": result.to_dict()}
+            result = next(results, None)
+        else:
+            record = {"index": idx, "missing": True}
+        stream.write(json.dumps(record) + "\n")
+
+
+def read(path: Path) -> tuple[dict[str, Any], dict[int, FileResult | None]]:
+    """Returns the header and results (by index, None for a missing file) of a partial result"""
+    with path.open(encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+            results: dict[int, FileResult | None] = {}
+            for line in f:
+                record = json.loads(line)
+                missing = record.get("missing", False)
+                results[record["index"]] = None if missing else FileResult.from_dict(record["result"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise MergeError(f"{path}: not a partial result ({e})") from e
+    if not isinstance(header, dict) or not {"shard", "shards", "files", "vocabulary"} <= header.keys():
+        raise MergeError(f"{path}: not a partial result")
+    return header, results
+
+
+def merge(paths: Sequence[Path]) -> tuple[str, Iterator[FileResult]]:
+    """Returns the vocabulary mode and the results of all the shards, in the order of a single run"""
+    headers, results = [], {}
+    for path in paths:
+        header, partial = read(path)
+        headers.append(header)
+        results.update(partial)
+
+    first = headers[0]
+    shards = sorted(h["shard"] for h in headers)
+    if any(
+        (h["shards"], h["files"], h["vocabulary"]) != (first["shards"], first["files"], first["vocabulary"])
+        for h in headers
+    ):
+        raise MergeError("partial results of different runs")
+    if shards != list(range(1, first["shards"] + 1)):
+        raise MergeError(f"expected shards 1 to {first['shards']}, got {', '.join(map(str, shards))}")
+    if len(results) != first["files"]:
+        raise MergeError(f"expected {first['files']} files, got {len(results)}")
+    return first["vocabulary"], (
+        result for result in (results[idx] for idx in range(first["files"])) if result is not None
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entrypoint of ``spell merge``"""
+    parser = ArgumentParser(
+        prog="spell merge", description="Report the partial results of 'spell --shard i/N' as a single run"
+    )
+    parser.add_argument("partials", nargs="+", type=Path, help="Partial results, one per shard")
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        dest="verbosity",
+        action="count",
+        default=0,
+        help="Verbosity (between 1-2 occurrences with more leading to more verbose logging).",
+    )
+    parser.add_argument(
+        "-f", "--format", choices=sorted(REPORTERS), default="human", help="Format of the findings"
+    )
+    parser.add_argument("-o", "--output", type=Path, help="File to write findings to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        vocabulary, results = merge(args.partials)
+    except (OSError, MergeError) as e:
+        print(f"spell merge: {e}", file=sys.stderr)
+        return 2
+    if vocabulary == "project":
+        results = pipeline.with_project_vocabulary(results)
+
+    with ExitStack() as stack:
+        stream = sys.stdout
+        if args.output:
+            stream = stack.enter_context(args.output.open("w", encoding="utf-8"))
+        reporter = REPORTERS[args.format](stream, args.verbosity)
+        reporter.start()
+        for result in results:
+            reporter.report(result)
+        reporter.finish()
+    return 1 if reporter.findings else 0
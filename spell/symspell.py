@@ -0,0 +1,221 @@
+"""A symmetric delete (SymSpell) spelling correction index
+
+Instead of generating every edit of a misspelled word at lookup time (Norvig), all deletes of the
+dictionary words are precomputed once. A lookup then only generates the deletes of the input word
+and verifies the few dictionary words sharing one of them with a real edit distance.
+
+Suggestions are ranked the same way ``textblob.Word.spellcheck()`` ranks them: the closest
+candidates first, then by frequency, with a confidence relative to the other candidates.
+"""
+
+import hashlib
+import importlib.util
+import os
+import pickle
+import string
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+from spell.config import default_cache_dir
+
+if TYPE_CHECKING:
+    from spell.vectorized import Dictionary
+
+#: Bump whenever the layout of the pickled index changes
+VERSION: int = 1
+MAX_DISTANCE: int = 2
+PREFIX_LENGTH: int = 7
+#: Below as many (word, candidate) pairs, closest_many() looks words up one at a time
+MIN_VECTORIZED_PAIRS: int = 1024
+
+
+def frequency_dictionary() -> Path:
+    """Returns the path of the word frequency list shipped with TextBlob"""
+    spec = importlib.util.find_spec("textblob")
+    if spec is None or not spec.submodule_search_locations:
+        raise FileNotFoundError("TextBlob is not installed, a frequency dictionary has to be given")
+    return Path(next(iter(spec.submodule_search_locations))) / "en" / "en-spelling.txt"
+
+
+def read_frequencies(path: Path) -> dict[str, int]:
+    """Returns word -> count of a frequency list (``<word> <count>`` per line, ``;;;`` comments)"""
+    frequencies: dict[str, int] = {}
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith(";;;"):
+                continue
+            word, count = line.split()[:2]
+            frequencies[word] = int(count)
+    return frequencies
+
+
+def edits(word: str, max_distance: int) -> set[str]:
+    """Returns all strings reachable from word by deleting up to max_distance characters"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1 :] for w in frontier for i in range(len(w))} - result
+        result |= frontier
+    return result
+
+
+def distance(a: str, b: str, max_distance: int) -> int:
+    """Returns the optimal string alignment distance of a and b, or max_distance + 1 if it's larger"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    # Typos usually share most characters, only align the part in between
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return min(len(a) + len(b), max_distance + 1)
+
+    prev2: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return min(prev[len(b)], max_distance + 1)
+
+
+class SymSpell:
+    """A precomputed symmetric delete index over a word frequency list"""
+
+    def __init__(
+        self,
+        frequencies: dict[str, int],
+        max_distance: int = MAX_DISTANCE,
+        prefix_length: int = PREFIX_LENGTH,
+    ):
+        self.frequencies = frequencies
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.deletes: dict[str, list[str]] = {}
+
+        for word in frequencies:
+            for delete in edits(word[:prefix_length], max_distance):
+                self.deletes.setdefault(delete, []).append(word)
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("encoded", None)  # built again when needed, NumPy may not be installed then
+        return state
+
+    @cached_property
+    def encoded(self) -> "Dictionary | None":
+        """The dictionary encoded for closest_many(), None if NumPy isn't installed"""
+        try:
+            from spell.vectorized import Dictionary
+        except ImportError:
+            return None
+        return Dictionary(list(self.frequencies))
+
+    @classmethod
+    def load(cls, path: Path | None = None, cache_dir: Path | None = None) -> "SymSpell":
+        """Returns the index of a frequency list, built once and then cached on disk"""
+        path = path or frequency_dictionary()
+        stat = path.stat()
+        key = "\0".join(
+            map(str, (VERSION, MAX_DISTANCE, PREFIX_LENGTH, path.resolve(), stat.st_size, stat.st_mtime_ns))
+        )
+        digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+        cache = (cache_dir or default_cache_dir()) / f"symspell-{digest}"
+
+        try:
+            with cache.open("rb") as f:
+                cached = pickle.load(f)  # nosec: written by us, see below
+            if isinstance(cached, cls):
+                return cached
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            pass
+
+        index = cls(read_frequencies(path))
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)
+        return index
+
+    def candidates(self, word: str) -> list[str]:
+        """Returns the dictionary words sharing a delete with the given word, i.e. which may be close"""
+        deletes = self.deletes
+        return list(
+            set().union(*(deletes.get(d, ()) for d in edits(word[: self.prefix_length], self.max_distance)))
+        )
+
+    def closest(self, word: str, candidates: list[str] | None = None) -> list[str]:
+        """Returns the dictionary words closest to the given (unknown) word within max_distance"""
+        best: list[str] = []
+        best_distance = self.max_distance
+        for suggestion in self.candidates(word) if candidates is None else candidates:
+            # anything farther than the best candidate so far doesn't matter anymore
+            d = distance(word, suggestion, best_distance)
+            if d > best_distance:
+                continue
+            if d < best_distance or not best:
+                best, best_distance = [suggestion], d
+            else:
+                best.append(suggestion)
+        return best
+
+    def is_known(self, word: str) -> bool:
+        """Returns True if a word is its own correction e.g. a dictionary word, a letter or a number"""
+        if len(word) == 1 or word in string.punctuation or word in string.whitespace:
+            return True
+        return word.replace(".", "").isdigit() or word in self.frequencies
+
+    def lookup(self, word: str, limit: int | None = None) -> list[tuple[str, float]]:
+        """Returns a list of (word, confidence) corrections, the most likely first"""
+        if len(word) == 1 or word in string.punctuation or word in string.whitespace:
+            return [(word, 1.0)]
+        if word.replace(".", "").isdigit():
+            return [(word, 1.0)]
+        if word in self.frequencies:
+            return self.rank(word, [word], limit)
+        return self.rank(word, self.closest(word) or [word], limit)
+
+    def closest_many(self, words: list[str]) -> list[list[str]]:
+        """Returns what closest() does for each of the words, computing all the distances at once
+
+        Without NumPy, or for a few candidates when encoding them wouldn't pay off, words are
+        looked up one at a time instead.
+        """
+        candidates = [self.candidates(word) for word in words]
+        if sum(map(len, candidates)) < MIN_VECTORIZED_PAIRS or self.encoded is None:
+            return [self.closest(word, c) for word, c in zip(words, candidates)]
+        return self.encoded.closest(words, candidates, self.max_distance)
+
+    def lookup_many(
+        self, words: Iterable[str], limit: int | None = None
+    ) -> dict[str, list[tuple[str, float]]]:
+        """Returns the corrections of each of the (distinct) words, as lookup() does"""
+        words = list(dict.fromkeys(words))
+        corrections = {word: self.lookup(word, limit) for word in words if self.is_known(word)}
+        unknown = [word for word in words if word not in corrections]
+        for word, closest in zip(unknown, self.closest_many(unknown)):
+            corrections[word] = self.rank(word, closest or [word], limit)
+        return {word: corrections[word] for word in words}
+
+    def rank(self, word: str, candidates: list[str], limit: int | None = None) -> list[tuple[str, float]]:
+        """Returns the candidates as (word, confidence), the most frequent first, cased as word is"""
+        counts = [(self.frequencies.get(c, 0), c) for c in candidates]
+        total = float(sum(count for count, _ in counts) or 1)
+        ranked = sorted(((count / total, c) for count, c in counts), reverse=True)[:limit]
+        if word.istitle():
+            return [(c.title(), p) for p, c in ranked]
+        return [(c, p) for p, c in ranked]
@@ -0,0 +1,98 @@
+"""Splits comments and docstrings into words in a single pass, keeping where every word is
+
+Words are (start, end) spans over the text rather than copies of it. Besides plain words, a token
+can be a function reference (``foo()``, ``os.path.join()``), a file extension (``.py``) or one of
+the dotted abbreviations of ``assets/latin_abbrev`` (``e.g.``), which the checker then skips.
+"""
+
+import re
+import string
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
+
+from spell.lexicon import LATIN_ABBREV_PATH, read_words
+
+#: Letters and digits, underscores and apostrophes split words as they do in frequency dictionaries,
+#: unless the word is a function reference e.g. foo(), snake_case() or os.path.join()
+WORD: str = r"[^\W_]+(?:[\w.]*\(\))?"
+#: A file extension e.g. .py, not the dots of an ellipsis or of a dotted name
+EXTENSION: str = r"\.(?<![\w.]\.)[^\W_]+"
+#: Punctuation which is never part of a token, see words()
+SEPARATORS: str = "".join(c for c in string.punctuation if c not in "._()")
+#: What a token can't start with: it starts with a letter, a digit or the dot of an extension
+LEADING: str = SEPARATORS + "()"
+#: What a token can't end with: it ends with a letter, a digit, the ")" of a function reference or
+#: the dot of an abbreviation, told apart by words()
+TRAILING: str = SEPARATORS + "(."
+#: Words of a camelCase (or PascalCase) identifier, acronyms included e.g. HTTP of HTTPResponse
+CAMEL_CASE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def compile_pattern(abbreviations: Iterable[str]) -> re.Pattern[str]:
+    """Returns the pattern of tokens, with the given abbreviations (e.g. "e.g.") kept whole"""
+    # Literal alternatives rather than re.IGNORECASE, which slows down matching every character.
+    # The longest first since alternatives are tried in order. No lookbehind is needed: a search
+    # only starts where the previous token (or a run of non-word characters) ends.
+    variants = {v for a in abbreviations for v in (a.lower(), a.capitalize(), a.upper())}
+    alternatives = "|".join(re.escape(v) for v in sorted(variants, key=lambda v: (-len(v), v)))
+    abbreviation = rf"(?:{alternatives})(?![^\W_])|" if alternatives else ""
+    return re.compile(f"{abbreviation}{WORD}|{EXTENSION}")
+
+
+@lru_cache(maxsize=None)
+def default_pattern() -> re.Pattern[str]:
+    return compile_pattern(read_words(LATIN_ABBREV_PATH))
+
+
+@lru_cache(maxsize=None)
+def _default_words() -> tuple[Callable[[str], list[str]], frozenset[str]]:
+    """Returns the findall() of the default pattern, and its abbreviations without the last dot (etc)"""
+    stems = frozenset(a.lower().rstrip(".") for a in read_words(LATIN_ABBREV_PATH))
+    return default_pattern().findall, stems
+
+
+def spans(text: str, pattern: re.Pattern[str] | None = None, start: int = 0) -> Iterator[tuple[int, int]]:
+    """Yields the (start, end) of every token of text from start, in order"""
+    return map(re.Match.span, (pattern or default_pattern()).finditer(text, start))
+
+
+def words(text: str, pattern: re.Pattern[str] | None = None) -> list[str]:
+    """Returns the lower-cased tokens of text, i.e. text[start:end].lower() of its spans"""
+    # Tokens never span whitespace, so the text is split first and the pattern is only searched in
+    # the chunks which aren't a word once the punctuation around it is stripped, e.g. "(etc.)".
+    stems: frozenset[str] | None = None
+    if pattern is None:
+        findall, stems = _default_words()
+    else:
+        findall = pattern.findall
+    tokens: list[str] = []
+    append, extend, leading, trailing = tokens.append, tokens.extend, LEADING, TRAILING
+    for chunk in text.lower().split():
+        if not chunk.isalnum():  # i.e. [^\W_]+
+            core = chunk.lstrip(leading).rstrip(trailing)
+            if not core:
+                continue
+            if stems is None or core in stems or not core.isalnum():
+                extend(findall(chunk))
+                continue
+            chunk = core
+        append(chunk)
+    return tokens
+
+
+def vocabulary(identifiers: Iterable[str]) -> set[str]:
+    """Returns the lower-cased identifiers, along with their snake_case and camelCase parts
+
+    e.g. "parse_HTTPResponse" gives "parse_httpresponse", "parse", "httpresponse", "http" and
+    "response", i.e. what the tokens of a reference to the identifier in prose could be.
+    """
+    words: set[str] = set()
+    for identifier in identifiers:
+        words.add(identifier.lower())
+        for part in identifier.split("_"):
+            if not part:
+                continue
+            words.add(part.lower())
+            if not part.islower():
+                words.update(p.lower() for p in CAMEL_CASE.findall(part))
+    return words
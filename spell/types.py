@@ -1,23 +1,67 @@
 import string
 from dataclasses import dataclass
 from enum import Enum
-from typing import NewType, Protocol
+from pathlib import Path
+from typing import Any, NewType, Protocol
 
 Comment = NewType("Comment", str)
 Docstring = NewType("Docstring", str)
 
+#: Maps every punctuation character to a space, see Text.remove_symbols()
+PUNCTUATION = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
 
-@dataclass
 class Text(str):
+    """A comment or docstring, a str without any attribute besides"""
+
+    __slots__ = ()
+
+    @property
+    def text(self) -> str:
+        return str(self)
 
-    text: str
+    def __repr__(self) -> str:
+        return f"Text(text={str(self)!r})"
 
     def remove_symbols(self) -> "Text":
         """Remove punctuations from the given text"""
-        s = self.text
-        for char in string.punctuation:
-            s = s.replace(char, " ")
-        return Text(s)
+        return Text(self.translate(PUNCTUATION))
+
+
+@dataclass
+class Finding:
+    """A (probably) misspelled word and its suggested corrections"""
+
+    word: str
+    suggestions: list[tuple[str, float]]
+    path: Path | None = None
+    line_no: int | None = None
+    col_offset: int | None = None
+
+    @property
+    def spelling(self) -> str:
+        """Returns the most likely correction"""
+        return self.suggestions[0][0]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns a JSON serializable representation"""
+        return {
+            "word": self.word,
+            "suggestions": [list(s) for s in self.suggestions],
+            "path": str(self.path) if self.path else None,
+            "line_no": self.line_no,
+            "col_offset": self.col_offset,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Finding":
+        return cls(
+            word=data["word"],
+            suggestions=[(word, confidence) for word, confidence in data["suggestions"]],
+            path=Path(data["path"]) if data["path"] else None,
+            line_no=data["line_no"],
+            col_offset=data["col_offset"],
+        )
 
 
 class Ignore(Enum):
@@ -0,0 +1,122 @@
+"""Optimal string alignment distances of many words to their candidates at once, with NumPy
+
+The dictionary is encoded once as a matrix of code points (uint32), a row per word padded with
+zeros. The (word, candidate) pairs are then bucketed by the length of the word, and the dynamic
+programming table of all the pairs of a bucket is filled one row at a time: deletions, substitutions
+and transpositions only depend on previous rows, insertions are a running minimum along the row.
+
+Requires NumPy (``pip install spell-checker[numpy]``), see ``SymSpell.closest_many()``.
+"""
+
+from itertools import chain
+from typing import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+
+def encode(strings: Sequence[str], width: int) -> npt.NDArray[np.uint32]:
+    """Returns the code points of strings, as a (len(strings), width) matrix padded with zeros"""
+    data = "".join(s.ljust(width, "\0") for s in strings).encode("utf-32-le")
+    return np.frombuffer(data, dtype=np.uint32).reshape(len(strings), width)
+
+
+class Dictionary:
+    """The words of a dictionary, encoded to compute their distances to other words"""
+
+    def __init__(self, words: Sequence[str]):
+        self.words = list(words)
+        self.ids = {word: idx for idx, word in enumerate(self.words)}
+        self.lengths = np.fromiter(map(len, self.words), dtype=np.int64, count=len(self.words))
+        self.codes = encode(self.words, int(self.lengths.max(initial=0)))
+
+    def closest(
+        self, words: Sequence[str], candidates: Sequence[Sequence[str]], max_distance: int
+    ) -> list[list[str]]:
+        """Returns, for every word, its closest candidates within max_distance, in order
+
+        That is what SymSpell.closest() returns for each word, given the same candidates.
+        """
+        counts = np.fromiter(map(len, candidates), dtype=np.int64, count=len(candidates))
+        ids = np.fromiter(
+            map(self.ids.__getitem__, chain.from_iterable(candidates)),
+            dtype=np.int64,
+            count=int(counts.sum()),
+        )
+        owners = np.repeat(np.arange(len(words)), counts)
+        lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+        d = self.distances(words, lengths, owners, ids, max_distance)
+
+        # The best distance of each word, and the candidates at that distance
+        best = np.full(len(words), max_distance + 1, dtype=d.dtype)
+        some = counts > 0
+        best[some] = np.minimum.reduceat(d, (np.cumsum(counts) - counts)[some])
+        selected = np.flatnonzero((d == best[owners]) & (d <= max_distance))
+        closest: list[list[str]] = [[] for _ in words]
+        for owner, idx in zip(owners[selected].tolist(), ids[selected].tolist()):
+            closest[owner].append(self.words[idx])
+        return closest
+
+    def distances(
+        self,
+        words: Sequence[str],
+        lengths: npt.NDArray[np.int64],
+        owners: npt.NDArray[np.int64],
+        ids: npt.NDArray[np.int64],
+        max_distance: int,
+    ) -> npt.NDArray[np.int16]:
+        """Returns the distance of every (words[owner], dictionary word of id) pair, capped
+
+        Distances larger than max_distance are max_distance + 1, as symspell.distance() returns.
+        """
+        cap = max_distance + 1
+        result = np.full(len(ids), cap, dtype=np.int16)
+        candidate_lengths = self.lengths[ids]
+        close = np.abs(lengths[owners] - candidate_lengths) <= max_distance
+        for length in np.unique(lengths).tolist():
+            pairs = np.flatnonzero(close & (lengths[owners] == length))
+            if not len(pairs):
+                continue
+            bucket = [idx for idx, word in enumerate(words) if len(word) == length]
+            rows = np.searchsorted(bucket, owners[pairs])
+            a = encode([words[idx] for idx in bucket], length)[rows]
+            b = self.codes[ids[pairs], : min(length + max_distance, self.codes.shape[1])]
+            result[pairs] = _distances(a, b, candidate_lengths[pairs], cap)
+        return result
+
+
+def _distances(
+    a: npt.NDArray[np.uint32], b: npt.NDArray[np.uint32], b_lengths: npt.NDArray[np.int64], cap: int
+) -> npt.NDArray[np.int16]:
+    """Returns the capped distances of the rows of a, all of the same length, to those of b"""
+    count, len_a = a.shape
+    width = b.shape[1]
+    columns = np.arange(width + 1, dtype=np.int16)
+    result = np.full(count, cap, dtype=np.int16)
+    alive = np.arange(count)
+    prev2 = np.zeros((count, width + 1), dtype=np.int16)
+    prev = np.broadcast_to(np.minimum(columns, cap), (count, width + 1))
+    for i in range(1, len_a + 1):
+        a_i = a[:, i - 1 : i]
+        cur = np.empty_like(prev)
+        cur[:, 0] = i
+        # deletion or substitution (or a match)
+        np.minimum(prev[:, 1:] + 1, prev[:, :-1] + (a_i != b), out=cur[:, 1:])
+        if i > 1 and width > 1:
+            # a transposition costs 1 where the last two characters are swapped, cap otherwise
+            swapped = (a_i == b[:, :-1]) & (a[:, i - 2 : i - 1] == b[:, 1:])
+            np.minimum(cur[:, 2:], prev2[:, :-2] + np.where(swapped, 1, cap), out=cur[:, 2:])
+        # insertion: cur[j] = min(cur[k] + j - k) over k <= j
+        cur = np.minimum(np.minimum.accumulate(cur - columns, axis=1) + columns, cap)
+
+        # Early cutoff: a row beyond max_distance can only lead to a distance beyond it. The padding
+        # of b may keep a pair a few more rows, it never changes its distance.
+        within = cur.min(axis=1) < cap
+        if np.count_nonzero(within) < len(within) * 3 // 4:
+            alive, a, b, cur, prev = alive[within], a[within], b[within], cur[within], prev[within]
+            b_lengths = b_lengths[within]
+            if not len(alive):
+                return result
+        prev2, prev = prev, cur
+    result[alive] = prev[np.arange(len(alive)), b_lengths]
+    return result
@@ -1,27 +1,257 @@
 """A walker to retrieve necessary files path"""
 
+import os
+import re
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Generator
+from typing import BinaryIO, Generator, Iterable, Iterator
 
 from spell.config import Config
 
+#: Directories which never contain anything worth checking
+DEFAULT_EXCLUDES: tuple[str, ...] = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    ".venv/",
+    "venv/",
+    ".tox/",
+    ".nox/",
+    "node_modules/",
+    "__pycache__/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    "*.egg-info/",
+)
+#: Python files and documents, see documents.FORMATS for the other supported extensions e.g. .txt
+DEFAULT_EXTENSIONS: tuple[str, ...] = (".py", ".md", ".rst")
+GITIGNORE: str = ".gitignore"
+#: Bytes read at once from a list of files, see read_paths()
+READ_SIZE: int = 2**16
 
-def find_paths(paths: list[Path]) -> Generator[Path, None, None]:
-    """Yields path recursively"""
 
-    for path in paths:
-        # print(f"path: {path} | parent: {path.parent}")
-        # Fixme: Can use Path.rglob() to find .py file
-        # Filter out dot files and cache directories for optimization
-        if path.is_file() and path.suffix == ".py":
-            yield path
-        elif path.is_dir():
-            for p in path.iterdir():
-                yield from find_paths([p])
+def translate(pattern: str) -> str:
+    """Returns a regex of a (gitignore style) glob pattern matched against relative posix paths"""
+    # A pattern without an inner slash matches at any depth, with one it's relative to its base
+    anchored = "/" in pattern.rstrip("/")
+    pattern = pattern.strip("/")
+
+    regex, idx = "", 0
+    while idx < len(pattern):
+        char = pattern[idx]
+        if pattern.startswith("**/", idx):
+            regex += "(?:.*/)?"
+            idx += 3
+            continue
+        if pattern.startswith("**", idx):
+            regex += ".*"
+            idx += 2
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[" and (end := pattern.find("]", idx + 2)) != -1:
+            group = pattern[idx + 1 : end].replace("\\", "\\\\")
+            regex += f"[^{group[1:]}]" if group[0] in "!^" else f"[{group}]"
+            idx = end
+        elif char == "\\" and idx + 1 < len(pattern):
+            idx += 1
+            regex += re.escape(pattern[idx])
         else:
-            # print(f"Unnecessary path found: {path}")
-            pass
+            regex += re.escape(char)
+        idx += 1
+
+    return regex if anchored else f"(?:.*/)?{regex}"
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A glob pattern applying to the paths below a base directory"""
+
+    regex: re.Pattern[str]
+    base: str
+    negated: bool = False
+    dir_only: bool = False
+
+    @classmethod
+    def compile(cls, pattern: str, base: str) -> "Rule":
+        negated = pattern.startswith("!")
+        pattern = pattern[1:] if negated else pattern
+        return cls(
+            regex=re.compile(translate(pattern)),
+            base=base,
+            negated=negated,
+            dir_only=pattern.endswith("/"),
+        )
+
+    def matches(self, path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if not path.startswith(self.base):
+            return False
+        return self.regex.fullmatch(path, len(self.base)) is not None
+
+
+def read_gitignore(directory: str) -> list[Rule]:
+    """Returns the rules of the .gitignore file in a directory, if any"""
+    try:
+        with open(os.path.join(directory, GITIGNORE), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return []
+
+    base = directory.rstrip(os.sep) + "/"
+    rules = []
+    for line in lines:
+        line = line if line.endswith("\\ ") else line.rstrip()
+        if line and not line.startswith("#"):
+            rules.append(Rule.compile(line, base))
+    return rules
+
+
+def is_ignored(path: str, is_dir: bool, rules: Iterable[Rule]) -> bool:
+    """Returns True if the last rule matching path excludes it"""
+    ignored = False
+    for rule in rules:
+        if rule.negated == ignored and rule.matches(path, is_dir):
+            ignored = not rule.negated
+    return ignored
+
+
+def _ancestor_rules(directory: str) -> list[Rule]:
+    """Returns .gitignore rules of the parent directories of directory, up to the git root"""
+    parents: list[str] = []
+    current = directory
+    while not os.path.exists(os.path.join(current, ".git")):
+        parent = os.path.dirname(current)
+        if parent == current:  # not in a git repository
+            return []
+        parents.append(parent)
+        current = parent
+    return [rule for parent in reversed(parents) for rule in read_gitignore(parent)]
+
+
+def find_paths(
+    paths: list[Path],
+    extensions: Iterable[str] = DEFAULT_EXTENSIONS,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+    gitignore: bool = True,
+    follow_symlinks: bool = False,
+) -> Generator[Path, None, None]:
+    """Yields files with one of the extensions, walking directories depth first in name order
+
+    Directories matching an exclude pattern (or ignored by git) are not descended into. Within
+    directories, files have to match one of the include patterns, if any. Patterns are relative to
+    the given paths. Files given explicitly are yielded as long as their extension is supported.
+    """
+    suffixes = tuple(extensions)
+
+    for path in paths:
+        if path.is_file():
+            if path.suffix in suffixes:
+                yield path
+            continue
+        if not path.is_dir():
+            continue
+
+        root = os.path.abspath(path)
+        base = root.rstrip(os.sep) + "/"
+        # Unlike .gitignore rules, these can't be negated by a later rule
+        excludes = [Rule.compile(p, base) for p in (*DEFAULT_EXCLUDES, *exclude)]
+        includes = [Rule.compile(p, base) for p in include]
+        rules = _ancestor_rules(root) if gitignore else []
+
+        yield from _walk(path, root, rules, excludes, includes, suffixes, gitignore, follow_symlinks)
+
+
+def _walk(
+    path: Path,
+    root: str,
+    rules: list[Rule],
+    excludes: list[Rule],
+    includes: list[Rule],
+    suffixes: tuple[str, ...],
+    gitignore: bool,
+    follow_symlinks: bool,
+) -> Iterator[Path]:
+    # One frame per directory being walked: (its entries left, its path, the .gitignore rules applying)
+    stack: list[tuple[Iterator[os.DirEntry[str]], Path, list[Rule]]] = []
+    visited: set[tuple[int, int]] = set()
+
+    def enter(directory: Path, absolute: str, inherited: list[Rule]) -> None:
+        try:
+            if follow_symlinks:
+                stat = os.stat(absolute)
+                if (stat.st_dev, stat.st_ino) in visited:  # a symlink loop, or walked already
+                    return
+                visited.add((stat.st_dev, stat.st_ino))
+            with os.scandir(absolute) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+        rules = inherited + read_gitignore(absolute) if gitignore else inherited
+        stack.append((iter(entries), directory, rules))
+
+    enter(path, root, rules)
+    while stack:
+        entries, directory, rules = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        try:
+            if entry.is_symlink() and not follow_symlinks:
+                continue
+            is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+        except OSError:
+            continue
+
+        absolute = entry.path
+        if is_ignored(absolute, is_dir, excludes) or is_ignored(absolute, is_dir, rules):
+            continue
+        if is_dir:
+            enter(directory / entry.name, absolute, rules)
+        elif entry.name.endswith(suffixes) and (
+            not includes or any(rule.matches(absolute, False) for rule in includes)
+        ):
+            yield directory / entry.name
+
+
+def read_paths(file: Path, null: bool = False) -> Iterator[Path]:
+    """Yields the paths listed in a file ("-" for stdin), one per line or NUL separated, as they come
+
+    Paths are yielded as soon as they're read e.g. while the command writing them is still running.
+    """
+    if str(file) == "-":
+        yield from _split(sys.stdin.buffer, b"\0" if null else b"\n")
+        return
+    with open(file, "rb") as f:
+        yield from _split(f, b"\0" if null else b"\n")
+
+
+def _split(stream: BinaryIO, separator: bytes) -> Iterator[Path]:
+    # read1() returns what's available rather than waiting for READ_SIZE bytes
+    read = getattr(stream, "read1", stream.read)
+    pending = b""
+    while chunk := read(READ_SIZE):
+        *entries, pending = (pending + chunk).split(separator)
+        for entry in entries:
+            if path := _decode(entry, separator):
+                yield path
+    if path := _decode(pending, separator):
+        yield path
+
+
+def _decode(entry: bytes, separator: bytes) -> Path | None:
+    if separator == b"\n":
+        entry = entry.rstrip(b"\r")
+    # undecodable bytes of file names are kept as they are, like os.listdir() does
+    return Path(os.fsdecode(entry)) if entry else None
 
 
 @dataclass
@@ -30,5 +260,23 @@ class Walker:
 
     config: Config
 
-    def walk(self) -> list[Path]:
-        return [path for path in find_paths(self.config.paths)]
+    def walk(self) -> Iterator[Path]:
+        """Yields the paths to check, lazily
+
+        With config.files_from, the listed files are yielded as they're read rather than walking
+        config.paths, as long as their extension is supported (like files given explicitly). They
+        aren't looked up: listed paths which aren't files (e.g. files deleted in a diff) are skipped
+        when they fail to be read, see pipeline.MISSING.
+        """
+        if self.config.files_from is not None:
+            suffixes = tuple(self.config.supported_extensions or DEFAULT_EXTENSIONS)
+            paths = read_paths(self.config.files_from, self.config.null)
+            return (path for path in paths if path.suffix in suffixes)
+        return find_paths(
+            self.config.paths,
+            extensions=self.config.supported_extensions or DEFAULT_EXTENSIONS,
+            include=self.config.include or (),
+            exclude=self.config.exclude or (),
+            gitignore=self.config.gitignore,
+            follow_symlinks=self.config.follow_symlinks,
+        )
@@ -0,0 +1,131 @@
+"""Checks files again whenever they change, keeping everything loaded in between (``spell --watch``)
+
+The lexicon, correction engine, word cache and the result (and identifiers) of every file are kept
+in memory. Files under the given paths are polled: a file whose size, modification time or inode
+changed is checked again, alone, and only the findings which appeared or disappeared are written::
+
+    + docs/index.md:12:5: recieve -> receive
+    - spell/parser.py:40:13: commnet -> comment
+    3 misspelled word(s) in 2 file(s)
+
+Findings are told apart by their word and how many times it occurs before them in the file, so
+that editing a line doesn't report every finding below it as resolved then new again.
+"""
+
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, TextIO
+
+from spell import pipeline
+from spell.config import Config
+from spell.pipeline import Context
+from spell.reporter import format_finding
+from spell.results import FileResult
+from spell.types import Finding
+from spell.walker import Walker
+
+#: What tells that a file changed: its modification time (ns), size and inode
+Signature = tuple[int, int, int]
+
+
+def _signature(stat: os.stat_result) -> Signature:
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _keyed(findings: Iterable[Finding]) -> dict[tuple[str, int], Finding]:
+    """Returns the findings by (word, occurrence of the word in the file)"""
+    counts: Counter[str] = Counter()
+    keyed = {}
+    for finding in findings:
+        counts[finding.word] += 1
+        keyed[finding.word, counts[finding.word]] = finding
+    return keyed
+
+
+class Watcher:
+    """Checks the files of config.paths, then only the ones which changed at every poll()"""
+
+    def __init__(self, config: Config, stream: TextIO):
+        self.config = config
+        self.stream = stream
+        self.context = Context.from_config(config)
+        self.signatures: dict[Path, Signature] = {}
+        self.results: dict[Path, FileResult] = {}
+        #: The findings last written of every file, see _keyed()
+        self.findings: dict[Path, dict[tuple[str, int], Finding]] = {}
+
+    def scan(self) -> dict[Path, Signature]:
+        """Returns the signature of every file to check, in the order they're walked"""
+        signatures = {}
+        for path in Walker(self.config).walk():
+            try:
+                signatures[path] = _signature(path.stat())
+            except FileNotFoundError:  # removed since it was walked
+                continue
+        return signatures
+
+    def poll(self) -> tuple[int, int]:
+        """Checks the files which changed (all of them the first time), and writes what changed
+
+        Returns the number of new and resolved findings.
+        """
+        first = not self.signatures
+        signatures = self.scan()
+        changed = [path for path, signature in signatures.items() if self.signatures.get(path) != signature]
+        removed = self.signatures.keys() - signatures.keys()
+        self.signatures = signatures
+        if not changed and not removed:
+            return 0, 0
+
+        if first:
+            for result in pipeline.check(self.context, changed):
+                self.results[result.path] = result
+        else:
+            # only a few files changed, checked in this process where everything is loaded
+            for path in changed:
+                try:
+                    self.results[path] = self.context.check_file(path)
+                except FileNotFoundError:  # removed since it was walked, gone at the next poll
+                    del self.signatures[path]
+        self.results = {path: self.results[path] for path in signatures if path in self.results}
+        return self._write(summary=first)
+
+    def _write(self, summary: bool = False) -> tuple[int, int]:
+        known: set[str] = set()
+        if self.config.vocabulary == "project":
+            known = {word for result in self.results.values() for word in result.vocabulary}
+
+        new, resolved = 0, 0
+        write = self.stream.write
+        for path in [*self.results, *(path for path in self.findings if path not in self.results)]:
+            previous = self.findings.pop(path, {})
+            result = self.results.get(path)
+            current = _keyed(f for f in result.findings if f.word not in known) if result else {}
+            for key, finding in current.items():
+                if key not in previous:
+                    write(f"+ {format_finding(path, finding)}")
+                    new += 1
+            for key, finding in previous.items():
+                if key not in current:
+                    write(f"- {format_finding(path, finding)}")
+                    resolved += 1
+            if current:
+                self.findings[path] = current
+
+        if new or resolved or summary:
+            total = sum(map(len, self.findings.values()))
+            write(f"{total} misspelled word(s) in {len(self.findings)} file(s)\n")
+            self.stream.flush()
+        return new, resolved
+
+    def run(self, interval: float) -> int:
+        """Polls for changes every interval seconds until interrupted, returns the exit code"""
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        return 1 if self.findings else 0
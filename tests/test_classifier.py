@@ -0,0 +1,39 @@
+import ast
+from pathlib import Path
+from unittest import TestCase
+
+from spell.classifier import is_code
+
+CORPUS = Path(__file__).parent / "data" / "comments.tsv"
+
+
+def read_corpus() -> list[tuple[bool, str]]:
+    labelled = []
+    for line in CORPUS.read_text().splitlines():
+        if line and not line.startswith("#"):
+            label, comment = line.split("\t", 1)
+            labelled.append((label == "code", comment))
+    return labelled
+
+
+def parses(comment: str) -> bool:
+    """The previous classifier"""
+    try:
+        ast.parse(comment)
+    except SyntaxError:
+        return False
+    return True
+
+
+class TestClassifier(TestCase):
+
+    corpus = read_corpus()
+
+    def accuracy(self, classify: object) -> float:
+        assert callable(classify)
+        return sum(classify(comment) == label for label, comment in self.corpus) / len(self.corpus)
+
+    def test_accuracy(self) -> None:
+        wrong = [(label, comment) for label, comment in self.corpus if is_code(comment) != label]
+        assert not wrong, wrong
+        assert self.accuracy(is_code) > self.accuracy(parses)
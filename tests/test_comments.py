@@ -1,7 +1,15 @@
 from pathlib import Path
 from unittest import TestCase
 
-from spell.parser import BaseComment, BaseDocstring, DocstringMetadata, Parser
+from spell.parser import (
+    BaseComment,
+    BaseDocstring,
+    DocstringMetadata,
+    Parser,
+    extract,
+    extract_batch,
+    extract_buffer,
+)
 from spell.types import CommentType
 
 
@@ -74,3 +82,74 @@ class TestDocstrings(TestCase):
         ]
         for a, b in zip(self.actual_docstrings, expected_docstrings):
             assert a == b
+
+
+class TestExtract(TestCase):
+
+    source = '''#!/usr/bin/env python
+"""Module docstring"""
+x = 1  # trailing commnet
+s = """
+# not a comment
+"""
+
+
+async def f(a: dict[str, int] = {"a": 1}, b=lambda: 2) -> None:  # header comment
+    # leading comment
+    """Function docstring"""
+
+
+class A: "One-liner docstring"
+
+
+def g():
+    return "not a docstring"
+
+
+def h():
+    f"not a docstring {x}"
+'''
+
+    comments, docstrings = extract(source)
+
+    def test_comments(self) -> None:
+        assert [(c.comment, c.line_no, c.col_offset) for c in self.comments] == [
+            ("#!/usr/bin/env python", 1, 0),
+            ("# trailing commnet", 3, 7),
+            ("# header comment", 9, 65),
+            ("    # leading comment", 10, 4),
+        ]
+
+    def test_docstrings(self) -> None:
+        assert [(d.docstring, d._type) for d in self.docstrings] == [
+            ("Module docstring", CommentType.MODULE),
+            ("Function docstring", CommentType.FUNCTION),
+            ("One-liner docstring", CommentType.CLASS),
+        ]
+        assert self.docstrings[1].metadata == DocstringMetadata(
+            cls_name="f", line_no=11, end_line_no=11, col_offset=4
+        )
+
+    def test_batch(self) -> None:
+        batch = extract_batch(self.source)
+        assert len(batch) == 7
+        assert (batch.comments(), batch.docstrings()) == (self.comments, self.docstrings)
+        assert [batch.is_comment(idx) for idx in range(len(batch))].count(True) == 4
+
+        # Views are slotted, and texts only held once
+        assert not hasattr(self.comments[0], "__dict__") and not hasattr(self.docstrings[0], "__dict__")
+        assert not hasattr(self.comments[0].text, "__dict__")
+        assert self.comments[0].text == "#!/usr/bin/env python"
+
+    def test_buffer(self) -> None:
+        source = self.source.replace("commnet", "commnét").replace("class A:", "class Ä:")
+        latin = f"# -*- coding: latin-1 -*-\n{source}"
+        for data, encoding in (
+            (b"\xef\xbb\xbf" + source.encode(), "utf-8-sig"),
+            (latin.encode("latin-1"), "latin-1"),
+        ):
+            # Offsets are in bytes, columns and the lines of snippets are decoded
+            batch, expected = extract_buffer(data, encoding), extract_batch(data.decode(encoding))
+            assert (batch.comments(), batch.docstrings()) == (expected.comments(), expected.docstrings())
+            assert batch.identifiers == expected.identifiers and "Ä" in batch.identifiers
+            assert list(map(batch.lines, range(len(batch)))) == list(map(expected.lines, range(len(batch))))
@@ -0,0 +1,196 @@
+import contextlib
+import io
+import os
+import socket
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase, mock
+
+from spell import daemon, pipeline
+from spell.config import Config
+from spell.daemon import Client, DaemonError, Server, run
+from spell.main import main
+
+DATA = Path(__file__).parent / "data"
+EXAMPLES = Path(__file__).parent.parent / "examples"
+#: Generous, a small file takes about a millisecond on a laptop
+LATENCY_BUDGET: float = 0.05
+
+
+class TestDaemon(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        patcher = mock.patch.dict(os.environ, {"SPELL_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.socket = self.tmp / "daemon.sock"
+        self.config = Config(
+            paths=[], verbosity=0, jobs=1, frequency_dictionary=DATA / "frequencies", socket=self.socket
+        )
+        self.paths = [DATA / "file1.py", EXAMPLES / "1.py", DATA / "file1.py"]
+
+    def start(self) -> Server:
+        server = Server(self.socket)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        def stop() -> None:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+        self.addCleanup(stop)
+        return server
+
+    def test_check(self) -> None:
+        self.start()
+        expected = list(pipeline.run(self.config, self.paths))
+        assert list(run(self.config, self.paths)) == expected
+        assert any(r.findings for r in expected)
+
+        with Client(self.socket) as client:
+            source = "def f():\n    # an exampel\n    pass\n"
+            (result,) = client.check(self.config, [(Path("unsaved.py"), None, source)])
+            (finding,) = result.findings
+            assert (finding.path, finding.word, finding.line_no, finding.col_offset) == (
+                Path("unsaved.py"),
+                "exampel",
+                2,
+                9,
+            )
+
+            (result,) = client.check(self.config, [(DATA / "file1.py", [(1, 2)], None)])
+            assert not result.findings
+
+    def test_check_text(self) -> None:
+        self.start()
+        path = Path("piped.py")
+        for data in (
+            "# -*- coding: latin-1 -*-\n# caf\xe9 exampel\n".encode("latin-1"),
+            b"# -*- coding: utf-8 -*-\n# caf\xe9 exampel\n",  # not utf-8
+        ):
+            expected = pipeline.check_text(self.config, path, data)
+            with mock.patch.object(pipeline, "check_text", side_effect=AssertionError):
+                assert daemon.check_text(self.config, path, data) == expected
+            assert "exampel" in [f.word for f in expected.findings]
+
+    def test_concurrent(self) -> None:
+        self.start()
+        expected = list(pipeline.run(self.config, self.paths))
+        outcomes: list[object] = []
+
+        def check() -> None:
+            outcomes.append(list(run(self.config, self.paths * 5)))
+
+        # All checked by the daemon, none in-process
+        threads = [threading.Thread(target=check) for _ in range(32)]
+        with mock.patch.object(pipeline, "run", side_effect=AssertionError):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert outcomes == [expected * 5] * 32
+
+    def test_busy(self) -> None:
+        # A listening socket which never accepts: connections are retried once its queue is full
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(str(self.socket))
+        listener.listen(0)
+        pending = []
+        while True:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            pending.append(connection)
+            self.addCleanup(connection.close)
+            connection.setblocking(False)
+            try:
+                connection.connect(str(self.socket))
+            except BlockingIOError:
+                break
+
+        with mock.patch.object(time, "sleep") as sleep, self.assertRaisesRegex(DaemonError, "busy"):
+            Client(self.socket)
+        assert sleep.call_count == daemon.CONNECT_ATTEMPTS - 1
+
+    def test_socket_mode(self) -> None:
+        umask = os.umask(0o022)
+        self.addCleanup(os.umask, umask)
+        self.start()
+        assert stat.S_IMODE(self.socket.stat().st_mode) & 0o077 == 0
+        assert os.umask(0o022) == 0o022
+
+    def test_options(self) -> None:
+        self.start()
+        expected = list(pipeline.run(self.config, self.paths))
+        config = Config(**{**vars(self.config), "jobs": 2, "cache_dir": self.tmp / "results"})
+        parallel = mock.patch.object(pipeline, "_check_parallel", wraps=pipeline._check_parallel)
+        with parallel as check_parallel, mock.patch.object(pipeline, "run", side_effect=AssertionError):
+            assert list(run(config, self.paths)) == expected
+            assert check_parallel.called
+            assert list((self.tmp / "results").glob("*/*.json"))
+            with mock.patch.object(pipeline.Context, "check_file", side_effect=AssertionError):
+                assert list(run(config, self.paths)) == expected
+
+    def test_reload(self) -> None:
+        server = self.start()
+        dictionary = self.tmp / "words"
+        dictionary.write_text("placeholder\n")
+        config = Config(**{**vars(self.config), "dictionaries": [dictionary]})
+        words = {f.word for r in run(config, self.paths) for f in r.findings}
+        assert "integer" in words
+        assert len(server.contexts) == 1
+
+        time.sleep(0.01)  # a different mtime, even on coarse file systems
+        dictionary.write_text("integer\n")
+        words = {f.word for r in run(config, self.paths) for f in r.findings}
+        assert "integer" not in words
+        assert len(server.contexts) == 1
+
+    def test_fallback(self) -> None:
+        # No daemon: checked in-process
+        expected = list(pipeline.run(self.config, self.paths))
+        assert list(run(self.config, self.paths)) == expected
+
+        # The daemon fails: what's left is checked in-process, after the files it skipped
+        self.start()
+        missing, invalid = self.tmp / "missing.py", self.tmp / "invalid\0.py"
+        results = []
+        with self.assertRaises(ValueError):
+            for result in run(self.config, [missing, *self.paths, invalid]):
+                results.append(result)
+        assert results == expected
+        with Client(self.socket) as client, self.assertRaises(DaemonError):
+            list(client.check(self.config, [(invalid, None, None)]))
+        assert list(run(self.config, [*self.paths, missing])) == expected
+
+    def test_latency(self) -> None:
+        self.start()
+        path = EXAMPLES / "1.py"
+        with Client(self.socket) as client:
+            list(client.check(self.config, [(path, None, None)]))  # load
+            start = time.perf_counter()
+            for _ in range(10):
+                list(client.check(self.config, [(path, None, None)]))
+            assert (time.perf_counter() - start) / 10 < LATENCY_BUDGET
+
+    def test_main(self) -> None:
+        self.start()
+        argv = ["--socket", str(self.socket), "--frequency-dictionary", str(DATA / "frequencies"), str(DATA)]
+        outputs = []
+        for options in (["--client"], ["-j1"]):
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                assert main([*options, *argv]) == 1
+            outputs.append(stdout.getvalue())
+        assert outputs[0] == outputs[1]
+        assert "file1.py:17:24: integer" in outputs[0]
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            assert main(["daemon", "--socket", str(self.socket)]) == 1  # already running
+            assert main(["daemon", "--stop", "--socket", str(self.tmp / "other.sock")]) == 1
@@ -0,0 +1,115 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from spell import documents, pipeline
+from spell.config import Config
+from spell.documents import MarkdownExtractor, RstExtractor, TextExtractor, paragraphs, read_lines
+
+DATA = Path(__file__).parent / "data"
+
+MARKDOWN = """\
+---
+title: Front matter
+---
+# Title
+
+Run `pip install x` or see [the docs](https://example.com/docs) and <https://example.com>.
+
+```python
+def f(): pass
+```
+
+    indented = "code"
+
+A paragraph with ``code `with` ticks``, an ![image](img/a.png)
+and a second line.
+<!--
+a comment
+-->
+[docs]: https://example.com "Title"
+"""
+
+RST = """\
+Title
+=====
+
+With ``literal``, :func:`os.path.join` and `a link <https://example.com>`_.
+
+.. code-block:: python
+
+    def f(): pass
+
+.. note:: Note this
+
+   And this too.
+
+.. _target: https://example.com
+
+Example::
+
+    literal = "block"
+
+>>> doctest()
+42
+
+:param x: the x value
+"""
+
+
+def masked(document: str, line_no: int, *parts: str) -> str:
+    """Returns a line of the document with the given parts replaced by spaces"""
+    line = document.splitlines()[line_no - 1]
+    for part in parts:
+        line = line.replace(part, " " * len(part))
+    return line
+
+
+def extract(extractor: documents.Extractor, text: str) -> list[tuple[int, int, str]]:
+    return [(p.line_no, p.end_line_no, p.text) for p in paragraphs(extractor, text.splitlines())]
+
+
+class TestDocuments(TestCase):
+    def test_markdown(self) -> None:
+        assert extract(MarkdownExtractor(), MARKDOWN) == [
+            (4, 4, "# Title"),
+            (
+                6,
+                6,
+                masked(
+                    MARKDOWN, 6, "`pip install x`", "](https://example.com/docs)", "<https://example.com>"
+                ),
+            ),
+            (14, 15, masked(MARKDOWN, 14, "``code `with` ticks``", "](img/a.png)") + "\nand a second line."),
+        ]
+
+    def test_rst(self) -> None:
+        assert extract(RstExtractor(), RST) == [
+            (1, 1, "Title"),
+            (4, 4, masked(RST, 4, "``literal``", ":func:`os.path.join`", "<https://example.com>")),
+            (10, 10, masked(RST, 10, ".. note::")),
+            (12, 12, "   And this too."),
+            (16, 16, "Example::"),
+            (23, 23, masked(RST, 23, ":param x:")),
+        ]
+
+    def test_text(self) -> None:
+        lines = ["See https://example.com or mail a@example.com", "", *["line"] * 150]
+        assert [(p.line_no, p.end_line_no) for p in paragraphs(TextExtractor(), lines)] == [
+            (1, 1),
+            (3, 102),
+            (103, 152),
+        ]
+        assert next(paragraphs(TextExtractor(), lines)).text.split() == ["See", "or", "mail"]
+        assert list(read_lines(b"\xef\xbb\xbfa\r\nb\xff\n")) == ["a", "b\ufffd"]
+
+    def test_pipeline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"SPELL_CACHE_DIR": tmp}):
+            path = Path(tmp) / "README.md"
+            path.write_text("# Title\n\n```\nexampel = 1\n```\n\nAn `exampel` and\nan exampel.\n")
+            config = Config(paths=[], verbosity=0, jobs=1, frequency_dictionary=DATA / "frequencies")
+            (result,) = pipeline.run(config, [path])
+            findings = [(f.word, f.line_no, f.col_offset) for f in result.findings if f.word == "exampel"]
+            assert findings == [("exampel", 8, 3)]
+            assert [(t.line_no, t.end_line_no) for t in result.texts] == [(1, 1), (7, 8)]
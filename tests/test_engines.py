@@ -0,0 +1,111 @@
+import importlib.util
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock, skipUnless
+
+from spell.symspell import SymSpell, distance, read_frequencies
+
+HAS_TEXTBLOB = importlib.util.find_spec("textblob") is not None
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+FREQUENCIES = Path(__file__).parent / "data" / "frequencies"
+
+# Common misspellings, each with a single most likely correction
+REFERENCE_WORDS = [
+    "speling",
+    "recieve",
+    "teh",
+    "langauge",
+    "definately",
+    "occured",
+    "seperate",
+    "untill",
+    "wich",
+    "becuase",
+    "adress",
+    "begining",
+    "beleive",
+    "calender",
+    "comming",
+    "enviroment",
+    "foriegn",
+    "goverment",
+    "happend",
+    "libary",
+    "neccessary",
+    "noticable",
+    "paramter",
+    "retrun",
+    "strng",
+    "documnt",
+    "exampel",
+    "represnts",
+    "convrts",
+    "integr",
+]
+
+
+class TestSymSpell(TestCase):
+
+    index = SymSpell(read_frequencies(FREQUENCIES))
+
+    def test_distance(self) -> None:
+        assert distance("convert", "convert", 2) == 0
+        assert distance("convert", "convret", 2) == 1
+        assert distance("convert", "cnvert", 2) == 1
+        assert distance("convert", "conveert", 2) == 1
+        assert distance("convert", "covnret", 2) == 2
+        assert distance("convert", "integer", 2) == 3
+
+    def test_lookup(self) -> None:
+        assert self.index.lookup("convert") == [("convert", 1.0)]
+        assert self.index.lookup("x") == [("x", 1.0)]
+        assert self.index.lookup("1.5") == [("1.5", 1.0)]
+        assert self.index.lookup("xyzzyq") == [("xyzzyq", 0.0)]
+        assert self.index.lookup("retrun", 1) == [("return", 1.0)]
+        assert self.index.lookup("Retrun", 1) == [("Return", 1.0)]
+
+    def test_reference_words(self) -> None:
+        for word in REFERENCE_WORDS:
+            spelling, confidence = self.index.lookup(word)[0]
+            assert spelling != word and confidence > 0, word
+
+    def test_lookup_many(self) -> None:
+        words = [*REFERENCE_WORDS, "convert", "Retrun", "x", "1.5", "xyzzyq", "teh", "ñame", "ab", "ba"]
+        expected = {word: self.index.lookup(word, 2) for word in words}
+        # one word at a time (a few candidates or no NumPy), then all the distances at once
+        assert self.index.lookup_many(words, 2) == expected
+        with mock.patch("spell.symspell.MIN_VECTORIZED_PAIRS", 0):
+            assert self.index.lookup_many(words, 2) == expected
+            assert self.index.lookup_many([]) == {}
+
+    @skipUnless(HAS_NUMPY, "NumPy is not installed")
+    def test_vectorized(self) -> None:
+        from spell.vectorized import Dictionary
+
+        words = ["convert", "convret", "cnvert", "covnret", "integer", "ca", "abc", "a", "cafés"]
+        dictionary = Dictionary(words)
+        for max_distance in (1, 2, 3):
+            closest = dictionary.closest(words, [words] * len(words), max_distance)
+            for word, candidates in zip(words, closest):
+                distances = {c: distance(word, c, max_distance) for c in words}
+                best = min(distances.values())
+                assert candidates == [c for c in words if distances[c] == best], (word, max_distance)
+
+    def test_cached_index(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            built = SymSpell.load(FREQUENCIES, cache_dir=Path(tmp))
+            cached = SymSpell.load(FREQUENCIES, cache_dir=Path(tmp))
+            assert built is not cached
+            assert built.deletes == cached.deletes == self.index.deletes
+
+
+@skipUnless(HAS_TEXTBLOB, "TextBlob is not installed")
+class TestEngines(TestCase):
+    def test_same_top_suggestion(self) -> None:
+        from spell.checker import SymSpellEngine, TextBlobEngine
+
+        for frequencies in (FREQUENCIES, None):
+            textblob, symspell = TextBlobEngine(frequencies), SymSpellEngine(frequencies)
+            for word in REFERENCE_WORDS:
+                assert textblob.suggest(word, 1) == symspell.suggest(word, 1), word
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from spell import lexicon
+from spell.lexicon import Lexicon
+
+
+class TestLexicon(TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.words = self.dir / "words"
+        self.words.write_text("Alpha beta\ngamma\n")
+        self.output = self.dir / "lexicon.bin"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_membership(self) -> None:
+        sources = lexicon.sources_for([self.words])
+        count = lexicon.build(sources, self.output)
+        words = Lexicon(self.output)
+
+        assert len(words) == count
+        for word in ["alpha", "beta", "gamma", "python", "os", "i.e.", "todo"]:
+            assert word in words, word
+        for word in ["Alpha", "alph", "alphas", "", "delta"]:
+            assert word not in words, word
+
+    def test_bundled_words(self) -> None:
+        lexicon.build(lexicon.SOURCES, self.output)
+        words = Lexicon(self.output)
+        for source in lexicon.SOURCES:
+            for word in lexicon.read_words(source):
+                assert word in words, word
+
+    def test_stale(self) -> None:
+        sources = lexicon.sources_for([self.words])
+        lexicon.build(sources, self.output)
+        assert not Lexicon(self.output).is_stale(sources)
+
+        self.words.write_text("delta\n")
+        mtime = time.time() + 10
+        os.utime(self.words, (mtime, mtime))
+        assert Lexicon(self.output).is_stale(sources)
+
+    def test_command(self) -> None:
+        args = ["-d", str(self.words), "-o", str(self.output)]
+        assert lexicon.main([*args, "--check"]) == 1
+        assert lexicon.main(args) == 0
+        assert lexicon.main([*args, "--check"]) == 0
@@ -0,0 +1,319 @@
+import itertools
+import os
+import subprocess  # nosec
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+from unittest import TestCase, mock
+
+from spell import git, pipeline
+from spell.cache import ResultCache
+from spell.config import Config
+from spell.profiling import Profiler
+from spell.results import FileResult
+from spell.types import Finding
+from spell.walker import find_paths
+
+DATA = Path(__file__).parent / "data"
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestPipeline(TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(os.environ, {"SPELL_CACHE_DIR": self.tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def config(self, **kwargs: object) -> Config:
+        return Config(
+            paths=[DATA, EXAMPLES], verbosity=0, frequency_dictionary=DATA / "frequencies", **kwargs
+        )
+
+    def test_parallel_same_as_serial(self) -> None:
+        paths = [DATA / "file1.py", EXAMPLES / "1.py"] * 3
+
+        serial = list(pipeline.run(self.config(jobs=1), paths))
+        parallel = list(pipeline.run(self.config(jobs=3), paths))
+
+        assert [r.path for r in serial] == paths
+        assert serial == parallel
+        assert any(r.findings for r in serial)
+
+    def test_cached_streaming(self) -> None:
+        context = pipeline.Context.from_config(self.config(jobs=2))
+        cached = [
+            pipeline.Job(DATA / f"{idx}.py", result=FileResult(DATA / f"{idx}.py")) for idx in range(1000)
+        ]
+
+        def jobs() -> Iterator[pipeline.Job]:
+            yield from cached
+            yield pipeline.Job(DATA / "file1.py")
+            yield from cached
+            raise AssertionError("consumed past what's needed")
+
+        checked = pipeline._check(context, jobs())
+        # cached results come out as they're planned, a single file to check doesn't start workers
+        with mock.patch.object(pipeline, "_check_parallel", side_effect=AssertionError):
+            results = [result for _, result in itertools.islice(checked, 2001)]
+        assert results[:1000] == [job.result for job in cached]
+        assert results[1000].path == DATA / "file1.py" and results[1000].findings
+
+    def test_read_ahead(self) -> None:
+        root = Path(self.tmp.name)
+        # Not utf-8: decoded according to the coding cookie
+        (root / "latin.py").write_bytes(
+            "# -*- coding: latin-1 -*-\nx = 1  # caf\xe9 exampel\n".encode("latin-1")
+        )
+        paths = [DATA / "file1.py", root / "latin.py", EXAMPLES / "1.py"] * 3
+
+        expected = list(pipeline.run(self.config(jobs=1, read_ahead=0), paths))
+        for read_ahead in (1, 4):
+            assert list(pipeline.run(self.config(jobs=1, read_ahead=read_ahead), paths)) == expected
+        assert list(pipeline.run(self.config(jobs=2, read_ahead=4), paths)) == expected
+
+        # Worker processes read the files of a task ahead too
+        with mock.patch.object(pipeline, "_context", None), mock.patch.object(
+            pipeline, "read", wraps=pipeline.read
+        ) as read:
+            pipeline.init_worker(self.config(jobs=2, read_ahead=4))
+            assert pipeline.check_files([pipeline.Job(path) for path in paths]) == expected
+        assert read.call_count == len(paths)
+        assert "café exampel" in expected[1].texts[-1].text
+        assert "exampel" in [f.word for f in expected[1].findings]
+
+        # Files which are gone (e.g. listed by --files-from but deleted) are skipped where they're read
+        (root / "dir.py").mkdir()
+        gone = [root / "missing.py", *paths, root / "dir.py", root / "missing" / "x.py"]
+        for config in (
+            self.config(jobs=1, read_ahead=0),
+            self.config(jobs=1, read_ahead=4),
+            self.config(jobs=2, read_ahead=4),
+            self.config(jobs=1, cache_dir=root / "cache"),
+        ):
+            assert list(pipeline.run(config, gone)) == expected, config
+
+    def test_mmap(self) -> None:
+        root = Path(self.tmp.name)
+        (root / "latin.py").write_bytes(
+            "# -*- coding: latin-1 -*-\nx = 1  # caf\xe9 exampel\n".encode("latin-1")
+        )
+        # Not scanned as bytes: the second byte of a character can be e.g. a backslash
+        (root / "sjis.py").write_bytes('# coding: shift_jis\ns = "表"  # an exampel\n'.encode("shift_jis"))
+        (root / "doc.md").write_text("# Title\n\nAn exampel, `recieve`\n")
+        paths = [DATA / "file1.py", EXAMPLES / "1.py", root / "latin.py", root / "sjis.py", root / "doc.md"]
+
+        read = list(pipeline.run(self.config(jobs=1, mmap_threshold=0), paths))
+        profiler = Profiler()
+        mapped = list(pipeline.run(self.config(jobs=1, mmap_threshold=1), paths, profiler=profiler))
+        assert mapped == read
+        assert profiler.counters["files.mapped"] == len(paths)
+        assert ("exampel", 2, 14) in [(f.word, f.line_no, f.col_offset) for f in read[2].findings]
+        assert ("exampel", 2, 14) in [(f.word, f.line_no, f.col_offset) for f in read[3].findings]
+
+    def test_wrong_encoding(self) -> None:
+        # A latin-1 byte under a utf-8 coding cookie is replaced, the rest of the file is checked
+        path = Path(self.tmp.name) / "wrong.py"
+        path.write_bytes(b"# -*- coding: utf-8 -*-\nx = 1  # caf\xe9 exampel\n")
+        (result,) = pipeline.run(self.config(jobs=1, mmap_threshold=0), [path])
+        assert ("exampel", 2, 14) in [(f.word, f.line_no, f.col_offset) for f in result.findings]
+        # the same when scanned memory-mapped
+        assert list(pipeline.run(self.config(jobs=1, mmap_threshold=1), [path])) == [result]
+
+    def test_locator(self) -> None:
+        source = 'x = "recieve"  # Recieve, then\n# (recieve) the tyop: recieved recieve\n'
+        findings = [Finding(word, []) for word in ("recieve", "missing", "recieve", "tyop", "recieve")]
+        pipeline.Locator(source, 10).locate(findings, source.index("#"))
+        assert [(f.line_no, f.col_offset) for f in findings] == [
+            (10, 17),
+            (None, None),
+            (11, 3),
+            (11, 16),
+            (11, 31),
+        ]
+
+    def test_vocabulary(self) -> None:
+        root = Path(self.tmp.name)
+        (root / "a.py").write_text('def read_cfgfile(path):\n    """Reads a cfgfile at path"""\n')
+        (root / "b.py").write_text("from a import read_cfgfile\n\nx = 1  # the cfgfile is a recieve\n")
+        (root / "c.py").write_text("# no cfgfile here\n")
+        paths = [root / "a.py", root / "b.py", root / "c.py"]
+
+        def words(vocabulary: str) -> list[list[str]]:
+            results = pipeline.run(self.config(jobs=1, vocabulary=vocabulary), paths)
+            if vocabulary == "project":
+                results = pipeline.with_project_vocabulary(results)
+            return [[f.word for f in r.findings if f.word in ("cfgfile", "recieve")] for r in results]
+
+        assert words("none") == [["cfgfile"], ["cfgfile", "recieve"], ["cfgfile"]]
+        assert words("file") == [[], ["recieve"], ["cfgfile"]]
+        assert words("project") == [[], ["recieve"], []]
+
+        (result,) = pipeline.run(self.config(jobs=1), paths[:1])
+        assert {"read_cfgfile", "read", "cfgfile", "path"} <= set(result.vocabulary)
+
+    def test_result_cache(self) -> None:
+        source = Path(self.tmp.name) / "src"
+        source.mkdir()
+        paths = [source / "file1.py", source / "1.py"]
+        paths[0].write_text((DATA / "file1.py").read_text())
+        paths[1].write_text((EXAMPLES / "1.py").read_text())
+        config = self.config(jobs=1, cache_dir=Path(self.tmp.name) / "results")
+
+        cold = list(pipeline.run(config, paths))
+        with mock.patch.object(pipeline.Context, "check_file", side_effect=AssertionError):
+            warm = list(pipeline.run(config, paths))
+        assert [r.to_dict() for r in cold] == [r.to_dict() for r in warm]
+
+        paths[0].write_text('"""A modifed file"""\n')
+        changed = list(pipeline.run(config, paths))
+        assert [f.word for f in changed[0].findings] == ["modifed"]
+        assert changed[1].to_dict() == cold[1].to_dict()
+
+        assert config.cache_dir is not None
+        key = pipeline.Context.from_config(config).fingerprint
+        assert ResultCache(config.cache_dir, key).get(paths[1]) is not None
+
+        paths[1].unlink()
+        list(pipeline.run(config, paths[:1]))
+        assert ResultCache(config.cache_dir, key).get(paths[1]) is None
+
+    def test_result_cache_shards(self) -> None:
+        paths = []
+        for name in ("a", "b"):
+            (Path(self.tmp.name) / name).mkdir()
+            paths.append(Path(self.tmp.name) / name / "m.py")
+            paths[-1].write_text("# a comment\n")
+        config = self.config(jobs=1, cache_dir=Path(self.tmp.name) / "cache")
+        list(pipeline.run(config, paths))
+
+        def shards() -> dict[str, int]:
+            return {p.name: p.stat().st_mtime_ns for p in (Path(self.tmp.name) / "cache").glob("*/*.json")}
+
+        # Nothing is written when nothing changed, only the shard of a changed file otherwise
+        before = shards()
+        assert len(before) == 2
+        with mock.patch.object(os, "replace", side_effect=AssertionError):
+            list(pipeline.run(config, paths))
+        paths[1].write_text("# another comment\n")
+        list(pipeline.run(config, paths))
+        after = shards()
+        assert [name for name in before if before[name] != after[name]] == [
+            ResultCache(Path(), "")._shard(paths[1])[0] + ".json"
+        ]
+
+        # The shards of deleted directories, and of another key, are removed although not loaded
+        (Path(self.tmp.name) / "b" / "m.py").unlink()
+        (Path(self.tmp.name) / "b").rmdir()
+        list(pipeline.run(config, paths[:1]))
+        assert list(shards()) == [ResultCache(Path(), "")._shard(paths[0])[0] + ".json"]
+        assert config.cache_dir is not None
+        cache = ResultCache(config.cache_dir, "another key")
+        assert cache.get(paths[0]) is None
+        cache.save()
+        assert not shards()
+
+    def test_cache_key(self) -> None:
+        # The same word lists and frequency dictionary elsewhere e.g. in another checkout
+        copies = []
+        for name in ("a", "b"):
+            (Path(self.tmp.name) / name).mkdir()
+            copies.append((Path(self.tmp.name) / name / "words", Path(self.tmp.name) / name / "frequencies"))
+            copies[-1][0].write_text("cfgfile\n")
+            copies[-1][1].write_text((DATA / "frequencies").read_text())
+
+        def key(words: Path, frequencies: Path) -> str:
+            config = Config(paths=[], verbosity=0, dictionaries=[words], frequency_dictionary=frequencies)
+            return pipeline.Context.from_config(config).fingerprint
+
+        assert key(*copies[0]) == key(*copies[1])
+        other = copies[1][0].with_name("other")
+        other.write_text("cfgfiles\n")
+        assert key(*copies[0]) != key(other, copies[1][1])
+
+    def test_changed_lines(self) -> None:
+        path = Path(self.tmp.name) / "file1.py"
+        path.write_text((DATA / "file1.py").read_text().replace("# try to cast", "# try to cats"))
+        diff = (
+            "diff --git a/file1.py b/file1.py\n"
+            "--- a/file1.py\n"
+            "+++ b/file1.py\n"
+            "@@ -17,2 +17,2 @@ class Converter:\n"
+            "@@ -24 +24 @@ def convert(self) -> int:\n"
+            "@@ -26,2 +26,0 @@ def convert(self) -> int:\n"
+        )
+        changes = git.parse_diff(diff, Path(self.tmp.name))
+        assert changes == {path: [(17, 18), (24, 24)]}
+
+        result = next(pipeline.run(self.config(jobs=1), [path], changes))
+        assert [t.line_no for t in result.texts] == [18, 24, 17]
+        assert ("cats", 24) in [(f.word, f.line_no) for f in result.findings]
+
+    def test_changed_lines_git(self) -> None:
+        root = Path(self.tmp.name) / "repo"
+        root.mkdir()
+        paths = [root / "café.py", root / "with space.py"]
+        for path in paths:
+            path.write_text("x = 1\n")
+
+        def run(*args: str) -> None:
+            subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+        run("init", "-q")
+        run("add", ".")
+        run("-c", "user.name=a", "-c", "user.email=a@b", "commit", "-q", "-m", "init")
+        for path in paths:
+            path.write_text("x = 1\ny = 2  # a tpyo\n")
+        for option in ("diff.noprefix", "diff.mnemonicPrefix", "core.quotePath"):
+            run("config", option, "false" if option == "core.quotePath" else "true")
+            assert git.changed_lines("HEAD", cwd=root) == {path.resolve(): [(2, 2)] for path in paths}
+
+        # An added line "++ x" is "+++ x", and a removed "-- x" is "--- x", within hunks
+        diff = (
+            'diff --git "a/caf\\303\\251.py" "b/caf\\303\\251.py"\n'
+            '--- "a/caf\\303\\251.py"\n'
+            '+++ "b/caf\\303\\251.py"\n'
+            "@@ -1 +1,2 @@\n"
+            "--- a/x\n"
+            "+++ b/x\n"
+            "+++ y\n"
+            "@@ -4,0 +5 @@\n"
+            "+z\n"
+            "diff --git a/with space.py b/with space.py\n"
+            "--- a/with space.py\t\n"
+            "+++ b/with space.py\t\n"
+            "@@ -0,0 +1 @@\n"
+        )
+        assert git.parse_diff(diff, root) == {paths[0]: [(1, 2), (5, 5)], paths[1]: [(1, 1)]}
+
+        with self.assertRaisesRegex(git.GitError, "invalid revision"):
+            git.changed_lines("--output=/tmp/x", cwd=root)
+
+    def test_streaming(self) -> None:
+        root = Path(self.tmp.name) / "tree"
+        source = '"""A module docstring"""\n\n\ndef f():\n    # a comment with a typo: recieve\n    pass\n'
+        for d in range(100):
+            (root / f"d{d:03}").mkdir(parents=True)
+            for f in range(100):
+                (root / f"d{d:03}" / f"m{f:03}.py").write_text(source)
+
+        def peak(paths: list[Path]) -> tuple[int, int]:
+            tracemalloc.start()
+            try:
+                results = pipeline.run(self.config(jobs=1), find_paths(paths))
+                count = sum(1 for result in results if result.findings)
+                return count, tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        peak([root / "d000"])  # load the lexicon and engine first
+        # pathlib interns names, keep them so the interpreter's table doesn't grow during the runs
+        interned = list(find_paths([root]))
+        small_count, small_peak = peak(sorted(root.iterdir())[:10])
+        large_count, large_peak = peak([root])
+
+        assert (small_count, large_count) == (1_000, 10_000)
+        assert len(interned) == large_count
+        assert large_peak < 1.5 * small_peak
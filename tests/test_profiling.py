@@ -0,0 +1,87 @@
+import contextlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from spell import pipeline
+from spell.config import Config
+from spell.main import main
+from spell.profiling import Profiler
+
+DATA = Path(__file__).parent / "data"
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestProfiler(TestCase):
+    def test_merge(self) -> None:
+        profiler = Profiler(slowest=2)
+        with profiler.timer("read"):
+            pass
+        profiler.count("files")
+        profiler.file("a.py", 0.1)
+
+        other = Profiler()
+        other.add("read", 1.0, 0.5, calls=3)
+        other.count("files", 2)
+        other.file("b.py", 0.3)
+        other.file("c.py", 0.2)
+        profiler.merge(other.as_dict())
+
+        data = profiler.as_dict()
+        assert data["stages"]["read"]["calls"] == 4
+        assert data["stages"]["read"]["wall"] >= 1.0
+        assert data["counters"] == {"files": 3}
+        assert data["slowest_files"] == [["b.py", 0.3], ["c.py", 0.2]]
+
+    def test_iterate(self) -> None:
+        profiler = Profiler()
+        assert list(profiler.iterate("walk", [1, None, 2])) == [1, None, 2]
+        assert profiler.timers["walk"].calls == 4
+
+
+class TestPipelineProfile(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"SPELL_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.paths = [DATA / "file1.py", EXAMPLES / "1.py"]
+
+    def profile(self, jobs: int) -> Profiler:
+        config = Config(paths=[], verbosity=0, jobs=jobs, frequency_dictionary=DATA / "frequencies")
+        profiler = Profiler()
+        results = list(pipeline.run(config, self.paths * 2, profiler=profiler))
+        assert all(r.profile is not None for r in results)
+        return profiler
+
+    def test_counters(self) -> None:
+        serial = self.profile(jobs=1)
+
+        counters = serial.counters
+        assert counters["files.checked"] == 4
+        # the distinct words of a file are looked up once, identifiers of the file before the cache
+        identifiers = counters["words.skipped.is_identifier"]
+        lookups = identifiers + counters["word_cache.hits"] + counters["word_cache.misses"]
+        assert lookups == counters["words.distinct"] < counters["words"]
+        skipped = sum(v for k, v in counters.items() if k.startswith("words.skipped.")) - identifiers
+        assert skipped + counters["words.corrected"] == counters["word_cache.misses"]
+        assert identifiers > 0
+        assert counters["words.skipped.ignorable"] > 0
+        assert {"load", "read", "extract", "is_code", "classify", "correct"} <= set(serial.timers)
+        assert {path for path, _ in serial.slowest_files} == {str(p) for p in self.paths}
+
+        # every worker process has its own word cache, everything else adds up the same
+        parallel = self.profile(jobs=2)
+        for name in ("files.checked", "texts", "words", "words.distinct", "comments.code"):
+            assert parallel.counters[name] == counters[name], name
+
+    def test_main(self) -> None:
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(io.StringIO()):
+            main(["-j1", "--profile", "--frequency-dictionary", str(DATA / "frequencies"), str(DATA)])
+        report = stderr.getvalue()
+        assert "slowest files:" in report
+        assert "word_cache.hit_rate" in report
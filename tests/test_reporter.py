@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from spell import pipeline
+from spell.config import Config
+from spell.main import main
+from spell.reporter import REPORTERS
+
+DATA = Path(__file__).parent / "data"
+SOURCE = '''#!/usr/bin/env python
+"""Module docstring
+
+Second line with a tpyo, tpyo.
+"""
+
+
+def f():
+    x = 1  # a trailing commnet
+    return x
+'''
+
+
+class TestReporter(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"SPELL_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.path = Path(tmp.name) / "module.py"
+        self.path.write_text(SOURCE)
+        config = Config(paths=[self.path], verbosity=0, jobs=1, frequency_dictionary=DATA / "frequencies")
+        self.results = list(pipeline.run(config, [self.path]))
+
+    def report(self, name: str) -> str:
+        stream = io.StringIO()
+        reporter = REPORTERS[name](stream)
+        reporter.start()
+        for result in self.results:
+            reporter.report(result)
+        reporter.finish()
+        return stream.getvalue()
+
+    def test_human(self) -> None:
+        lines = self.report("human").splitlines()
+        assert f"{self.path}:9:16: trailing -> trailing" in lines
+        assert f"{self.path}:4:20: tpyo -> to, type" in lines
+        assert lines[-1].endswith("misspelled word(s) in 1 file(s)")
+
+    def test_jsonl(self) -> None:
+        records = [json.loads(line) for line in self.report("jsonl").splitlines()]
+        positions = [(r["word"], r["line"], r["column"]) for r in records]
+        assert ("commnet", 9, 25) in positions
+        assert [p for p in positions if p[0] == "tpyo"] == [("tpyo", 4, 20), ("tpyo", 4, 26)]
+        assert all(r["path"] == str(self.path) for r in records)
+
+    def test_sarif(self) -> None:
+        log = json.loads(self.report("sarif"))
+        assert log["version"] == "2.1.0"
+        results = log["runs"][0]["results"]
+        assert len(results) == len(self.results[0].findings)
+        location = results[-1]["locations"][0]["physicalLocation"]
+        assert location["artifactLocation"]["uri"] == self.path.as_posix()
+        assert location["region"] == {"startLine": 4, "startColumn": 26, "endColumn": 30}
+
+        self.results = []
+        assert json.loads(self.report("sarif"))["runs"][0]["results"] == []
+
+    def test_main(self) -> None:
+        output = self.path.with_suffix(".jsonl")
+        argv = ["-j1", "-f", "jsonl", "-o", str(output), "--frequency-dictionary", str(DATA / "frequencies")]
+
+        assert main([*argv, str(self.path)]) == 1
+        assert len(output.read_text().splitlines()) == len(self.results[0].findings)
+
+        self.path.write_text("x = 1  # noqa\n")
+        assert main([*argv, str(self.path)]) == 0
+        assert output.read_text() == ""
+
+    def test_main_stdin(self) -> None:
+        def run(*args: str, stdin: bytes = b"") -> str:
+            output = self.path.with_suffix(".jsonl")
+            argv = [
+                "-j1",
+                "-f",
+                "jsonl",
+                "-o",
+                str(output),
+                "--frequency-dictionary",
+                str(DATA / "frequencies"),
+            ]
+            with mock.patch("sys.stdin", mock.Mock(buffer=io.BytesIO(stdin))):
+                assert main([*argv, *args]) == 1
+            return output.read_text()
+
+        expected = run(str(self.path))
+        assert (
+            run(
+                "--stdin-paths",
+                "-0",
+                stdin=f"{self.path}\0{self.path.with_suffix('.txt')}\0deleted.py\0".encode(),
+            )
+            == expected
+        )
+
+        # Nothing is read but stdin: neither the file, nor its directory
+        name = str(self.path.parent / "missing" / "module.py")
+        assert run("--stdin-text", "--stdin-filename", name, stdin=SOURCE.encode()) == expected.replace(
+            str(self.path), name
+        )
+        findings = run("--stdin-text", "--stdin-filename", "notes.md", stdin=b"A tpyo in `code()`\n")
+        assert [json.loads(line)["path"] for line in findings.splitlines()] == ["notes.md"]
+
+        with self.assertRaises(SystemExit), mock.patch("sys.stderr", io.StringIO()):
+            main(["--stdin-text", "--files-from", "-"])
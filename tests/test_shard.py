@@ -0,0 +1,78 @@
+import os
+import tempfile
+from argparse import ArgumentTypeError
+from pathlib import Path
+from unittest import TestCase, mock
+
+from spell import shard
+from spell.main import main
+
+DATA = Path(__file__).parent / "data"
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestShard(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"SPELL_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = Path(tmp.name)
+
+    def test_parse_spec(self) -> None:
+        assert shard.parse_spec("2/3") == (2, 3)
+        for spec in ("0/3", "4/3", "3", "a/b", "1/0"):
+            with self.assertRaises(ArgumentTypeError):
+                shard.parse_spec(spec)
+
+    def test_assign(self) -> None:
+        root = self.tmp / "tree"
+        root.mkdir()
+        paths = []
+        for idx in range(40):
+            paths.append(root / f"m{idx:02}.py")
+            paths[-1].write_text("# a comment\n" * (idx % 7 + 1) * 500)
+
+        shards = shard.assign(paths, 3)
+        assert shards == shard.assign(list(paths), 3) and set(shards) == {0, 1, 2}
+        loads = [
+            sum(shard.FILE_COST + p.stat().st_size for p, s in zip(paths, shards) if s == i) for i in range(3)
+        ]
+        assert max(loads) - min(loads) <= max(p.stat().st_size for p in paths)
+
+        selected = [shard.select(paths, index, 3) for index in (1, 2, 3)]
+        assert sorted(idx for indices, _, _ in selected for idx in indices) == list(range(len(paths)))
+        assert all(files == len(paths) and sorted(indices) == indices for indices, _, files in selected)
+
+    def test_merge(self) -> None:
+        options = ["-j1", "--frequency-dictionary", str(DATA / "frequencies"), str(DATA), str(EXAMPLES)]
+        for argv, merge_argv in (
+            (["-f", "jsonl"], ["-f", "jsonl"]),
+            (["-v", "--vocabulary", "project"], ["-v"]),
+        ):
+            single = self.tmp / "single"
+            assert main([*argv, *options, "-o", str(single)]) == 1
+
+            partials = [self.tmp / f"partial{index}" for index in (1, 2, 3)]
+            for index, partial in enumerate(partials, 1):
+                assert main([*argv, *options, "--shard", f"{index}/3", "-o", str(partial)]) == 0
+            merged = self.tmp / "merged"
+            assert main(["merge", *merge_argv, *map(str, partials), "-o", str(merged)]) == 1
+            assert merged.read_text() == single.read_text() != ""
+
+        # Listed files which are gone are skipped, by every shard
+        listing = self.tmp / "files"
+        listing.write_text(
+            "\n".join(str(p) for p in [DATA / "file1.py", self.tmp / "gone.py", EXAMPLES / "1.py"])
+        )
+        options = ["-j1", "--frequency-dictionary", str(DATA / "frequencies"), "--files-from", str(listing)]
+        assert main([*options, "-o", str(single)]) == 1
+        for index, partial in enumerate(partials, 1):
+            assert main([*options, "--shard", f"{index}/3", "-o", str(partial)]) == 0
+        assert main(["merge", *map(str, partials), "-o", str(merged)]) == 1
+        assert merged.read_text() == single.read_text() != ""
+
+        assert main(["merge", *map(str, partials[:2])]) == 2
+        assert main(["merge", *map(str, [partials[0], *partials])]) == 2
+        assert main(["merge", str(single)]) == 2
@@ -0,0 +1,72 @@
+import os
+import subprocess  # nosec
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from spell import __version__
+
+ROOT = Path(__file__).parent.parent
+DATA = Path(__file__).parent / "data"
+#: Generous, importing spell.main takes well below 0.1s on a laptop
+IMPORT_BUDGET: float = 0.5
+#: Modules which take long to import, and only some runs need
+HEAVY_MODULES: tuple[str, ...] = ("textblob", "nltk", "multiprocessing", "numpy")
+
+
+def python(*args: str, cache_dir: str) -> subprocess.CompletedProcess[str]:
+    env = {**os.environ, "SPELL_CACHE_DIR": cache_dir, "PYTHONPATH": str(ROOT)}
+    return subprocess.run(  # nosec
+        [sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=False
+    )
+
+
+def imported(importtime: str) -> dict[str, float]:
+    """Returns the cumulative import time (in seconds) by module of `python -X importtime` output"""
+    modules = {}
+    for line in importtime.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            modules[name.strip()] = int(cumulative) / 1e6
+    return modules
+
+
+class TestStartup(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+
+    def assert_light(self, modules: dict[str, float]) -> None:
+        heavy = [m for m in modules if m.split(".")[0] in HEAVY_MODULES]
+        assert not heavy, heavy
+
+    def test_import(self) -> None:
+        python("-c", "import spell.main", cache_dir=self.cache_dir)  # compile first
+        process = python("-X", "importtime", "-c", "import spell.main", cache_dir=self.cache_dir)
+        modules = imported(process.stderr)
+        self.assert_light(modules)
+        assert modules["spell.main"] < IMPORT_BUDGET, modules["spell.main"]
+
+    def test_version(self) -> None:
+        for option in ("--version", "--help"):
+            process = python("-X", "importtime", "-m", "spell.main", option, cache_dir=self.cache_dir)
+            assert process.returncode == 0
+            self.assert_light(imported(process.stderr))
+        assert process.stdout.startswith("usage: spell")
+
+        process = python("-m", "spell.main", "--version", cache_dir=self.cache_dir)
+        assert process.stdout.strip() == f"spell {__version__}"
+
+    def test_run(self) -> None:
+        # The default engine never needs TextBlob, whether files are cached or not
+        code = (
+            "import sys; from spell.main import main; "
+            f"main(['-j1', '--cache-dir', {self.cache_dir!r}, '--frequency-dictionary', "
+            f"{str(DATA / 'frequencies')!r}, {str(DATA)!r}]); "
+            "print(sorted(m for m in sys.modules if m.split('.')[0] in ('textblob', 'nltk')))"
+        )
+        for _ in range(2):
+            process = python("-c", code, cache_dir=self.cache_dir)
+            assert process.stdout.splitlines()[-1] == "[]", process.stderr
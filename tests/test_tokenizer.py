@@ -0,0 +1,74 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from spell.checker import Checker, get_engine
+from spell.tokenizer import compile_pattern, default_pattern, spans, words
+from spell.types import Text
+
+FREQUENCIES = Path(__file__).parent / "data" / "frequencies"
+
+
+class TestTokenizer(TestCase):
+    def test_words(self) -> None:
+        text = "Don't call foo() (nor os.path.join()), e.g. on 'quoted' snake_case .py files... E.g. café"
+        assert words(text) == [
+            "don",
+            "t",
+            "call",
+            "foo()",
+            "nor",
+            "os.path.join()",
+            "e.g.",
+            "on",
+            "quoted",
+            "snake",
+            "case",
+            ".py",
+            "files",
+            "e.g.",
+            "café",
+        ]
+
+        # the same tokens as searching the whole text
+        pattern = default_pattern()
+        for text in [
+            "(etc.) Etc, (vs. cf.) i.e.: «e.g.» .py. ..py (.gitignore) ...",
+            "#: foo(). (bar_baz()) `*args`, **kwargs (a.b.c()) x) (y ()z () 1.1)) end.",
+            "It's _private_ — “quoted”, don't... ½ 10% Ⅻ, f(x:int) -> None:",
+        ]:
+            assert words(text) == pattern.findall(text.lower())
+
+    def test_spans(self) -> None:
+        text = "  A typo,\n  recieve  e.g.foo"
+        assert [text[start:end] for start, end in spans(text)] == ["A", "typo", "recieve", "e", "g", "foo"]
+        assert list(spans(text))[2] == (12, 19)
+
+        pattern = compile_pattern([])
+        text = "i.e. this"
+        assert [text[start:end] for start, end in spans(text, pattern)] == ["i", "e", "this"]
+        assert words("see etc.", pattern) == ["see", "etc"]
+
+
+class TestChecker(TestCase):
+    def test_check(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"SPELL_CACHE_DIR": tmp}):
+            text = Text("Call foo_bar() or Parsr.run(), e.g. on a .pyx file, and recieve it")
+            checker = Checker(text, engine=get_engine(frequency_dictionary=FREQUENCIES))
+            assert [f.word for f in checker.check()] == ["recieve"]
+
+            verdicts = checker.check_many(["recieve", "on", "recieve", "foo_bar()", "parsr"])
+            assert list(verdicts) == ["recieve", "on", "foo_bar()", "parsr"]
+            assert verdicts["recieve"] == checker.verdict("recieve") != []
+            assert verdicts["foo_bar()"] == []
+            verdicts = {**checker.check_many(checker.words), "recieve": []}
+            assert checker.check(verdicts=verdicts) == []
+
+    def test_single_candidate(self) -> None:
+        # A single candidate has a confidence of 1 too, only the word itself is correct
+        checker = Checker(Text("Recieve it"), engine=get_engine(frequency_dictionary=FREQUENCIES))
+        verdicts = {"recieve": [("receive", 1.0)], "it": [("it", 1.0)]}
+        assert [(f.word, f.suggestions) for f in checker.check(verdicts=verdicts)] == [
+            ("recieve", [("receive", 1.0)])
+        ]
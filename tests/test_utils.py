@@ -0,0 +1,21 @@
+from unittest import TestCase
+
+from spell.utils import LRUCache
+
+
+class TestLRUCache(TestCase):
+    def test_eviction(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+
+        assert "a" in cache and "c" in cache and "b" not in cache
+        assert cache.get("b") is None
+        assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 1, "evictions": 1}
+
+    def test_disabled(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(maxsize=0)
+        cache.put("a", 1)
+        assert len(cache) == 0 and cache.get("a") is None
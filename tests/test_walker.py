@@ -0,0 +1,130 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from spell.config import Config
+from spell.walker import Walker, find_paths, read_paths, translate
+
+CWD = os.getcwd()
+
+
+class TestWalker(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        for name in (
+            "a.py",
+            "b.txt",
+            "pkg/__init__.py",
+            "pkg/z.py",
+            "pkg/build/gen.py",
+            "pkg/sub/deep.py",
+            "pkg/sub/keep.py",
+            ".venv/lib/site.py",
+            "node_modules/x/y.py",
+            "pkg/__pycache__/z.py",
+            "docs/conf.py",
+        ):
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+        (self.root / ".gitignore").write_text("# generated\n*.py\n!keep.py\n!/a.py\n!pkg/**\nbuild/\n/docs\n")
+
+    def relative(self, **kwargs: object) -> list[str]:
+        return [p.relative_to(self.root).as_posix() for p in find_paths([self.root], **kwargs)]  # type: ignore
+
+    def test_translate(self) -> None:
+        assert translate("*.py") == r"(?:.*/)?[^/]*\.py"
+        assert translate("/docs") == "docs"
+        assert translate("a/**/b") == "a/(?:.*/)?b"
+
+    def test_default(self) -> None:
+        assert self.relative(gitignore=False) == [
+            "a.py",
+            "docs/conf.py",
+            "pkg/__init__.py",
+            "pkg/build/gen.py",
+            "pkg/sub/deep.py",
+            "pkg/sub/keep.py",
+            "pkg/z.py",
+        ]
+
+    def test_gitignore(self) -> None:
+        # the last matching rule wins: build/ is pruned, although pkg/** re-included it
+        assert self.relative() == [
+            "a.py",
+            "pkg/__init__.py",
+            "pkg/sub/deep.py",
+            "pkg/sub/keep.py",
+            "pkg/z.py",
+        ]
+        (self.root / "pkg" / "sub" / ".gitignore").write_text("deep.py\n")
+        assert "pkg/sub/deep.py" not in self.relative()
+
+    def test_include_exclude(self) -> None:
+        assert self.relative(gitignore=False, exclude=["sub/", "z.py"], include=["pkg/**"]) == [
+            "pkg/__init__.py",
+            "pkg/build/gen.py",
+        ]
+        assert self.relative(gitignore=False, extensions=[".txt"]) == ["b.txt"]
+
+    def test_explicit_file(self) -> None:
+        path = self.root / "node_modules" / "x" / "y.py"
+        assert list(find_paths([path, self.root / "b.txt"])) == [path]
+
+    def test_symlinks(self) -> None:
+        if sys.platform == "win32":
+            self.skipTest("symlinks need privileges on Windows")
+        os.symlink(self.root / "pkg", self.root / "link")
+        os.symlink(self.root, self.root / "pkg" / "loop")
+
+        assert not any(p.startswith("link/") for p in self.relative(gitignore=False))
+        followed = self.relative(gitignore=False, follow_symlinks=True)
+        assert "link/z.py" in followed and "pkg/z.py" not in followed  # walked already, through link
+        assert len(followed) == len(set(followed))
+
+    def test_deep_tree(self) -> None:
+        path = self.root / "deep"
+        for _ in range(sys.getrecursionlimit() // 8):
+            path /= "d"
+        path.mkdir(parents=True)
+        (path / "leaf.py").write_text("")
+
+        walker = Walker(Config(paths=[self.root / "deep"], verbosity=0))
+        assert list(walker.walk()) == [path / "leaf.py"]
+
+    def test_files_from(self) -> None:
+        listing = self.root / "files"
+        listing.write_bytes(b"a.py\r\nb.txt\n\nmissing/c.md\npkg\nd\xff.py\npkg/z.py")
+        assert list(read_paths(listing))[-2:] == [Path(os.fsdecode(b"d\xff.py")), Path("pkg/z.py")]
+        walker = Walker(Config(paths=[self.root], verbosity=0, files_from=listing))
+        # Relative to the current directory, missing files (e.g. deleted in a diff) are left to the pipeline
+        os.chdir(self.root)
+        try:
+            assert list(walker.walk()) == [
+                Path("a.py"),
+                Path("missing/c.md"),
+                Path(os.fsdecode(b"d\xff.py")),
+                Path("pkg/z.py"),
+            ]
+        finally:
+            os.chdir(CWD)
+
+        listing.write_bytes(b"with\nnewline.py\0a.py\0")
+        assert list(read_paths(listing, null=True)) == [Path("with\nnewline.py"), Path("a.py")]
+
+    def test_files_from_stream(self) -> None:
+        # paths are yielded while the list is being written
+        read_fd, write_fd = os.pipe()
+        with open(read_fd, "rb") as reader, open(write_fd, "wb", buffering=0) as writer:
+            writer.write(b"a.py\npkg/")
+            with mock.patch("sys.stdin", mock.Mock(buffer=reader)):
+                paths = read_paths(Path("-"))
+                assert next(paths) == Path("a.py")
+                writer.write(b"z.py\n")
+                assert next(paths) == Path("pkg/z.py")
+                writer.close()
+                assert list(paths) == []
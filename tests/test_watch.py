@@ -0,0 +1,65 @@
+import io
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from spell.config import Config
+from spell.watch import Watcher
+
+DATA = Path(__file__).parent / "data"
+
+
+class TestWatcher(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"SPELL_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.root = Path(tmp.name) / "src"
+        self.root.mkdir()
+
+    def test_poll(self) -> None:
+        a, b = self.root / "a.py", self.root / "b.md"
+        a.write_text("x = 1  # an recieve\ny = 2  # an exampel\n")
+        b.write_text("```\nno prose\n```\n")
+        stream = io.StringIO()
+        config = Config(
+            paths=[self.root],
+            verbosity=0,
+            jobs=1,
+            frequency_dictionary=DATA / "frequencies",
+            vocabulary="project",
+        )
+        watcher = Watcher(config, stream)
+
+        def poll() -> list[str]:
+            stream.seek(0)
+            stream.truncate()
+            watcher.poll()
+            return stream.getvalue().splitlines()
+
+        assert poll() == [
+            f"+ {a}:1:13: recieve -> receive",
+            f"+ {a}:2:13: exampel -> example",
+            "2 misspelled word(s) in 1 file(s)",
+        ]
+        assert poll() == []
+
+        # Lines moved: nothing new, nothing resolved
+        a.write_text("\n\nx = 1  # an recieve\ny = 2  # an exampel\n")
+        assert poll() == []
+        assert watcher.findings[a]["recieve", 1].line_no == 3
+
+        with mock.patch.object(watcher.context, "check_file", wraps=watcher.context.check_file) as check_file:
+            b.write_text("The recieve\n")
+            assert poll() == [f"+ {b}:1:5: recieve -> receive", "3 misspelled word(s) in 2 file(s)"]
+        check_file.assert_called_once_with(b)
+
+        # An identifier of another file is a known word with --vocabulary project
+        (self.root / "c.py").write_text("def exampel():\n    pass\n")
+        assert poll() == [f"- {a}:4:13: exampel -> example", "2 misspelled word(s) in 2 file(s)"]
+
+        b.unlink()
+        assert poll() == [f"- {b}:1:5: recieve -> receive", "1 misspelled word(s) in 1 file(s)"]